@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add repo root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic_data import generate_dataset, write_bulk
+from src.database.db_manager import DBManager
+
+# Suíte de benchmarks sobre ligas sintéticas.
+# Uso:
+#   python benchmarks/run_benchmarks.py                      # escalas 1, 10, 100
+#   python benchmarks/run_benchmarks.py --scales 1,10 --save-baseline
+#   python benchmarks/run_benchmarks.py --compare             # compara com benchmarks/baseline.json
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+REGRESSION_THRESHOLD = 1.20  # 20% mais lento que o baseline
+
+
+def _timeit(func, repeat=1):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_scale(scale, workdir, n_teams=20, n_seasons=1, seed=0, analyze_sample=50):
+    from src.analysis.pipeline import analyze_fixture, prepare_fixture, score_fixtures
+    from src.analysis.statistical import StatisticalAnalyzer
+    from src.ml.feature_engineering import calculate_rolling_stats, prepare_training_data
+    from src.ml.model import CornerPredictor
+
+    results = {}
+    matches, stats = generate_dataset(scale=scale, n_teams=n_teams, n_seasons=n_seasons, seed=seed)
+    n = len(matches)
+    results["matches"] = n
+
+    # 1. Ingestão pelo caminho real (save_match + save_stats via thread escritora)
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    db = DBManager(db_path)
+
+    def ingest():
+        for m, s in zip(matches, stats):
+            db.save_match(m)
+            db.save_stats(m['id'], s)
+        db.flush()
+
+    elapsed, _ = _timeit(ingest)
+    results["ingest_s"] = elapsed
+    results["ingest_rows_per_s"] = 2 * n / elapsed
+
+    # 1b. Ingestão em lote (caminho do sync em streaming: save_matches/save_stats_many)
+    bulk_db = DBManager(os.path.join(workdir, f"bench_{scale}_bulk.db"))
+    elapsed, _ = _timeit(lambda: write_bulk(bulk_db, matches, stats))
+    bulk_db.close()
+    results["ingest_bulk_s"] = elapsed
+
+    # 2. Leitura analítica
+    elapsed, df = _timeit(db.get_historical_data, repeat=3)
+    results["get_historical_data_s"] = elapsed
+
+    # 3. Features
+    elapsed, _ = _timeit(lambda: calculate_rolling_stats(df), repeat=3)
+    results["calculate_rolling_stats_s"] = elapsed
+    elapsed, _ = _timeit(db.get_rolling_features, repeat=3)
+    results["rolling_features_sql_s"] = elapsed
+
+    # 4. Modelo
+    X, y, _ = prepare_training_data(df)
+    predictor = CornerPredictor(model_path=os.path.join(workdir, f"model_{scale}.pkl"))
+    elapsed, _ = _timeit(lambda: predictor.train(X, y))
+    results["train_s"] = elapsed
+
+    sample = X.iloc[:1]
+    elapsed, _ = _timeit(lambda: predictor.predict(sample), repeat=20)
+    results["predict_single_s"] = elapsed
+    elapsed, _ = _timeit(lambda: predictor.predict(X), repeat=3)
+    results["predict_batch_s"] = elapsed
+
+    # 5. Análise estatística (amostra de jogos do fim da base)
+    analyzer = StatisticalAnalyzer()
+    fixtures = matches[-analyze_sample:]
+
+    def analyze():
+        for m in fixtures:
+            analyze_fixture(m, df, analyzer, predictor=None)
+
+    elapsed, _ = _timeit(analyze)
+    results["analyze_match_s"] = elapsed / len(fixtures)
+
+    # 5b. Vazão do estágio estatístico: série vs pool de processos (um worker por núcleo).
+    # Os streams por (seed, jogo, mercado) tornam os dois caminhos idênticos
+    jobs = [job for job in (prepare_fixture(m, df, analyzer) for m in fixtures) if job is not None]
+    elapsed_serial, serial = _timeit(lambda: score_fixtures(jobs, analyzer, max_workers=1))
+    elapsed_pool, pooled = _timeit(lambda: score_fixtures(jobs, analyzer))
+    if [r.top_picks for r in serial] != [r.top_picks for r in pooled]:
+        raise RuntimeError("Pool de processos divergiu do caminho serial")
+    results["score_serial_s"] = elapsed_serial / len(jobs)
+    results["score_pool_s"] = elapsed_pool / len(jobs)
+    results["score_pool_workers"] = os.cpu_count() or 1
+    results["score_pool_speedup"] = elapsed_serial / elapsed_pool
+
+    # 6. Conferência de previsões pendentes (3 por jogo)
+    db.writer.submit_many(
+        "INSERT INTO predictions (match_id, prediction_type, predicted_value, market, probability, odds, category) VALUES (?, 'Statistical', 0, ?, 0.6, 1.6, 'Top7')",
+        [(m['id'], market) for m in matches for market in ("Over 9.5", "Under 10.5", "Over 8.5")],
+    )
+    db.flush()
+    elapsed, _ = _timeit(lambda: db.check_predictions(verbose=False))
+    results["check_predictions_s"] = elapsed
+
+    db.close()
+    return results
+
+
+def compare(current, baseline):
+    regressions = []
+    print(f"\n{'ESCALA':<8} {'MÉTRICA':<28} {'ATUAL':>12} {'BASELINE':>12} {'RAZÃO':>8}")
+    for scale, metrics in current.items():
+        base = baseline.get(scale, {})
+        for name, value in metrics.items():
+            if not name.endswith("_s") or name not in base:
+                continue
+            ratio = value / base[name] if base[name] else float("inf")
+            flag = " <-- REGRESSÃO" if ratio > REGRESSION_THRESHOLD else ""
+            print(f"{scale + 'x':<8} {name:<28} {value:>12.4f} {base[name]:>12.4f} {ratio:>8.2f}{flag}")
+            if flag:
+                regressions.append((scale, name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks com ligas sintéticas")
+    parser.add_argument("--scales", default="1,10,100", help="Múltiplos do tamanho atual (ex: 1,10,100)")
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Grava os resultados em JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Grava {BASELINE_PATH}")
+    parser.add_argument("--compare", action="store_true", help="Compara com o baseline salvo")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="projeto_bet_bench_")
+    results = {}
+    try:
+        for scale in [int(s) for s in args.scales.split(",")]:
+            print(f"Executando escala {scale}x...")
+            results[str(scale)] = bench_scale(scale, workdir, n_teams=args.teams, n_seasons=args.seasons, seed=args.seed)
+            for name, value in results[str(scale)].items():
+                print(f"  {name:<28} {value:.4f}" if isinstance(value, float) else f"  {name:<28} {value}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline salvo em {BASELINE_PATH}")
+
+    if args.compare:
+        if not os.path.exists(BASELINE_PATH):
+            print("Nenhum baseline salvo. Rode com --save-baseline primeiro.")
+            return 1
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import numpy as np
+
+# Gerador de ligas sintéticas no formato do DBManager (matches + match_stats).
+# Cada time tem força ofensiva/defensiva de escanteios; os escanteios de cada lado
+# seguem uma Binomial Negativa com média base * ataque * defesa do adversário,
+# e o 1º tempo recebe uma fração binomial do total.
+
+SEASON_SECONDS = 270 * 24 * 3600
+
+
+def round_robin(team_ids):
+    # Método do círculo: turno e returno, cada rodada com n/2 jogos
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            a, b = teams[i], teams[n - 1 - i]
+            if a is not None and b is not None:
+                pairs.append((a, b) if r % 2 == 0 else (b, a))
+        rounds.append(pairs)
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    return rounds + [[(b, a) for a, b in pairs] for pairs in rounds]
+
+
+def generate_league(n_teams=20, n_seasons=1, league_id=1, seed=0, corners_mean=10.2,
+                    dispersion=1.3, ht_share=0.45, start_ts=1_700_000_000, first_match_id=1):
+    # Retorna (matches, stats): listas de dicts prontas para save_match/save_stats
+    rng = np.random.default_rng(seed)
+    team_ids = [league_id * 1000 + i for i in range(n_teams)]
+    attack = dict(zip(team_ids, rng.lognormal(0, 0.15, n_teams)))
+    defense = dict(zip(team_ids, rng.lognormal(0, 0.10, n_teams)))
+    home_share = 0.54
+
+    matches = []
+    stats = []
+    match_id = first_match_id
+    schedule = round_robin(team_ids)
+
+    for season in range(n_seasons):
+        season_start = start_ts + season * SEASON_SECONDS
+        round_gap = SEASON_SECONDS // len(schedule)
+        for round_idx, pairs in enumerate(schedule):
+            for k, (home, away) in enumerate(pairs):
+                ts = season_start + round_idx * round_gap + k * 3600
+                mu_h = corners_mean * home_share * attack[home] * defense[away]
+                mu_a = corners_mean * (1 - home_share) * attack[away] * defense[home]
+
+                # NB com média mu e variância mu * dispersion
+                c_h = _nbinom(rng, mu_h, dispersion)
+                c_a = _nbinom(rng, mu_a, dispersion)
+                s_h = rng.poisson(mu_h * 0.8)
+                s_a = rng.poisson(mu_a * 0.8)
+
+                matches.append({
+                    'id': match_id,
+                    'tournament': f"Liga Sintética {league_id}",
+                    'season_id': league_id * 100 + season,
+                    'round': round_idx + 1,
+                    'status': 'finished',
+                    'timestamp': int(ts),
+                    'home_id': home,
+                    'home_name': f"Time {home}",
+                    'away_id': away,
+                    'away_name': f"Time {away}",
+                    'home_score': int(rng.poisson(1.4)),
+                    'away_score': int(rng.poisson(1.1)),
+                })
+                stats.append({
+                    'match_id': match_id,
+                    'corners_home_ft': int(c_h), 'corners_away_ft': int(c_a),
+                    'corners_home_ht': int(rng.binomial(c_h, ht_share)), 'corners_away_ht': int(rng.binomial(c_a, ht_share)),
+                    'shots_ot_home_ft': int(s_h), 'shots_ot_away_ft': int(s_a),
+                    'shots_ot_home_ht': int(rng.binomial(s_h, 0.45)), 'shots_ot_away_ht': int(rng.binomial(s_a, 0.45)),
+                })
+                match_id += 1
+
+    return matches, stats
+
+
+def _nbinom(rng, mu, dispersion):
+    if dispersion <= 1:
+        return rng.poisson(mu)
+    n = mu / (dispersion - 1)
+    return rng.negative_binomial(n, 1 / dispersion)
+
+
+def generate_dataset(scale=1, n_teams=20, n_seasons=1, seed=0, **kwargs):
+    # scale=1 ~ tamanho do banco atual (1 liga, 1 temporada); scale=k gera k ligas
+    matches = []
+    stats = []
+    next_id = 1
+    for league in range(1, scale + 1):
+        m, s = generate_league(n_teams=n_teams, n_seasons=n_seasons, league_id=league,
+                               seed=seed + league, first_match_id=next_id, **kwargs)
+        matches.extend(m)
+        stats.extend(s)
+        next_id += len(m)
+    return matches, stats
+
+
+def write_bulk(db, matches, stats, batch_size=500):
+    # Escrita em lote pelo mesmo caminho da ingestão em streaming (save_matches +
+    # save_stats_many: thread escritora, validação e quality, updated_at)
+    for i in range(0, len(matches), batch_size):
+        db.save_matches(matches[i:i + batch_size])
+    for i in range(0, len(stats), batch_size):
+        db.save_stats_many([(s['match_id'], s) for s in stats[i:i + batch_size]])
+    db.flush()
@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.synthetic_data import generate_dataset, write_bulk
+from src.database.db_manager import DBManager
+
+
+@pytest.fixture
+def synthetic_db(tmp_path):
+    # Liga sintética (benchmarks/synthetic_data.py) num banco temporário
+    db = DBManager(str(tmp_path / "football_data.db"))
+    matches, stats = generate_dataset(scale=1, n_teams=10)
+    write_bulk(db, matches, stats)
+    yield db
+    db.close()
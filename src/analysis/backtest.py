@@ -0,0 +1,219 @@
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.markets import DEFAULT_MARKETS, get_market, market_corners, settle_selection
+from src.analysis.pipeline import SUGGESTION_LEVELS
+from src.analysis.statistical import StatisticalAnalyzer
+from src.instrumentation import timed
+from src.ml.feature_engineering import FEATURES, FULL_FEATURES, FeatureBuilder
+from src.ml.model import CornerPredictor, MultiTargetPredictor, target_matrix
+
+# Backtest point-in-time: repassa os jogos em ordem de (start_timestamp, match_id)
+# e, para cada um, usa só o que já tinha acontecido antes do apito inicial:
+# - features do modelo: FeatureBuilder (estado incremental por time, uma passada)
+# - histórico dos times para o StatisticalAnalyzer: últimos N jogos de cada time
+# - modelo: retreinado a cada `retrain_every` jogos com os jogos anteriores
+# Depois liquida Top7, sugestões e ML contra o match_stats real. As linhas têm
+# as colunas de backtest_results (mesmo relatório de desempenho das previsões).
+
+MODELS = ("single", "multi")
+
+
+def _created_at(timestamp):
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Backtester:
+    def __init__(self, analyzer=None, model=None, retrain_every=250, min_train=150, history_games=5,
+                 min_games=3, window=5):
+        # model: None (só estatística), 'single' (CornerPredictor) ou 'multi' (MultiTargetPredictor)
+        if model is not None and model not in MODELS:
+            raise ValueError(f"Modelo inválido: {model}. Opções: {', '.join(MODELS)}")
+        self.analyzer = analyzer or StatisticalAnalyzer(engine="table")
+        self.model = model
+        self.retrain_every = retrain_every
+        self.min_train = min_train
+        self.history_games = history_games
+        self.min_games = min_games
+        self.window = window
+        self.markets = self.analyzer.markets
+        self.retrains = 0
+
+    def _new_predictor(self):
+        # model_path sem uso: fit() não grava nada
+        if self.model == "multi":
+            return MultiTargetPredictor(model_path=None)
+        return CornerPredictor(model_path=None)
+
+    def _fit(self, train):
+        train = train.dropna(subset=FEATURES)
+        if len(train) < self.min_train:
+            return None
+        predictor = self._new_predictor()
+        if self.model == "multi":
+            predictor.fit(train[FULL_FEATURES], target_matrix(train))
+        else:
+            predictor.fit(train[FEATURES], train['corners_home_ft'] + train['corners_away_ft'])
+        self.retrains += 1
+        return predictor
+
+    @timed("backtest.predictions")
+    def _predictions(self, df, first):
+        # Previsões por blocos de retrain_every jogos a partir da linha `first`.
+        # Cada bloco usa um modelo treinado só com jogos de horário anterior ao bloco.
+        ml = np.full(len(df), np.nan)
+        params = [None] * len(df)
+        if self.model is None:
+            return ml, params
+
+        ts = df['start_timestamp'].values
+        for start in range(first, len(df), self.retrain_every):
+            end = min(start + self.retrain_every, len(df))
+            predictor = self._fit(df[ts < ts[start]])
+            if predictor is None:
+                continue
+            block = df.iloc[start:end]
+            ok = block[FEATURES].notna().all(axis=1).values
+            if not ok.any():
+                continue
+            X = block[ok]
+            idx = np.arange(start, end)[ok]
+            ml[idx] = predictor.predict(X)
+            if self.model == "multi":
+                for i, p in zip(idx, predictor.market_parameters_many(self.markets, X)):
+                    params[i] = p
+        return ml, params
+
+    def _team_frame(self, games):
+        return pd.DataFrame(list(games), columns=['corners_ft', 'corners_ht', 'corners_2t', 'shots_ht'])
+
+    def _settle_rows(self, run_id, row, result):
+        created_at = _created_at(row.start_timestamp)
+        stats = {
+            'corners_home_ft': row.corners_home_ft, 'corners_away_ft': row.corners_away_ft,
+            'corners_home_ht': row.corners_home_ht, 'corners_away_ht': row.corners_away_ht,
+        }
+        total = row.corners_home_ft + row.corners_away_ft
+
+        picks = [('Top7', pick) for pick in result.top_picks]
+        picks += [(f"Suggestion_{level}", result.suggestions[level])
+                  for level in SUGGESTION_LEVELS if result.suggestions.get(level)]
+
+        rows = []
+        if result.ml_prediction is not None:
+            market = f"Over {int(result.ml_prediction)}"
+            status, profit = settle_selection(market, total)
+            rows.append({
+                'run_id': run_id, 'match_id': row.match_id, 'prediction_type': 'ML',
+                'predicted_value': float(result.ml_prediction), 'market': market, 'probability': 0.0,
+                'odds': 0.0, 'category': None, 'market_group': None, 'status': status,
+                'actual': float(total), 'profit': profit, 'created_at': created_at,
+            })
+
+        for category, pick in picks:
+            group = get_market(self.markets, pick.market) or DEFAULT_MARKETS[0]
+            actual = market_corners(group, stats)
+            status, profit = settle_selection(pick.selection, actual, pick.odd)
+            rows.append({
+                'run_id': run_id, 'match_id': row.match_id, 'prediction_type': 'Statistical',
+                'predicted_value': 0.0, 'market': pick.selection, 'probability': pick.prob,
+                'odds': pick.odd, 'category': category, 'market_group': pick.market, 'status': status,
+                'actual': float(actual), 'profit': profit, 'created_at': created_at,
+            })
+        return rows
+
+    @timed("backtest.run")
+    def run(self, df, start_ts=None, run_id=None, progress=None):
+        # df: get_historical_data(). Jogos antes de start_ts só aquecem o estado.
+        # progress(feitos, total): callback opcional
+        run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        df = df.dropna(subset=['corners_home_ft', 'corners_away_ft', 'corners_home_ht', 'corners_away_ht'])
+        df = df.sort_values(['start_timestamp', 'match_id']).reset_index(drop=True)
+
+        # Features point-in-time de todos os jogos numa passada (estado anterior a cada jogo)
+        df = pd.concat([df, FeatureBuilder(self.window).build(df)], axis=1)
+
+        first = 0 if start_ts is None else int(np.searchsorted(df['start_timestamp'].values, start_ts))
+        ml, params = self._predictions(df, first)
+
+        teams = {}
+        results = []
+        pending = []
+        total = len(df) - first
+        for i, row in enumerate(df.itertuples(index=False)):
+            # Jogos no mesmo horário não se enxergam (igual ao FeatureBuilder)
+            if pending and pending[0].start_timestamp != row.start_timestamp:
+                self._update_teams(teams, pending)
+                pending = []
+            pending.append(row)
+            if i < first:
+                continue
+
+            home = teams.get(row.home_team_id, ())
+            away = teams.get(row.away_team_id, ())
+            if len(home) >= self.min_games and len(away) >= self.min_games:
+                ml_prediction = None if np.isnan(ml[i]) else float(ml[i])
+                result = self.analyzer.analyze(
+                    self._team_frame(home), self._team_frame(away),
+                    ml_prediction=ml_prediction, match_id=row.match_id, model_params=params[i],
+                )
+                if result is not None:
+                    results.extend(self._settle_rows(run_id, row, result))
+
+            if progress:
+                progress(i - first + 1, total)
+
+        return run_id, pd.DataFrame(results, columns=[
+            'run_id', 'match_id', 'prediction_type', 'predicted_value', 'market', 'probability', 'odds',
+            'category', 'market_group', 'status', 'actual', 'profit', 'created_at',
+        ])
+
+    def _update_teams(self, teams, rows):
+        for row in rows:
+            for team_id, side in ((row.home_team_id, 'home'), (row.away_team_id, 'away')):
+                ft = getattr(row, f'corners_{side}_ft')
+                ht = getattr(row, f'corners_{side}_ht')
+                games = teams.get(team_id)
+                if games is None:
+                    games = teams[team_id] = deque(maxlen=self.history_games)
+                games.append((ft, ht, ft - ht, getattr(row, f'shots_ot_{side}_ht')))
+
+
+def summarize(results):
+    # Resumo por categoria: apostas, GREEN/RED/PUSH, acerto, prob. média,
+    # ROI nas odds justas e Brier score (PUSH fora do acerto e do Brier)
+    stats = results[results['prediction_type'] == 'Statistical']
+    rows = []
+    for category, group in stats.groupby('category', sort=True):
+        decided = group[group['status'] != 'PUSH']
+        hit = (decided['status'] == 'GREEN').astype(float)
+        rows.append({
+            'category': category,
+            'bets': len(group),
+            'greens': int((group['status'] == 'GREEN').sum()),
+            'reds': int((group['status'] == 'RED').sum()),
+            'pushes': int((group['status'] == 'PUSH').sum()),
+            'hit_rate': hit.mean() if len(decided) else float('nan'),
+            'avg_probability': group['probability'].mean(),
+            'roi': group['profit'].sum() / len(group),
+            'brier': ((decided['probability'] - hit) ** 2).mean() if len(decided) else float('nan'),
+        })
+
+    ml = results[results['prediction_type'] == 'ML']
+    if len(ml):
+        rows.append({
+            'category': 'ML',
+            'bets': len(ml),
+            'greens': int((ml['status'] == 'GREEN').sum()),
+            'reds': int((ml['status'] == 'RED').sum()),
+            'pushes': int((ml['status'] == 'PUSH').sum()),
+            'hit_rate': (ml['status'] == 'GREEN').mean(),
+            'avg_probability': float('nan'),
+            'roi': float('nan'),
+            'brier': float('nan'),
+            'mae': (ml['predicted_value'] - ml['actual']).abs().mean(),
+        })
+    return pd.DataFrame(rows)
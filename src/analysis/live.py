@@ -0,0 +1,212 @@
+import time
+from dataclasses import dataclass, field
+
+from src.analysis.probability_table import fair_odd, line_probabilities
+from src.analysis.statistical import StatisticalAnalyzer
+from src.scrapers.parsing import empty_match_stats, parse_match_stats
+
+# Modo ao vivo: acompanha vários jogos em andamento, lendo /event/{id} e
+# /event/{id}/statistics de todos os jogos "vencidos" em um único lote por ciclo,
+# e recalcula over/under do tempo restante com os mesmos modelos de contagem do
+# StatisticalAnalyzer (λ e variância pré-jogo escalados pelo tempo que falta).
+
+API = "https://www.sofascore.com/api/v1/event"
+
+# status.code do SofaScore
+CODE_FIRST_HALF = 6
+CODE_SECOND_HALF = 7
+CODE_HALFTIME = 31
+
+PERIOD_MINUTES = {"ft": 90.0, "ht": 45.0, "2t": 45.0}
+
+
+@dataclass
+class LiveLine:
+    market: str
+    line: float
+    current: int  # escanteios já ocorridos no período do mercado
+    prob_over: float
+    prob_under: float
+    odd_over: float
+    odd_under: float
+
+
+@dataclass
+class LiveSnapshot:
+    match_id: int
+    status: str  # 'notstarted', '1st', 'halftime', '2nd', 'finished'
+    minute: float
+    corners: dict  # {'home_ft', 'away_ft', 'home_ht', 'away_ht', 'home_2t', 'away_2t'}
+    lines: list = field(default_factory=list)
+
+
+@dataclass
+class _TrackedMatch:
+    match_id: int
+    params: object  # array (n_mercados, 2) de StatisticalAnalyzer.match_parameters
+    next_poll: float = 0.0
+    errors: int = 0
+    last: LiveSnapshot = None
+
+
+def match_clock(event, now=None):
+    # (status, minuto) a partir do payload de /event/{id}
+    now = now or time.time()
+    status = event.get('status', {})
+    if status.get('type') == 'finished':
+        return 'finished', 90.0
+    if status.get('type') != 'inprogress':
+        return 'notstarted', 0.0
+
+    code = status.get('code')
+    period_start = event.get('time', {}).get('currentPeriodStartTimestamp')
+    elapsed = (now - period_start) / 60 if period_start else 0.0
+
+    if code == CODE_HALFTIME:
+        return 'halftime', 45.0
+    if code == CODE_SECOND_HALF:
+        return '2nd', 45.0 + max(elapsed, 0.0)
+    return '1st', max(elapsed, 0.0)
+
+
+def remaining_fraction(period, status, minute):
+    # Fração do período do mercado que ainda falta jogar (acréscimos ignorados)
+    if status == 'finished':
+        return 0.0
+    if period == 'ft':
+        return max(90.0 - minute, 0.0) / 90.0
+    if period == 'ht':
+        if status in ('halftime', '2nd'):
+            return 0.0
+        return max(45.0 - minute, 0.0) / 45.0
+    # 2t
+    if status in ('notstarted', '1st', 'halftime'):
+        return 1.0
+    return max(90.0 - minute, 0.0) / 45.0
+
+
+def period_corners(market, corners):
+    total = 0
+    if market.uses_home:
+        total += corners[f"home_{market.period}"]
+    if market.uses_away:
+        total += corners[f"away_{market.period}"]
+    return total
+
+
+class LiveTracker:
+    def __init__(self, scraper, analyzer=None, base_interval=30.0, fast_interval=10.0,
+                 halftime_interval=60.0, max_backoff=300.0):
+        self.scraper = scraper
+        # Tabela pré-calculada: recalcular dezenas de jogos por ciclo sem simular
+        self.analyzer = analyzer or StatisticalAnalyzer(engine="table")
+        self.base_interval = base_interval
+        self.fast_interval = fast_interval
+        self.halftime_interval = halftime_interval
+        self.max_backoff = max_backoff
+        self.tracked = {}
+
+    def track(self, match_id, df_home, df_away):
+        params = self.analyzer.match_parameters(df_home, df_away)
+        self.tracked[int(match_id)] = _TrackedMatch(int(match_id), params)
+
+    def untrack(self, match_id):
+        self.tracked.pop(int(match_id), None)
+
+    def _next_interval(self, snapshot):
+        if snapshot.status == 'halftime':
+            return self.halftime_interval
+        if snapshot.status == 'notstarted':
+            return self.base_interval * 2
+        # Mais rápido perto do fim de cada tempo (no 2º tempo o minuto já começa em 45)
+        if (snapshot.status == '1st' and snapshot.minute >= 38) or snapshot.minute >= 83:
+            return self.fast_interval
+        return self.base_interval
+
+    def _backoff(self, tracked):
+        return min(self.base_interval * (2 ** tracked.errors), self.max_backoff)
+
+    def live_lines(self, tracked, status, minute, corners):
+        lines = []
+        for market, (lambda_pre, var_pre) in zip(self.analyzer.markets, tracked.params):
+            frac = remaining_fraction(market.period, status, minute)
+            if frac <= 0:
+                continue
+            current = period_corners(market, corners)
+            cdf = self.analyzer.market_cdf(lambda_pre * frac, var_pre * frac)
+
+            for line in market.lines:
+                # Escanteios que ainda faltam; negativo = linha já passada. Cada metade de
+                # uma quarter line é tratada à parte (9.75 com 10 no placar: a metade 10.0
+                # ainda pode devolver)
+                prob_over, prob_under, prob_push = line_probabilities(cdf, line - current)
+                lines.append(LiveLine(
+                    market=market.name, line=line, current=current,
+                    prob_over=float(prob_over), prob_under=float(prob_under),
+                    odd_over=float(fair_odd(prob_over, prob_push)),
+                    odd_under=float(fair_odd(prob_under, prob_push)),
+                ))
+        return lines
+
+    def poll_once(self, now=None):
+        # Um ciclo: busca em lote todos os jogos com polling vencido
+        now = now or time.time()
+        due = [t for t in self.tracked.values() if t.next_poll <= now]
+        if not due:
+            return []
+
+        urls = []
+        for t in due:
+            urls.append(f"{API}/{t.match_id}")
+            urls.append(f"{API}/{t.match_id}/statistics")
+        # Sem retentativa no lote: falhas caem no backoff por jogo (_backoff)
+        payloads = self.scraper.fetch_many(urls, retry=False)
+
+        snapshots = []
+        for i, t in enumerate(due):
+            ev_data, stats_data = payloads[2 * i], payloads[2 * i + 1]
+            if not ev_data or 'event' not in ev_data:
+                t.errors += 1
+                t.next_poll = now + self._backoff(t)
+                continue
+
+            status, minute = match_clock(ev_data['event'], now)
+            if stats_data is None and status != 'notstarted':
+                # Estatísticas indisponíveis: mantém o último estado e tenta de novo com backoff
+                t.errors += 1
+                t.next_poll = now + self._backoff(t)
+                continue
+
+            t.errors = 0
+            stats = parse_match_stats(stats_data) or empty_match_stats()
+            corners = {
+                'home_ft': stats['corners_home_ft'], 'away_ft': stats['corners_away_ft'],
+                'home_ht': stats['corners_home_ht'], 'away_ht': stats['corners_away_ht'],
+            }
+            corners['home_2t'] = corners['home_ft'] - corners['home_ht']
+            corners['away_2t'] = corners['away_ft'] - corners['away_ht']
+
+            snapshot = LiveSnapshot(
+                match_id=t.match_id, status=status, minute=minute, corners=corners,
+                lines=self.live_lines(t, status, minute, corners),
+            )
+            t.last = snapshot
+            t.next_poll = now + self._next_interval(snapshot)
+            snapshots.append(snapshot)
+
+            if status == 'finished':
+                self.untrack(t.match_id)
+
+        return snapshots
+
+    def run(self, callback, should_stop=None):
+        # Loop até todos os jogos terminarem (ou should_stop() retornar True)
+        while self.tracked and not (should_stop and should_stop()):
+            snapshots = self.poll_once()
+            if snapshots:
+                callback(snapshots)
+            if not self.tracked:
+                break
+            wait = min(t.next_poll for t in self.tracked.values()) - time.time()
+            if wait > 0:
+                time.sleep(wait)
@@ -0,0 +1,151 @@
+import json
+import os
+from dataclasses import dataclass
+
+# Catálogo declarativo de mercados de escanteios.
+# Para adicionar linhas asiáticas (10.0) ou quarter lines (9.75) basta criar
+# um data/markets.json no mesmo formato de DEFAULT_MARKETS (ver market_to_dict).
+
+MARKETS_CONFIG_PATH = "data/markets.json"
+
+PERIODS = ("ft", "ht", "2t")
+SIDES = ("both", "home", "away")
+
+
+def line_components(line):
+    # Decompõe a linha em linhas simples:
+    #   9.5  -> (9.5,)        linha normal
+    #   10.0 -> (10.0,)       linha asiática inteira (devolução no empate)
+    #   9.75 -> (9.5, 10.0)   quarter line (metade da aposta em cada)
+    #   9.25 -> (9.0, 9.5)
+    # Negativas valem ao vivo (linha já passada: -0.25 -> (-0.5, 0.0))
+    if abs(line * 4 - round(line * 4)) > 1e-9:
+        raise ValueError(f"Linha inválida: {line}")
+    frac = round(line * 4) % 4
+    if frac in (0, 2):
+        return (float(line),)
+    return (line - 0.25, line + 0.25)
+
+
+@dataclass(frozen=True)
+class Market:
+    name: str
+    period: str  # 'ft', 'ht', '2t'
+    side: str  # 'both', 'home', 'away'
+    lines: tuple
+
+    def __post_init__(self):
+        if self.period not in PERIODS:
+            raise ValueError(f"Período inválido para {self.name}: {self.period}")
+        if self.side not in SIDES:
+            raise ValueError(f"Lado inválido para {self.name}: {self.side}")
+        for line in self.lines:
+            if line < 0:
+                raise ValueError(f"Linha inválida: {line}")
+            line_components(line)
+
+    @property
+    def column(self):
+        # Coluna do DataFrame por time (corners_ft, corners_ht, corners_2t)
+        return f"corners_{self.period}"
+
+    @property
+    def uses_home(self):
+        return self.side in ("both", "home")
+
+    @property
+    def uses_away(self):
+        return self.side in ("both", "away")
+
+
+DEFAULT_MARKETS = (
+    Market("JOGO COMPLETO", "ft", "both", (8.5, 9.5, 10.5, 11.5, 12.5)),
+    Market("TOTAL MANDANTE", "ft", "home", (4.5, 5.5, 6.5)),
+    Market("TOTAL VISITANTE", "ft", "away", (3.5, 4.5, 5.5)),
+
+    Market("1º TEMPO (HT)", "ht", "both", (3.5, 4.5, 5.5)),
+    Market("2º TEMPO (FT)", "2t", "both", (3.5, 4.5, 5.5)),
+
+    Market("MANDANTE 1º TEMPO", "ht", "home", (1.5, 2.5, 3.5)),
+    Market("VISITANTE 1º TEMPO", "ht", "away", (1.5, 2.5, 3.5)),
+
+    Market("MANDANTE 2º TEMPO", "2t", "home", (1.5, 2.5, 3.5)),
+    Market("VISITANTE 2º TEMPO", "2t", "away", (1.5, 2.5, 3.5)),
+)
+
+
+def market_from_dict(data):
+    return Market(
+        name=data["name"],
+        period=data["period"],
+        side=data["side"],
+        lines=tuple(float(x) for x in data["lines"]),
+    )
+
+
+def market_to_dict(market):
+    return {
+        "name": market.name,
+        "period": market.period,
+        "side": market.side,
+        "lines": list(market.lines),
+    }
+
+
+def load_market_catalog(path=MARKETS_CONFIG_PATH):
+    if not path or not os.path.exists(path):
+        return DEFAULT_MARKETS
+
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    markets = raw["markets"] if isinstance(raw, dict) else raw
+    return tuple(market_from_dict(m) for m in markets)
+
+
+def save_market_catalog(markets, path=MARKETS_CONFIG_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"markets": [market_to_dict(m) for m in markets]}, f, indent=2, ensure_ascii=False)
+
+
+def get_market(markets, name):
+    for m in markets:
+        if m.name == name:
+            return m
+    return None
+
+
+def market_corners(market, stats):
+    # Escanteios do mercado no jogo. stats: dict/linha com corners_{home,away}_{ft,ht}
+    total = 0
+    for side, used in (("home", market.uses_home), ("away", market.uses_away)):
+        if not used:
+            continue
+        ft, ht = stats[f"corners_{side}_ft"], stats[f"corners_{side}_ht"]
+        total += {"ft": ft, "ht": ht, "2t": ft - ht}[market.period]
+    return total
+
+
+def settle_selection(selection, corners, odd=None):
+    # 'Over 9.5' / 'Under 9.75' contra o número real -> (status, lucro por unidade apostada).
+    # Quarter lines liquidam metade da aposta em cada linha; linha inteira devolve no empate.
+    # status: 'GREEN' (lucro), 'RED' (prejuízo) ou 'PUSH' (devolvida)
+    parts = selection.split(" ")
+    if len(parts) < 2 or parts[0] not in ("Over", "Under"):
+        return "RED", -1.0
+    kind, line = parts[0], float(parts[1])
+
+    win = (odd - 1) if odd else 1.0
+    components = line_components(line)
+    profit = 0.0
+    for component in components:
+        if corners == component:
+            continue
+        won = corners > component if kind == "Over" else corners < component
+        profit += (win if won else -1.0) / len(components)
+
+    if profit > 0:
+        return "GREEN", profit
+    if profit < 0:
+        return "RED", profit
+    return "PUSH", 0.0
@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analysis.statistical import StatisticalAnalyzer
+
+# Estágio estatístico de muitos jogos num pool de processos (analyze com vários alvos,
+# pré-análise diária). O processo principal reduz cada jogo aos arrays (n_mercados, 2)
+# de [λ, variância] do histórico e do modelo; só eles (e escalares) vão para os
+# workers, nunca DataFrames. Cada mercado usa o mesmo stream do modo serial
+# (StatisticalAnalyzer.market_rng: seed, jogo, mercado), então o resultado é idêntico
+# ao serial e independe do número de workers ou da divisão em lotes.
+
+PARALLEL_MIN_MATCHES = 16  # abaixo disso subir o pool custa mais que simular em série
+
+_worker_analyzer = None
+
+
+def analyzer_config(analyzer):
+    # Argumentos para recriar o analisador num worker
+    return dict(markets=analyzer.markets, engine=analyzer.engine, n_sims=analyzer.n_sims,
+                model_weight=analyzer.model_weight, ht_pressure=analyzer.ht_pressure,
+                sampling=analyzer.sampling, seed=analyzer.seed)
+
+
+def _init_worker(config):
+    global _worker_analyzer
+    _worker_analyzer = StatisticalAnalyzer(**config)
+
+
+def _score(analyzer, job):
+    match_id, match_name, params, model_params, ml_prediction = job
+    return analyzer.analyze_parameters(params, ml_prediction=ml_prediction, match_name=match_name,
+                                       match_id=match_id, model_params=model_params)
+
+
+def _score_chunk(chunk):
+    return [(i, _score(_worker_analyzer, job)) for i, job in chunk]
+
+
+class ParallelMatchAnalyzer:
+    def __init__(self, analyzer, max_workers=None, min_matches=PARALLEL_MIN_MATCHES, chunks_per_worker=4):
+        self.analyzer = analyzer
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_matches = min_matches
+        self.chunks_per_worker = chunks_per_worker
+
+    def score_jobs(self, jobs):
+        # jobs: [(match_id, match_name, params, model_params, ml_prediction)]
+        # -> [MatchAnalysis] na mesma ordem
+        if self.max_workers <= 1 or len(jobs) < self.min_matches:
+            return [_score(self.analyzer, job) for job in jobs]
+
+        n_chunks = min(len(jobs), self.max_workers * self.chunks_per_worker)
+        indexed = list(enumerate(jobs))
+        chunks = [indexed[i::n_chunks] for i in range(n_chunks)]
+
+        results = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, n_chunks), initializer=_init_worker,
+                                 initargs=(analyzer_config(self.analyzer),)) as pool:
+            for chunk_result in pool.map(_score_chunk, chunks):
+                for i, result in chunk_result:
+                    results[i] = result
+        return results
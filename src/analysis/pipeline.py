@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+
+from src.analysis.results import MatchAnalysis, Opportunity
+from src.analysis.team_cache import get_team_cache, team_key
+
+# Fluxo de análise de um jogo sem nenhuma saída no terminal:
+# histórico -> perfis por time (cache LRU) -> previsão ML -> StatisticalAnalyzer -> MatchAnalysis.
+# Usado pelo menu interativo e por chamadores em lote (que escolhem o renderizador).
+
+SUGGESTION_LEVELS = ("Easy", "Medium", "Hard")
+
+
+@dataclass
+class FixtureJob:
+    # Um jogo pronto para a simulação (prepare_fixture -> score_fixtures)
+    match_id: int
+    match_name: str
+    params: object  # array (n_mercados, 2) [λ, variância] do histórico
+    model_params: object  # idem do modelo multi-alvo, ou None
+    ml_prediction: float
+    home_avg_corners: float
+    away_avg_corners: float
+    warnings: list
+
+
+def team_games(history_df, team_id, n=5, venue=None, tournament_keyword=None):
+    # Últimos N jogos do time. venue: 'home' | 'away' | None (só jogos com esse mando)
+    if venue == 'home':
+        mask = history_df['home_team_id'] == team_id
+    elif venue == 'away':
+        mask = history_df['away_team_id'] == team_id
+    else:
+        mask = (history_df['home_team_id'] == team_id) | (history_df['away_team_id'] == team_id)
+    if tournament_keyword:
+        mask &= history_df['tournament_name'].fillna('').str.lower().str.contains(tournament_keyword.lower(), regex=False)
+    return history_df[mask].tail(n)
+
+
+def build_team_stats(games, team_id):
+    import pandas as pd
+
+    data = []
+    for _, row in games.iterrows():
+        is_home = row['home_team_id'] == team_id
+        data.append({
+            'corners_ft': row['corners_home_ft'] if is_home else row['corners_away_ft'],
+            'corners_ht': row['corners_home_ht'] if is_home else row['corners_away_ht'],
+            'corners_2t': (row['corners_home_ft'] - row['corners_home_ht']) if is_home else (row['corners_away_ft'] - row['corners_away_ht']),
+            'shots_ht': row['shots_ot_home_ht'] if is_home else row['shots_ot_away_ht']
+        })
+    return pd.DataFrame(data)
+
+
+def team_profile(history_df, team_id, analyzer, n=5, venue=None, cache=None):
+    # Perfil do time (StatisticalAnalyzer.team_profile) pelo cache LRU; None sem histórico.
+    # cache=False recalcula sempre
+    games = team_games(history_df, team_id, n=n, venue=venue)
+    if games.empty:
+        return None
+    if cache is False:
+        return analyzer.team_profile(build_team_stats(games, team_id))
+    if cache is None:
+        cache = get_team_cache()
+    return cache.get_or_compute(team_key(team_id, games, venue),
+                                lambda: analyzer.team_profile(build_team_stats(games, team_id)))
+
+
+def prepare_fixture(match_data, history_df, analyzer, predictor=None, features=None, cache=None):
+    # Tudo de analyze_fixture antes da simulação: perfis, previsão ML e parâmetros do
+    # modelo. Retorna FixtureJob (só arrays e escalares) ou None sem histórico
+    home = team_profile(history_df, match_data['home_id'], analyzer, cache=cache)
+    away = team_profile(history_df, match_data['away_id'], analyzer, cache=cache)
+    if home is None or away is None:
+        return None
+
+    warnings = []
+    if home.games < 3 or away.games < 3:
+        warnings.append("Dados insuficientes no histórico para análise precisa.")
+
+    ml_prediction = None
+    model_params = None
+    if predictor is not None:
+        # Mesmas features do treino (sem zeros no lugar de chutes/gols)
+        from src.ml.feature_engineering import fixture_features
+
+        X_new = fixture_features(match_data, history_df, builder=features)
+        ml_prediction = float(predictor.predict(X_new)[0])
+        if hasattr(predictor, 'market_parameters'):
+            # Multi-alvo: λ e variância de cada mercado entram na mistura do analisador
+            model_params = predictor.market_parameters(analyzer.markets, X_new)
+
+    return FixtureJob(
+        match_id=match_data['id'],
+        match_name=f"{match_data['home_name']} vs {match_data['away_name']}",
+        params=analyzer.profile_parameters(home, away),
+        model_params=model_params,
+        ml_prediction=ml_prediction,
+        home_avg_corners=home.columns['corners_ft'][2],
+        away_avg_corners=away.columns['corners_ft'][2],
+        warnings=warnings,
+    )
+
+
+def score_fixtures(jobs, analyzer, max_workers=None):
+    # [FixtureJob] -> [MatchAnalysis] na mesma ordem. Com muitos jogos a simulação vai
+    # para o pool de processos (src/analysis/parallel.py), com os mesmos números do serial
+    from src.analysis.parallel import ParallelMatchAnalyzer
+
+    payload = [(j.match_id, j.match_name, j.params, j.model_params, j.ml_prediction) for j in jobs]
+    results = ParallelMatchAnalyzer(analyzer, max_workers=max_workers).score_jobs(payload)
+    for job, result in zip(jobs, results):
+        result.home_avg_corners = job.home_avg_corners
+        result.away_avg_corners = job.away_avg_corners
+        result.warnings = list(job.warnings)
+    return results
+
+
+def analyze_fixture(match_data, history_df, analyzer, predictor=None, features=None, cache=None):
+    # match_data: dict no formato de DBManager.save_match
+    # predictor: CornerPredictor ou MultiTargetPredictor já carregado (ou None para pular o ML)
+    # features: FeatureBuilder já aquecido com o histórico (opcional)
+    # cache: TeamParameterCache (padrão: o do processo)
+    job = prepare_fixture(match_data, history_df, analyzer, predictor=predictor, features=features, cache=cache)
+    if job is None:
+        return None
+    return score_fixtures([job], analyzer)[0]
+
+
+def fixture_parameters(match_data, history_df, analyzer, predictor=None, features=None, cache=None):
+    # Só os parâmetros [λ, variância] por mercado (array (n_mercados, 2)) do jogo, com a
+    # mesma mistura histórico + modelo de analyze_fixture. None se faltar histórico.
+    home = team_profile(history_df, match_data['home_id'], analyzer, cache=cache)
+    away = team_profile(history_df, match_data['away_id'], analyzer, cache=cache)
+    if home is None or away is None:
+        return None
+
+    model_params = None
+    if predictor is not None and hasattr(predictor, 'market_parameters'):
+        from src.ml.feature_engineering import fixture_features
+
+        X_new = fixture_features(match_data, history_df, builder=features)
+        model_params = predictor.market_parameters(analyzer.markets, X_new)
+
+    return analyzer.blend_parameters(analyzer.profile_parameters(home, away), model_params)
+
+
+def save_analysis(db, result):
+    # Substitui as previsões anteriores do jogo (ML, Top7 e sugestões)
+    match_id = result.match_id
+    db.delete_predictions(match_id, verbose=False)
+
+    if result.ml_prediction is not None:
+        db.save_prediction(match_id, 'ML', result.ml_prediction, f"Over {int(result.ml_prediction)}", 0.0)
+
+    for pick in result.top_picks:
+        db.save_prediction(
+            match_id,
+            'Statistical',
+            0,
+            pick.selection,
+            pick.prob,
+            odds=pick.odd,
+            category='Top7',
+            market_group=pick.market
+        )
+
+    for level, pick in result.suggestions.items():
+        if pick:
+            db.save_prediction(
+                match_id,
+                'Statistical',
+                0,
+                pick.selection,
+                pick.prob,
+                odds=pick.odd,
+                category=f"Suggestion_{level}",
+                market_group=pick.market
+            )
+
+
+def _stored_pick(row):
+    return Opportunity(
+        market=row['market_group'] or "",
+        selection=row['market'],
+        prob=row['probability'],
+        odd=row['odds'],
+        kind="OVER" if "Over" in row['market'] else "UNDER",
+    )
+
+
+def load_analysis(db, match_id):
+    # Reconstrói a análise salva de um jogo (Top7, sugestões e ML) a partir do banco
+    match = db.get_match(match_id)
+    match_name = f"{match['home_team_name']} vs {match['away_team_name']}" if match else None
+
+    ml_prediction = None
+    top_picks = []
+    suggestions = {}
+    for row in db.get_predictions(match_id):
+        if row['prediction_type'] == 'ML':
+            ml_prediction = row['predicted_value']
+        elif row['category'] == 'Top7':
+            top_picks.append(_stored_pick(row))
+        elif row['category'] and row['category'].startswith('Suggestion_'):
+            suggestions[row['category'].split('_')[1]] = _stored_pick(row)
+
+    return MatchAnalysis(
+        match_id=match_id,
+        match_name=match_name,
+        ml_prediction=ml_prediction,
+        top_picks=top_picks,
+        suggestions={level: suggestions[level] for level in SUGGESTION_LEVELS if level in suggestions},
+        retrieved=True,
+    )
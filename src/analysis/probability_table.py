@@ -0,0 +1,140 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from src.analysis.markets import line_components
+
+# Tabela pré-calculada de probabilidades acumuladas P(X <= k) indexada por
+# (família, bucket de λ, bucket de dispersão, k). Com ela, pontuar grades densas
+# de linhas para muitos jogos vira uma consulta em array, sem simulação.
+#
+# Dispersão = var / λ. Quando var <= λ usamos Poisson (mesma regra de
+# StatisticalAnalyzer.monte_carlo_simulation), senão Binomial Negativa com
+#   n = λ / (D - 1), p = 1 / D
+
+
+def cdf_at(cdf, k):
+    # cdf[..., k] com F(k<0) = 0 e F(k>K) = 1
+    k = int(k)
+    if k < 0:
+        return np.zeros(cdf.shape[:-1]) if cdf.ndim > 1 else 0.0
+    if k >= cdf.shape[-1]:
+        return np.ones(cdf.shape[:-1]) if cdf.ndim > 1 else 1.0
+    return cdf[..., k]
+
+
+def line_probabilities(cdf, line):
+    # Retorna (prob_over, prob_under, prob_push) para uma linha qualquer.
+    # Linhas .5 nunca têm devolução; inteiras devolvem no empate; quarter lines
+    # dividem a aposta entre as duas linhas vizinhas.
+    comps = line_components(line)
+    over = 0.0
+    under = 0.0
+    for c in comps:
+        over = over + (1 - cdf_at(cdf, math.floor(c)))
+        under = under + cdf_at(cdf, math.ceil(c) - 1)
+    over = over / len(comps)
+    under = under / len(comps)
+    return over, under, 1 - over - under
+
+
+def line_probabilities_many(cdf, lines):
+    # line_probabilities com uma linha por jogo: cdf (n, K+1), lines (n,) -> arrays (n,)
+    lines = np.asarray(lines, dtype=float)
+    quarter = np.rint(lines * 4) % 2 == 1
+    over = np.zeros(len(lines))
+    under = np.zeros(len(lines))
+    # Linha simples: as duas "componentes" são a própria linha
+    for c in (np.where(quarter, lines - 0.25, lines), np.where(quarter, lines + 0.25, lines)):
+        over += 1 - _cdf_take(cdf, np.floor(c))
+        under += _cdf_take(cdf, np.ceil(c) - 1)
+    over /= 2
+    under /= 2
+    return over, under, 1 - over - under
+
+
+def _cdf_take(cdf, k):
+    # cdf[i, k[i]] com F(k<0) = 0 e F(k>K) = 1
+    k = np.asarray(k).astype(np.int64)
+    vals = np.take_along_axis(cdf, np.clip(k, 0, cdf.shape[-1] - 1)[:, None], axis=1)[:, 0]
+    return np.where(k < 0, 0.0, np.where(k >= cdf.shape[-1], 1.0, vals))
+
+
+def fair_odd(prob_win, prob_push=0.0):
+    # Odd que zera o valor esperado considerando devolução (linhas asiáticas)
+    if prob_win <= 0:
+        return 99
+    return (1 - prob_push) / prob_win
+
+
+class TailProbabilityTable:
+    FAMILIES = ("poisson", "nbinom")
+
+    def __init__(self, lambda_max=30.0, lambda_step=0.05, dispersion_max=5.0, dispersion_step=0.05, k_max=60):
+        self.lambda_step = lambda_step
+        self.dispersion_step = dispersion_step
+        self.k_max = k_max
+        self.lambda_grid = np.arange(0, lambda_max + lambda_step / 2, lambda_step)
+        self.dispersion_grid = np.arange(1.0, dispersion_max + dispersion_step / 2, dispersion_step)
+        poisson_cdf = self._build_poisson()
+        self.tables = {
+            "poisson": poisson_cdf,
+            "nbinom": self._build_nbinom(poisson_cdf),
+        }
+
+    def _build_poisson(self):
+        lam = self.lambda_grid
+        pmf = np.empty((len(lam), self.k_max + 1))
+        pmf[:, 0] = np.exp(-lam)
+        for k in range(self.k_max):
+            pmf[:, k + 1] = pmf[:, k] * lam / (k + 1)
+        return np.minimum(np.cumsum(pmf, axis=-1), 1.0)
+
+    def _build_nbinom(self, poisson_cdf):
+        lam = self.lambda_grid[:, None]
+        disp = self.dispersion_grid[None, :]
+        pmf = np.empty((len(self.lambda_grid), len(self.dispersion_grid), self.k_max + 1))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n = lam / (disp - 1)
+            q = 1 - 1 / disp
+            pmf[..., 0] = np.exp(-n * np.log(disp))
+            for k in range(self.k_max):
+                pmf[..., k + 1] = pmf[..., k] * (k + n) / (k + 1) * q
+
+        # D == 1 é o limite Poisson
+        pmf[:, 0, :] = np.diff(poisson_cdf, axis=-1, prepend=0.0)
+        pmf[0, :, :] = 0.0
+        pmf[0, :, 0] = 1.0
+
+        return np.minimum(np.cumsum(pmf, axis=-1), 1.0)
+
+    def buckets(self, lambda_vals, var_vals):
+        # (família, bucket de λ, bucket de dispersão) vetorizado
+        lam = np.atleast_1d(np.asarray(lambda_vals, dtype=float))
+        var = np.atleast_1d(np.asarray(var_vals, dtype=float))
+        var = np.where(np.isnan(var), lam, var)
+
+        is_nbinom = var > lam
+        with np.errstate(divide="ignore", invalid="ignore"):
+            disp = np.where(lam > 0, var / lam, 1.0)
+
+        l_idx = np.clip(np.rint(lam / self.lambda_step), 0, len(self.lambda_grid) - 1).astype(int)
+        d_idx = np.clip(np.rint((disp - 1.0) / self.dispersion_step), 0, len(self.dispersion_grid) - 1).astype(int)
+        d_idx = np.where(is_nbinom, d_idx, 0)
+        return is_nbinom, l_idx, d_idx
+
+    def cdf(self, lambda_val, var_val):
+        return self.cdf_rows([lambda_val], [var_val])[0]
+
+    def cdf_rows(self, lambda_vals, var_vals):
+        is_nbinom, l_idx, d_idx = self.buckets(lambda_vals, var_vals)
+        rows = self.tables["nbinom"][l_idx, d_idx]
+        return np.where(is_nbinom[:, None], rows, self.tables["poisson"][l_idx])
+
+
+@lru_cache(maxsize=1)
+def get_probability_table():
+    # Construída uma única vez por processo
+    return TailProbabilityTable()
@@ -0,0 +1,177 @@
+import csv
+import json
+import sys
+from dataclasses import asdict
+
+# Renderizadores plugáveis para os resultados de src/analysis/results.py.
+# O cálculo nunca imprime nada: quem chama escolhe como (e se) exibir.
+#   terminal -> tabela colorida (tabulate, fancy_grid) para uso interativo
+#   json     -> um objeto JSON por análise (JSON Lines)
+#   csv      -> uma linha por pick
+#   quiet    -> nada; jobs em lote e serviços não pagam custo de formatação
+
+
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+    YELLOW = "\033[93m"
+
+
+class QuietRenderer:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def message(self, text):
+        pass
+
+    def error(self, text):
+        pass
+
+    def progress(self, current, total, text):
+        pass
+
+    def analysis(self, result):
+        pass
+
+    def live(self, snapshots):
+        pass
+
+
+class TerminalRenderer(QuietRenderer):
+    def _print(self, text=""):
+        print(text, file=self.stream)
+
+    def message(self, text):
+        self._print(text)
+
+    def error(self, text):
+        self._print(f"{Colors.RED}{text}{Colors.RESET}")
+
+    def progress(self, current, total, text):
+        self._print(f"[{current}/{total}] {text}")
+
+    def analysis(self, result):
+        for warning in result.warnings:
+            self._print(warning)
+
+        if result.home_avg_corners is not None:
+            self._print(f"Média Escanteios (Últimos 5): Casa {result.home_avg_corners:.1f} | Fora {result.away_avg_corners:.1f}")
+
+        if result.match_name:
+            self._print(f"\n⚽ {Colors.BOLD}{result.match_name}{Colors.RESET}")
+
+        if result.ml_prediction:
+            self._print(f"\n🤖 Previsão da IA (Random Forest): {result.ml_prediction:.2f} Escanteios")
+
+        if not result.retrieved:
+            engine = "Tabela de Probabilidades" if result.engine == "table" else "Monte Carlo"
+            self._print("\n" + "▓" * 80)
+            self._print(f" 🧠 CÉREBRO ESTATÍSTICO ({engine})")
+            self._print("▓" * 80)
+
+        if result.top_picks:
+            origem = "RECUPERADO" if result.retrieved else "DATA DRIVEN"
+            self._print(f"\n🏆 {Colors.BOLD}TOP 7 OPORTUNIDADES ({origem}){Colors.RESET}")
+            self._print(self._picks_table(result.top_picks))
+        else:
+            self._print("Nenhuma análise Top 7 encontrada para este ID.")
+
+        if result.retrieved and not any(result.suggestions.values()):
+            self._print("Nenhuma sugestão da IA encontrada para este ID.")
+            return
+
+        titulo = "SUGESTÕES DA IA (RECUPERADO):" if result.retrieved else "SUGESTÕES DA IA:"
+        self._print(f"\n🎯 {Colors.BOLD}{titulo}{Colors.RESET}")
+        for level, pick in result.suggestions.items():
+            if pick:
+                cor_nivel = Colors.GREEN if level == "Easy" else (Colors.YELLOW if level == "Medium" else Colors.RED)
+                self._print(f"{cor_nivel}[{level.upper()}]{Colors.RESET} {pick.market} - {pick.selection} (@{pick.odd:.2f}) | Prob: {pick.prob*100:.1f}%")
+            else:
+                self._print(f"[{level.upper()}] Nenhuma oportunidade encontrada.")
+
+    def live(self, snapshots):
+        for snap in snapshots:
+            c = snap.corners
+            self._print(f"\n⏱️  {Colors.BOLD}Jogo {snap.match_id}{Colors.RESET} | {snap.status} {snap.minute:.0f}' | "
+                        f"Escanteios {c['home_ft']}-{c['away_ft']} (HT {c['home_ht']}-{c['away_ht']})")
+            for line in snap.lines:
+                self._print(f"   {line.market:<20} {line.line:>5} (atual {line.current}) | "
+                            f"{Colors.GREEN}Over {line.prob_over*100:5.1f}%{Colors.RESET} @{line.odd_over:.2f} | "
+                            f"{Colors.CYAN}Under {line.prob_under*100:5.1f}%{Colors.RESET} @{line.odd_under:.2f}")
+
+    def _picks_table(self, picks):
+        # tabulate só é importado quando realmente há tabela para desenhar
+        from tabulate import tabulate
+
+        tabela_display = []
+        for pick in picks:
+            if pick.kind == "OVER":
+                cor = Colors.GREEN
+                seta = "▲"
+            else:
+                cor = Colors.CYAN
+                seta = "▼"
+
+            linha_fmt = f"{cor}{pick.selection}{Colors.RESET}"
+            prob_fmt = f"{pick.prob * 100:.1f}%"
+            if pick.se:
+                prob_fmt += f" ±{pick.se * 100:.2f}"
+            odd_fmt = f"{Colors.BOLD}@{pick.odd:.2f}{Colors.RESET}"
+            direcao_fmt = f"{cor}{seta} {pick.kind}{Colors.RESET}"
+
+            tabela_display.append([pick.market or "RECUPERADO", linha_fmt, prob_fmt, odd_fmt, direcao_fmt])
+
+        headers = ["MERCADO", "LINHA", "PROB.", "ODD JUSTA", "TIPO"]
+        return tabulate(tabela_display, headers=headers, tablefmt="fancy_grid", stralign="center")
+
+
+class JsonRenderer(QuietRenderer):
+    def error(self, text):
+        self.stream.write(json.dumps({"error": text}, ensure_ascii=False) + "\n")
+
+    def analysis(self, result):
+        self.stream.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+
+    def live(self, snapshots):
+        for snap in snapshots:
+            self.stream.write(json.dumps(asdict(snap), ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+class CsvRenderer(QuietRenderer):
+    FIELDS = ["match_id", "match_name", "category", "market", "selection", "prob", "se", "odd", "score", "kind"]
+
+    def __init__(self, stream=None, header=True):
+        super().__init__(stream)
+        self.writer = csv.DictWriter(self.stream, fieldnames=self.FIELDS)
+        self._header_pending = header
+
+    def analysis(self, result):
+        if self._header_pending:
+            self.writer.writeheader()
+            self._header_pending = False
+
+        rows = [("Top7", p) for p in result.top_picks]
+        rows += [(f"Suggestion_{level}", p) for level, p in result.suggestions.items() if p]
+        for category, pick in rows:
+            row = pick.to_dict()
+            row.update({"match_id": result.match_id, "match_name": result.match_name, "category": category})
+            self.writer.writerow(row)
+
+
+RENDERERS = {
+    "terminal": TerminalRenderer,
+    "json": JsonRenderer,
+    "csv": CsvRenderer,
+    "quiet": QuietRenderer,
+}
+
+
+def get_renderer(name="terminal", **kwargs):
+    try:
+        return RENDERERS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Renderizador desconhecido: {name}. Opções: {', '.join(RENDERERS)}")
@@ -0,0 +1,51 @@
+from dataclasses import asdict, dataclass, field
+
+# Objetos de resultado da análise. A camada de cálculo só produz estes objetos;
+# a apresentação (tabela no terminal, JSON, CSV...) fica em src/analysis/renderers.py.
+
+
+@dataclass
+class Opportunity:
+    market: str  # ex: 'JOGO COMPLETO'
+    selection: str  # ex: 'Over 9.5'
+    prob: float
+    odd: float  # Odd justa
+    score: float = 0.0
+    kind: str = "OVER"  # 'OVER' / 'UNDER'
+    se: float = None  # erro padrão de prob (simulação); None na tabela e em análises do banco
+
+    @property
+    def line(self):
+        return float(self.selection.split(" ")[1])
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class MatchAnalysis:
+    match_id: int = None
+    match_name: str = None
+    ml_prediction: float = None
+    opportunities: list = field(default_factory=list)
+    top_picks: list = field(default_factory=list)
+    suggestions: dict = field(default_factory=dict)  # {'Easy': Opportunity | None, ...}
+    engine: str = "montecarlo"
+    retrieved: bool = False  # True quando reconstruída a partir do banco
+    home_avg_corners: float = None
+    away_avg_corners: float = None
+    warnings: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "match_id": self.match_id,
+            "match_name": self.match_name,
+            "ml_prediction": self.ml_prediction,
+            "engine": self.engine,
+            "retrieved": self.retrieved,
+            "home_avg_corners": self.home_avg_corners,
+            "away_avg_corners": self.away_avg_corners,
+            "warnings": list(self.warnings),
+            "top_picks": [p.to_dict() for p in self.top_picks],
+            "suggestions": {k: (v.to_dict() if v else None) for k, v in self.suggestions.items()},
+        }
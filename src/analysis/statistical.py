@@ -1,30 +1,250 @@
+import warnings
+import zlib
+from dataclasses import dataclass
+
 import numpy as np
 import pandas as pd
-from scipy.stats import poisson, nbinom
-from tabulate import tabulate
+from scipy.stats import nbinom, poisson, qmc
+
+from src.analysis.markets import load_market_catalog
+from src.analysis.probability_table import fair_odd, get_probability_table, line_probabilities
+from src.analysis.renderers import TerminalRenderer
+from src.analysis.results import MatchAnalysis, Opportunity
+from src.instrumentation import timed
+
+# Bônus de pressão no 1º tempo (do escanteios_sofascore.py original): se a soma das
+# médias de chutes no gol no HT dos dois times passa do limite, λ dos totais HT sobe 10%
+HT_PRESSURE_SHOTS = 8
+HT_PRESSURE_FACTOR = 1.1
+
+# Simulação: amostras por mercado de cada método de amostragem (os de redução de
+# variância chegam à mesma precisão com bem menos amostras) e réplicas independentes
+# usadas no erro padrão das probabilidades
+SAMPLING_METHODS = ("random", "antithetic", "stratified", "qmc")
+DEFAULT_SIMS = {"random": 10000, "antithetic": 10000, "stratified": 2048, "qmc": 2048}
+SE_REPLICAS = 8
+
+# Colunas por time de build_team_stats (pipeline.py)
+TEAM_COLUMNS = ('corners_ft', 'corners_ht', 'corners_2t', 'shots_ht')
+
+
+@dataclass(frozen=True)
+class TeamProfile:
+    games: int
+    columns: dict  # coluna -> (λ ponderado, variância, média)
+
+
+def seed_value(value):
+    # Semente inteira estável de um id de jogo/execução (int ou texto, ex: run_id do backtest)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    text = str(value)
+    return int(text) if text.isdigit() else zlib.crc32(text.encode("utf-8"))
+
+
+def sample_uniforms(n, rng, sampling="stratified"):
+    # Uniformes (0, 1) com redução de variância para a amostragem por transformada inversa:
+    #   antithetic - pares u, 1 - u
+    #   stratified - uma amostra por estrato [i/n, (i+1)/n)
+    #   qmc        - Sobol embaralhado (1D)
+    if sampling == "antithetic":
+        half = rng.random((n + 1) // 2)
+        return np.concatenate([half, 1 - half])[:n]
+    if sampling == "stratified":
+        return (np.arange(n) + rng.random(n)) / n
+    if sampling == "qmc":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # n fora de potência de 2 só perde o balanceamento
+            return qmc.Sobol(d=1, scramble=True, seed=rng).random(n)[:, 0]
+    return rng.random(n)
 
-class Colors:
-    RESET = "\033[0m"
-    BOLD = "\033[1m"
-    GREEN = "\033[92m"
-    RED = "\033[91m"
-    CYAN = "\033[96m"
-    YELLOW = "\033[93m"
 
 class StatisticalAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, markets=None, engine="montecarlo", n_sims=None, model_weight=0.5, ht_pressure=False,
+                 sampling="stratified", seed=0):
+        # engine: 'montecarlo' (simulação) ou 'table' (consulta na tabela pré-calculada)
+        # model_weight: peso dos parâmetros do modelo multi-alvo na mistura com o histórico
+        # ht_pressure: aplica o bônus de pressão por chutes nos mercados de total do 1º tempo
+        # sampling: 'random' (sorteio direto, como antes), 'antithetic', 'stratified' ou 'qmc'
+        # seed: semente da execução (int ou texto). Com match_id, cada mercado do jogo tem
+        #   um stream próprio derivado de (seed, jogo, mercado): re-análises dão os mesmos
+        #   números. None = RNG global (sem reprodutibilidade)
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Amostragem inválida: {sampling}. Opções: {', '.join(SAMPLING_METHODS)}")
+        self.markets = markets if markets is not None else load_market_catalog()
+        self.engine = engine
+        self.sampling = sampling
+        self.n_sims = n_sims or DEFAULT_SIMS[sampling]
+        self.seed = seed
+        self.model_weight = model_weight
+        self.ht_pressure = ht_pressure
 
-    def monte_carlo_simulation(self, lambda_val, var_val, n_sims=10000):
+    @timed("simulation.monte_carlo")
+    def monte_carlo_simulation(self, lambda_val, var_val, n_sims=10000, rng=None, sampling="random", replicas=None):
+        # rng: np.random.Generator opcional (stream do mercado, ver market_rng)
+        # replicas: R simulações independentes -> array (R, n_sims)
         if var_val > lambda_val:
             # Negative Binomial
             p = lambda_val / var_val
             n = (lambda_val ** 2) / (var_val - lambda_val)
-            sims = nbinom.rvs(n, p, size=n_sims)
+            dist = nbinom(n, p)
         else:
             # Poisson
-            sims = poisson.rvs(lambda_val, size=n_sims)
-        return sims
+            dist = poisson(lambda_val)
+        shape = (replicas or 1, n_sims)
+        if sampling == "random":
+            sims = dist.rvs(size=shape, random_state=rng)
+        else:
+            # Transformada inversa: X = min{k : F(k) >= u}. A cauda além de λ + 12σ é desprezível
+            rng = rng if rng is not None else np.random.default_rng()
+            u = np.stack([sample_uniforms(n_sims, rng, sampling) for _ in range(shape[0])])
+            k_max = int(lambda_val + 12 * max(var_val, lambda_val) ** 0.5 + 10)
+            sims = np.searchsorted(dist.cdf(np.arange(k_max + 1)), u)
+        return sims if replicas else sims[0]
+
+    def simulate_replicas(self, lambda_val, var_val, rng=None):
+        # SE_REPLICAS simulações independentes de n_sims / SE_REPLICAS -> CDFs (R, K+1).
+        # A média é a estimativa; a dispersão entre réplicas dá o erro padrão (vale
+        # também para as amostras estratificadas/QMC, onde a variância amostral não vale)
+        size = -(-self.n_sims // SE_REPLICAS)
+        sims = self.monte_carlo_simulation(lambda_val, var_val, n_sims=size, rng=rng,
+                                           sampling=self.sampling, replicas=SE_REPLICAS)
+        width = int(sims.max()) + 1
+        offsets = np.arange(SE_REPLICAS)[:, None] * width
+        counts = np.bincount((sims + offsets).ravel(), minlength=SE_REPLICAS * width).reshape(SE_REPLICAS, width)
+        return np.cumsum(counts, axis=1) / size
+
+    def market_rng(self, match_id, market):
+        # Stream do mercado no jogo: independe da ordem do catálogo e dos outros jogos
+        if self.seed is None or match_id is None:
+            return None
+        return np.random.default_rng([seed_value(self.seed), seed_value(match_id), zlib.crc32(market.name.encode("utf-8"))])
+
+    def team_parameters(self, series):
+        # λ ponderado (60% histórico completo, 40% últimos 5) e variância
+        mean_10 = series.mean()
+        mean_5 = series.head(5).mean()
+        return (mean_10 * 0.6) + (mean_5 * 0.4), series.var()
+
+    def team_profile(self, df):
+        # Resumo de um time (DataFrame de build_team_stats): é o que entra em match_parameters
+        # e o que o cache por time guarda (src/analysis/team_cache.py)
+        columns = {}
+        for col in TEAM_COLUMNS:
+            lambda_val, var_val = self.team_parameters(df[col])
+            columns[col] = (lambda_val, var_val, df[col].mean())
+        return TeamProfile(games=len(df), columns=columns)
+
+    def market_parameters(self, market, home, away):
+        # home/away: TeamProfile
+        lambdas = []
+        vars_val = []
+
+        if market.uses_home:
+            l_h, v_h, _ = home.columns[market.column]
+            lambdas.append(l_h)
+            vars_val.append(v_h)
+        if market.uses_away:
+            l_a, v_a, _ = away.columns[market.column]
+            lambdas.append(l_a)
+            vars_val.append(v_a)
+
+        lambda_final = sum(lambdas)
+        var_final = sum(vars_val)
+        if len(lambdas) == 1: var_final = vars_val[0]
+
+        # Handle NaN variance (single game history)
+        if pd.isna(var_final): var_final = lambda_final
+
+        return lambda_final, var_final
+
+    def match_parameters(self, df_home, df_away):
+        # Parâmetros compactos do jogo: array (n_mercados, 2) com [λ, variância]
+        # na ordem de self.markets. É o que trafega para os workers (src/analysis/parallel.py).
+        return self.profile_parameters(self.team_profile(df_home), self.team_profile(df_away))
+
+    def profile_parameters(self, home, away):
+        # match_parameters a partir dos perfis já calculados (cache por time)
+        params = np.empty((len(self.markets), 2))
+        for i, m in enumerate(self.markets):
+            params[i] = self.market_parameters(m, home, away)
+        if self.ht_pressure:
+            self.apply_ht_pressure(params, home, away)
+        return params
+
+    def apply_ht_pressure(self, params, home, away):
+        # Só λ muda (a variância fica a do histórico), como no script original
+        proj_chutes = home.columns['shots_ht'][2] + away.columns['shots_ht'][2]
+        if not proj_chutes > HT_PRESSURE_SHOTS:
+            return params
+        for i, m in enumerate(self.markets):
+            if m.period == "ht" and m.side == "both":
+                params[i, 0] *= HT_PRESSURE_FACTOR
+        return params
+
+    def blend_parameters(self, params, model_params):
+        # Mistura [λ, variância] do histórico com os do modelo (mesma ordem de mercados)
+        if model_params is None:
+            return params
+        w = self.model_weight
+        return (1 - w) * params + w * np.asarray(model_params)
+
+    def market_cdf(self, lambda_final, var_final, rng=None):
+        return self.market_distribution(lambda_final, var_final, rng=rng)[0]
+
+    def market_distribution(self, lambda_final, var_final, rng=None):
+        # (cdf, réplicas): réplicas (R, K+1) para o erro padrão; None na tabela (exata)
+        if self.engine == "table":
+            return get_probability_table().cdf(lambda_final, var_final), None
+        replicas = self.simulate_replicas(lambda_final, var_final, rng=rng)
+        return replicas.mean(axis=0), replicas
+
+    def score_match(self, params, match_id=None):
+        # Todas as oportunidades do jogo, ordenadas por Score.
+        # Stream por mercado derivado de (seed, match_id): serial e pool dão os mesmos números
+        oportunidades = []
+        for m, (lambda_final, var_final) in zip(self.markets, params):
+            cdf, replicas = self.market_distribution(lambda_final, var_final, rng=self.market_rng(match_id, m))
+            oportunidades.extend(self.score_market(m, lambda_final, var_final, cdf, replicas))
+
+        oportunidades.sort(key=lambda x: x.score, reverse=True)
+        return oportunidades
+
+    def score_market(self, market, lambda_final, var_final, cdf, replicas=None):
+        oportunidades = []
+        cv = (var_final ** 0.5) / lambda_final if lambda_final > 0 else 1
+
+        for linha in market.lines:
+            prob_over, prob_under, prob_push = line_probabilities(cdf, linha)
+            se_over = se_under = None
+            if replicas is not None:
+                rep_over, rep_under, _ = line_probabilities(replicas, linha)
+                se_over = float(np.std(rep_over, ddof=1) / np.sqrt(len(replicas)))
+                se_under = float(np.std(rep_under, ddof=1) / np.sqrt(len(replicas)))
+
+            # OVER
+            odd_justa_over = fair_odd(prob_over, prob_push)
+
+            if 1.20 <= odd_justa_over <= 3.00: # Range mais amplo para capturar sugestões
+                score = prob_over * (1 - (cv * 0.3))
+                oportunidades.append(Opportunity(
+                    market=market.name, selection=f"Over {linha}",
+                    prob=float(prob_over), odd=float(odd_justa_over),
+                    score=float(score), kind="OVER", se=se_over
+                ))
+
+            # UNDER
+            odd_justa_under = fair_odd(prob_under, prob_push)
+
+            if 1.20 <= odd_justa_under <= 2.50:
+                score = prob_under * (1 - (cv * 0.5))
+                oportunidades.append(Opportunity(
+                    market=market.name, selection=f"Under {linha}",
+                    prob=float(prob_under), odd=float(odd_justa_under),
+                    score=float(score), kind="UNDER", se=se_under
+                ))
+
+        return oportunidades
 
     def generate_suggestions(self, opportunities, ml_prediction=None):
         # Filter opportunities to find Easy, Medium, Hard
@@ -35,7 +255,7 @@ class StatisticalAnalyzer:
         }
         
         # Sort by probability (descending)
-        sorted_ops = sorted(opportunities, key=lambda x: x['Prob'], reverse=True)
+        sorted_ops = sorted(opportunities, key=lambda x: x.prob, reverse=True)
         
         # Helper to check alignment with ML
         def aligns_with_ml(op):
@@ -43,154 +263,70 @@ class StatisticalAnalyzer:
             # If ML predicts high corners (e.g. 11.7), favor Overs
             # If ML predicts low corners (e.g. 8.0), favor Unders
             # This is a simple heuristic
-            if "Over" in op['Seleção'] and ml_prediction > 10.5: return True
-            if "Under" in op['Seleção'] and ml_prediction < 9.5: return True
+            if op.kind == "OVER" and ml_prediction > 10.5: return True
+            if op.kind == "UNDER" and ml_prediction < 9.5: return True
             # If ML is neutral (9.5-10.5), accept both
             if 9.5 <= ml_prediction <= 10.5: return True
             return False
 
         # Easy: High probability (> 70%), Low Odd (~1.30 - 1.50)
         for op in sorted_ops:
-            if op['Prob'] >= 0.70 and 1.25 <= op['Odd'] <= 1.60:
+            if op.prob >= 0.70 and 1.25 <= op.odd <= 1.60:
                 if aligns_with_ml(op):
                     suggestions["Easy"] = op
                     break
         
         # Medium: Medium probability (50% - 70%), Medium Odd (~1.60 - 2.00)
         for op in sorted_ops:
-            if 0.50 <= op['Prob'] < 0.75 and 1.60 <= op['Odd'] <= 2.20:
+            if 0.50 <= op.prob < 0.75 and 1.60 <= op.odd <= 2.20:
                 if aligns_with_ml(op):
                     suggestions["Medium"] = op
                     break
                 
         # Hard: Lower probability (< 50%), High Odd (> 2.20) - Value Bet
         for op in sorted_ops:
-            if 0.30 <= op['Prob'] < 0.55 and op['Odd'] > 2.20:
+            if 0.30 <= op.prob < 0.55 and op.odd > 2.20:
                 if aligns_with_ml(op):
                     suggestions["Hard"] = op
                     break
                 
         return suggestions
 
-    def analyze_match(self, df_home, df_away, ml_prediction=None, match_name=None):
-        # df_home/df_away should contain columns: 
+    def analyze(self, df_home, df_away, ml_prediction=None, match_name=None, match_id=None, model_params=None):
+        # API pura: nenhum print/formatação. Retorna MatchAnalysis ou None se faltar dado.
+        # model_params: array (n_mercados, 2) de MultiTargetPredictor.market_parameters (opcional)
+        # df_home/df_away should contain columns:
         # 'corners_ft', 'corners_ht', 'corners_2t', 'shots_ht'
-        
         if df_home.empty or df_away.empty:
-            print(f"{Colors.RED}Dados insuficientes para análise estatística.{Colors.RESET}")
-            return {}
-
-        if match_name:
-            print(f"\n⚽ {Colors.BOLD}{match_name}{Colors.RESET}")
-
-        mercados = [
-            {"nome": "JOGO COMPLETO", "df_h": df_home['corners_ft'], "df_a": df_away['corners_ft'],
-             "linhas": [8.5, 9.5, 10.5, 11.5, 12.5]},
-            {"nome": "TOTAL MANDANTE", "df_h": df_home['corners_ft'], "df_a": None, "linhas": [4.5, 5.5, 6.5]},
-            {"nome": "TOTAL VISITANTE", "df_h": None, "df_a": df_away['corners_ft'], "linhas": [3.5, 4.5, 5.5]},
-            
-            {"nome": "1º TEMPO (HT)", "df_h": df_home['corners_ht'], "df_a": df_away['corners_ht'],
-             "linhas": [3.5, 4.5, 5.5]},
-            {"nome": "2º TEMPO (FT)", "df_h": df_home['corners_2t'], "df_a": df_away['corners_2t'], 
-             "linhas": [3.5, 4.5, 5.5]},
-             
-            {"nome": "MANDANTE 1º TEMPO", "df_h": df_home['corners_ht'], "df_a": None, "linhas": [1.5, 2.5, 3.5]},
-            {"nome": "VISITANTE 1º TEMPO", "df_h": None, "df_a": df_away['corners_ht'], "linhas": [1.5, 2.5, 3.5]},
-            
-            {"nome": "MANDANTE 2º TEMPO", "df_h": df_home['corners_2t'], "df_a": None, "linhas": [1.5, 2.5, 3.5]},
-            {"nome": "VISITANTE 2º TEMPO", "df_h": None, "df_a": df_away['corners_2t'], "linhas": [1.5, 2.5, 3.5]}
-        ]
+            return None
+        return self.analyze_parameters(self.match_parameters(df_home, df_away), ml_prediction=ml_prediction,
+                                       match_name=match_name, match_id=match_id, model_params=model_params)
 
-        oportunidades = []
-
-        print("\n" + "▓" * 80)
-        print(f" 🧠 CÉREBRO ESTATÍSTICO (Monte Carlo)")
-        print("▓" * 80)
-
-        for m in mercados:
-            lambdas = []
-            vars_val = []
-
-            for df in [m['df_h'], m['df_a']]:
-                if df is not None:
-                    mean_10 = df.mean()
-                    mean_5 = df.head(5).mean()
-                    l_ajustado = (mean_10 * 0.6) + (mean_5 * 0.4)
-                    lambdas.append(l_ajustado)
-                    vars_val.append(df.var())
-
-            lambda_final = sum(lambdas)
-            var_final = sum(vars_val)
-            if len(lambdas) == 1: var_final = vars_val[0]
-            
-            # Handle NaN variance (single game history)
-            if pd.isna(var_final): var_final = lambda_final
-
-            # Bonus Pressão (Simplificado, pois não temos chutes no DB ainda corretamente mapeados as vezes)
-            # if "1º TEMPO" in m['nome']: ...
-
-            simulacoes = self.monte_carlo_simulation(lambda_final, var_final)
-
-            for linha in m['linhas']:
-                # OVER
-                prob_over = (simulacoes > linha).mean()
-                odd_justa_over = 1 / prob_over if prob_over > 0 else 99
-                
-                if 1.20 <= odd_justa_over <= 3.00: # Range mais amplo para capturar sugestões
-                    cv = (var_final ** 0.5) / lambda_final if lambda_final > 0 else 1
-                    score = prob_over * (1 - (cv * 0.3))
-                    oportunidades.append({
-                        "Mercado": m['nome'], "Seleção": f"Over {linha}", 
-                        "Prob": prob_over, "Odd": odd_justa_over,
-                        "Score": score, "Tipo": "OVER"
-                    })
-
-                # UNDER
-                prob_under = (simulacoes <= linha).mean()
-                odd_justa_under = 1 / prob_under if prob_under > 0 else 99
-                
-                if 1.20 <= odd_justa_under <= 2.50:
-                    cv = (var_final ** 0.5) / lambda_final if lambda_final > 0 else 1
-                    score = prob_under * (1 - (cv * 0.5))
-                    oportunidades.append({
-                        "Mercado": m['nome'], "Seleção": f"Under {linha}", 
-                        "Prob": prob_under, "Odd": odd_justa_under,
-                        "Score": score, "Tipo": "UNDER"
-                    })
-
-        oportunidades.sort(key=lambda x: x['Score'], reverse=True)
+    @timed("analysis.analyze")
+    def analyze_parameters(self, params, ml_prediction=None, match_name=None, match_id=None, model_params=None):
+        # analyze com os parâmetros do histórico já prontos (profile_parameters)
+        params = self.blend_parameters(params, model_params)
+        oportunidades = self.score_match(params, match_id=match_id)
         top_picks = oportunidades[:7]
 
-        # --- TABELA FORMATADA ---
-        print(f"\n🏆 {Colors.BOLD}TOP 7 OPORTUNIDADES (DATA DRIVEN){Colors.RESET}")
-        tabela_display = []
-        for pick in top_picks:
-            if pick['Tipo'] == "OVER":
-                cor = Colors.GREEN
-                seta = "▲"
-            else:
-                cor = Colors.CYAN
-                seta = "▼"
-
-            linha_fmt = f"{cor}{pick['Seleção']}{Colors.RESET}"
-            prob_fmt = f"{pick['Prob'] * 100:.1f}%"
-            odd_fmt = f"{Colors.BOLD}@{pick['Odd']:.2f}{Colors.RESET}"
-            direcao_fmt = f"{cor}{seta} {pick['Tipo']}{Colors.RESET}"
-
-            tabela_display.append([pick['Mercado'], linha_fmt, prob_fmt, odd_fmt, direcao_fmt])
-
-        headers = ["MERCADO", "LINHA", "PROB.", "ODD JUSTA", "TIPO"]
-        print(tabulate(tabela_display, headers=headers, tablefmt="fancy_grid", stralign="center"))
-        
-        # --- SUGESTÕES ---
-        suggestions = self.generate_suggestions(oportunidades)
-        print(f"\n🎯 {Colors.BOLD}SUGESTÕES DA IA:{Colors.RESET}")
-        
-        for level, pick in suggestions.items():
-            if pick:
-                cor_nivel = Colors.GREEN if level == "Easy" else (Colors.YELLOW if level == "Medium" else Colors.RED)
-                print(f"{cor_nivel}[{level.upper()}]{Colors.RESET} {pick['Mercado']} - {pick['Seleção']} (@{pick['Odd']:.2f}) | Prob: {pick['Prob']*100:.1f}%")
-            else:
-                print(f"[{level.upper()}] Nenhuma oportunidade encontrada.")
-
-        return top_picks
+        return MatchAnalysis(
+            match_id=match_id,
+            match_name=match_name,
+            ml_prediction=ml_prediction,
+            opportunities=oportunidades,
+            top_picks=top_picks,
+            suggestions=self.generate_suggestions(top_picks, ml_prediction=ml_prediction),
+            engine=self.engine,
+        )
+
+    def analyze_match(self, df_home, df_away, ml_prediction=None, match_name=None, renderer=None):
+        # Atalho interativo: calcula e renderiza (terminal por padrão)
+        renderer = renderer or TerminalRenderer()
+        result = self.analyze(df_home, df_away, ml_prediction=ml_prediction, match_name=match_name)
+
+        if result is None:
+            renderer.error("Dados insuficientes para análise estatística.")
+            return []
+
+        renderer.analysis(result)
+        return result.top_picks
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from src.instrumentation import metrics
+
+# Cache LRU dos perfis por time (StatisticalAnalyzer.team_profile: λ ponderado, variância
+# e média de cada período). O perfil só depende da janela de jogos do time, então a
+# chave é (time, mando, ids e estatísticas dos jogos da janela): jogos novos, linhas
+# que voltam ao histórico depois da auditoria e estatísticas regravadas (re-busca,
+# reprocess) mudam a chave sozinhos. Entradas velhas saem pelo LRU.
+# Numa rodada em que os times se repetem, ou em re-análises no serviço, o passo de
+# parâmetros vira uma consulta no dicionário.
+
+DEFAULT_MAXSIZE = 4096
+
+# Colunas lidas por build_team_stats (src/analysis/pipeline.py)
+KEY_COLUMNS = (
+    'match_id', 'corners_home_ft', 'corners_away_ft', 'corners_home_ht', 'corners_away_ht',
+    'shots_ot_home_ht', 'shots_ot_away_ht',
+)
+
+
+class TeamParameterCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.incr("team_cache.hits")
+                return profile
+
+        profile = compute()
+        with self._lock:
+            self.misses += 1
+            metrics.incr("team_cache.misses")
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def team_key(team_id, games, venue=None):
+    # games: janela de team_games (ordem cronológica)
+    # NaN != NaN: valor ausente vira None, senão a chave nunca se repete
+    rows = games[list(KEY_COLUMNS)].to_numpy(dtype=float).tolist()
+    return (int(team_id), venue, tuple(tuple(None if v != v else v for v in row) for row in rows))
+
+
+@lru_cache(maxsize=1)
+def get_team_cache():
+    # Compartilhado pelo processo (menu, lote, serviço, scanner de valor)
+    return TeamParameterCache()
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis.probability_table import get_probability_table, line_probabilities_many
+
+# Scanner de valor: odds de mercado (tabela odds) contra as probabilidades do modelo.
+# Os parâmetros [λ, variância] de cada jogo mudam só quando entra resultado novo, então
+# são calculados uma vez (set_parameters / pipeline.fixture_parameters). A cada
+# atualização de odds só o scan roda: uma consulta vetorizada na tabela de
+# probabilidades para todas as linhas de todos os jogos de uma vez.
+#
+# Por unidade apostada, com devolução (linhas inteiras) e quarter lines:
+#   edge  = p_ganha * (odd - 1) - p_perde
+#   kelly = (b * p_ganha - p_perde) / (b * (p_ganha + p_perde)), b = odd - 1
+# (em quarter lines o Kelly usa as probabilidades médias das duas metades)
+
+DEFAULT_KELLY_FRACTION = 0.25  # Kelly fracionário
+MAX_STAKE = 0.05  # teto por aposta (fração da banca)
+
+
+def edge_and_kelly(p_win, p_lose, odd, fraction=DEFAULT_KELLY_FRACTION, max_stake=MAX_STAKE):
+    p_win, p_lose, odd = (np.asarray(x, dtype=float) for x in (p_win, p_lose, odd))
+    b = odd - 1
+    edge = p_win * b - p_lose
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kelly = (b * p_win - p_lose) / (b * (p_win + p_lose))
+    kelly = np.clip(np.nan_to_num(kelly, nan=0.0, posinf=0.0, neginf=0.0), 0.0, None)
+    return edge, np.minimum(kelly * fraction, max_stake)
+
+
+def best_prices(odds):
+    # Maior odd de cada seleção entre as casas
+    idx = odds.groupby(["match_id", "market", "line", "kind"], sort=False)["odd"].idxmax()
+    return odds.loc[idx]
+
+
+class ValueScanner:
+    def __init__(self, markets, kelly_fraction=DEFAULT_KELLY_FRACTION, max_stake=MAX_STAKE):
+        # markets: catálogo na mesma ordem dos arrays de parâmetros (analyzer.markets)
+        self.markets = markets
+        self.kelly_fraction = kelly_fraction
+        self.max_stake = max_stake
+        self.table = get_probability_table()
+        self.market_index = {m.name: i for i, m in enumerate(markets)}
+        self.match_index = {}
+        self._params = []
+        self._stacked = None
+
+    def set_parameters(self, match_id, params):
+        # params: array (n_mercados, 2) de [λ, variância] do jogo
+        if match_id in self.match_index:
+            self._params[self.match_index[match_id]] = np.asarray(params, dtype=float)
+        else:
+            self.match_index[match_id] = len(self._params)
+            self._params.append(np.asarray(params, dtype=float))
+        self._stacked = None
+
+    def scan(self, odds, min_edge=None, best_only=True):
+        # odds: DataFrame (match_id, market, line, kind, odd[, bookmaker]) -> mesmas linhas
+        # com prob, push, fair_odd, edge e kelly, ordenadas por edge. Linhas de jogos sem
+        # parâmetros ou de mercados fora do catálogo ficam de fora.
+        columns = list(odds.columns) + ["prob", "push", "fair_odd", "edge", "kelly"]
+        if odds.empty or not self._params:
+            return pd.DataFrame(columns=columns)
+        if self._stacked is None:
+            self._stacked = np.stack(self._params)
+
+        match_pos = odds["match_id"].map(self.match_index)
+        market_pos = odds["market"].map(self.market_index)
+        odds = odds[match_pos.notna() & market_pos.notna()]
+        if best_only:
+            odds = best_prices(odds)
+        if odds.empty:
+            return pd.DataFrame(columns=columns)
+
+        params = self._stacked[match_pos[odds.index].to_numpy(dtype=np.int64),
+                               market_pos[odds.index].to_numpy(dtype=np.int64)]
+        cdf = self.table.cdf_rows(params[:, 0], params[:, 1])
+        over, under, push = line_probabilities_many(cdf, odds["line"].to_numpy())
+
+        is_over = (odds["kind"] == "OVER").to_numpy()
+        p_win = np.where(is_over, over, under)
+        p_lose = np.where(is_over, under, over)
+        edge, kelly = edge_and_kelly(p_win, p_lose, odds["odd"].to_numpy(), self.kelly_fraction, self.max_stake)
+        with np.errstate(divide="ignore"):
+            fair = np.where(p_win > 0, (1 - push) / p_win, 99)
+
+        out = odds.assign(prob=p_win, push=push, fair_odd=fair, edge=edge, kelly=kelly)
+        if min_edge is not None:
+            out = out[out["edge"] >= min_edge]
+        return out.sort_values("edge", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def build_scanner(db, match_ids, analyzer, predictor=None, kelly_fraction=DEFAULT_KELLY_FRACTION):
+    # ValueScanner com os parâmetros dos jogos pedidos (histórico lido uma vez).
+    # Retorna (scanner, {match_id: "Mandante vs Visitante"}); jogos sem histórico ficam de fora
+    from src.analysis.pipeline import fixture_parameters
+
+    history = db.get_historical_data()
+    features = None
+    if predictor is not None:
+        from src.ml.feature_engineering import FeatureBuilder
+
+        features = FeatureBuilder()
+        features.update_many(history)
+
+    scanner = ValueScanner(analyzer.markets, kelly_fraction=kelly_fraction)
+    names = {}
+    for match_id in match_ids:
+        match = db.get_match(match_id)
+        if match is None:
+            continue
+        match_data = {
+            'id': match_id, 'timestamp': match['start_timestamp'], 'season_id': match['season_id'],
+            'home_id': match['home_team_id'], 'away_id': match['away_team_id'],
+        }
+        params = fixture_parameters(match_data, history, analyzer, predictor=predictor, features=features)
+        if params is None:
+            continue
+        scanner.set_parameters(match_id, params)
+        names[match_id] = f"{match['home_team_name']} vs {match['away_team_name']}"
+    return scanner, names
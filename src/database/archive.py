@@ -0,0 +1,134 @@
+import gzip
+import json
+import time
+
+from src.database.connection import get_connection, get_writer, init_schema_once
+from src.instrumentation import metrics
+
+# Arquivo das respostas cruas da API (JSON comprimido), separado do banco principal.
+# Chave: (endpoint, entity_key). O endpoint é o caminho com os ids trocados por {}
+# (ex: event/{}/statistics) e entity_key são os ids em ordem (ex: "13472605" ou
+# "325/72034/1" para uma rodada). Guarda a resposta mais recente de cada chave, o
+# que basta para re-derivar matches/match_stats sem scraping (main.py reprocess).
+# Compressão: zstd se o pacote `zstandard` estiver instalado, senão gzip; o codec
+# fica gravado em cada linha, então arquivos mistos continuam legíveis.
+
+ARCHIVE_PATH = "data/raw_payloads.db"
+API_PREFIX = "/api/v1/"
+
+STATS_ENDPOINT = "event/{}/statistics"
+EVENT_ENDPOINT = "event/{}"
+ROUND_ENDPOINT = "unique-tournament/{}/season/{}/events/round/{}"
+TEAM_EVENTS_ENDPOINT = "team/{}/events/last/{}"
+
+
+def endpoint_key(url):
+    path = url.split(API_PREFIX, 1)[-1].split("?", 1)[0].strip("/")
+    parts = path.split("/")
+    endpoint = "/".join("{}" if p.isdigit() else p for p in parts)
+    return endpoint, "/".join(p for p in parts if p.isdigit())
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def default_codec():
+    return "zstd" if _zstd() is not None else "gzip"
+
+
+def compress(raw, codec):
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=9).compress(raw)
+    return gzip.compress(raw, compresslevel=6, mtime=0)
+
+
+def decompress(blob, codec):
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("Payload comprimido com zstd: instale o pacote `zstandard` para ler o arquivo.")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+class RawArchive:
+    def __init__(self, path=ARCHIVE_PATH, codec=None):
+        self.path = path
+        self.codec = codec or default_codec()
+        init_schema_once(path, self._create_schema)
+        # Gravação pela thread escritora do arquivo (não trava o scraper)
+        self.writer = get_writer(path)
+
+    def _create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS raw_payloads (
+                endpoint TEXT NOT NULL,
+                entity_key TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (endpoint, entity_key)
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_raw_payloads_fetched ON raw_payloads(fetched_at)")
+        conn.commit()
+
+    def put(self, url, data):
+        endpoint, key = endpoint_key(url)
+        raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        blob = compress(raw, self.codec)
+        self.writer.submit('''
+            INSERT OR REPLACE INTO raw_payloads (endpoint, entity_key, fetched_at, codec, size, payload)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (endpoint, key, int(time.time()), self.codec, len(raw), blob), error=f"Erro ao arquivar {endpoint}")
+        metrics.incr("archive.payloads")
+        metrics.incr("archive.bytes_raw", len(raw))
+        metrics.incr("archive.bytes_stored", len(blob))
+
+    def connect(self):
+        if self.writer.pending:
+            self.writer.flush()
+        return get_connection(self.path)
+
+    def get(self, url):
+        endpoint, key = endpoint_key(url)
+        row = self.connect().execute(
+            "SELECT codec, payload FROM raw_payloads WHERE endpoint = ? AND entity_key = ?", (endpoint, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(decompress(row[1], row[0]))
+
+    def iter_chunks(self, endpoints=None, chunk_size=500):
+        # Blocos de (endpoint, entity_key, codec, payload), do mais antigo para o mais recente
+        query = "SELECT endpoint, entity_key, codec, payload FROM raw_payloads"
+        params = ()
+        if endpoints:
+            query += f" WHERE endpoint IN ({', '.join('?' * len(endpoints))})"
+            params = tuple(endpoints)
+        cursor = self.connect().execute(query + " ORDER BY fetched_at, rowid", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+    def summary(self):
+        # {endpoint: (respostas, bytes crus, bytes gravados)}
+        rows = self.connect().execute('''
+            SELECT endpoint, COUNT(*), SUM(size), SUM(LENGTH(payload))
+            FROM raw_payloads GROUP BY endpoint ORDER BY COUNT(*) DESC
+        ''').fetchall()
+        return {endpoint: (n, raw, stored) for endpoint, n, raw, stored in rows}
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.flush()
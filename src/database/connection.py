@@ -0,0 +1,205 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from src.instrumentation import metrics
+
+# Acesso ao SQLite seguro para várias threads e processos.
+# - get_connection: uma conexão por (processo, thread, arquivo), reaproveitada
+#   entre instâncias do DBManager. WAL deixa leitores e o escritor em paralelo.
+# - DBWriter: uma thread escritora por (processo, arquivo). Produtores enfileiram
+#   (sql, params) e a escritora grava em lotes, uma transação por lote.
+# - Entre processos, cada escritor pega o lock com BEGIN IMMEDIATE e espera até
+#   BUSY_TIMEOUT_MS em vez de falhar com "database is locked".
+
+BUSY_TIMEOUT_MS = 30000
+BATCH_SIZE = 500
+LOCK_RETRIES = 5
+EXIT_FLUSH_TIMEOUT = 60  # s esperando a escritora ao sair do processo
+
+_local = threading.local()
+_lock = threading.RLock()
+_writers = {}
+_schema_ready = set()
+
+
+def _after_fork():
+    # Conexões, escritoras e locks herdados do processo pai não valem no filho
+    global _local, _lock
+    _local = threading.local()
+    _lock = threading.RLock()
+    _writers.clear()
+    _schema_ready.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _key(db_path):
+    return os.path.abspath(db_path)
+
+
+def _open(db_path):
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def get_connection(db_path):
+    pool = _local.__dict__.setdefault("connections", {})
+    key = _key(db_path)
+    conn = pool.get(key)
+    if conn is None:
+        conn = pool[key] = _open(db_path)
+        metrics.incr("db.connections_opened")
+    return conn
+
+
+def close_thread_connections():
+    # Fecha as conexões da thread atual (ex: fim de uma thread de worker)
+    for conn in _local.__dict__.pop("connections", {}).values():
+        conn.close()
+
+
+def init_schema_once(db_path, create):
+    # create(conn) roda uma única vez por processo para cada arquivo
+    key = _key(db_path)
+    with _lock:
+        if key in _schema_ready:
+            return False
+        create(get_connection(db_path))
+        _schema_ready.add(key)
+        return True
+
+
+class DBWriter:
+    def __init__(self, db_path, batch_size=BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name=f"db-writer:{os.path.basename(db_path)}", daemon=True)
+        self.thread.start()
+
+    def submit(self, sql, params=(), error=None):
+        # error: mensagem impressa se a linha falhar (o lote segue sem ela)
+        self.queue.put((sql, params, False, error))
+
+    def submit_many(self, sql, rows, error=None):
+        self.queue.put((sql, list(rows), True, error))
+
+    @property
+    def pending(self):
+        return self.queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        # Bloqueia até tudo o que já foi enfileirado estar gravado. Levanta erro se a
+        # thread escritora morreu ou se o timeout (s) esgotar, em vez de travar.
+        if self.thread is threading.current_thread():
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = self.queue.all_tasks_done
+        with done:
+            while self.queue.unfinished_tasks:
+                if not self.thread.is_alive():
+                    raise RuntimeError(f"Thread escritora parou com {self.queue.unfinished_tasks} gravações pendentes")
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise TimeoutError(f"{self.queue.unfinished_tasks} gravações pendentes após {timeout}s")
+                done.wait(wait)
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = get_connection(self.db_path)
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write(conn, batch)
+            except Exception as e:
+                # Nunca deixa a thread morrer: o lote se perde, o resto da fila segue
+                self.errors += len(batch)
+                print(f"Erro ao gravar no banco: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            rows = self._transaction(conn, batch)
+        except Exception:
+            # Lote com linha inválida (erro do SQLite ou parâmetro que não converte,
+            # ex: OverflowError): grava item a item para isolar o erro
+            rows = 0
+            for item in batch:
+                try:
+                    rows += self._transaction(conn, [item])
+                except Exception as e:
+                    self.errors += 1
+                    print(f"{item[3] or 'Erro ao gravar no banco'}: {e}")
+        metrics.record("db.write", time.perf_counter() - start)
+        metrics.incr("db.rows_written", rows)
+        metrics.incr("db.write_batches")
+
+    def _transaction(self, conn, batch):
+        for attempt in range(LOCK_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                # busy_timeout esgotado com outro processo escrevendo: tenta de novo
+                if "locked" not in str(e) or attempt == LOCK_RETRIES - 1:
+                    raise
+                metrics.incr("db.lock_retries")
+                time.sleep(0.1 * 2 ** attempt)
+
+        rows = 0
+        try:
+            for sql, params, many, _ in batch:
+                if many:
+                    conn.executemany(sql, params)
+                    rows += len(params)
+                else:
+                    conn.execute(sql, params)
+                    rows += 1
+            with metrics.timer("db.commit"):
+                conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return rows
+
+
+def get_writer(db_path):
+    key = _key(db_path)
+    with _lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = DBWriter(db_path)
+    return writer
+
+
+def flush_all():
+    for writer in list(_writers.values()):
+        try:
+            writer.flush(timeout=EXIT_FLUSH_TIMEOUT)
+        except (RuntimeError, TimeoutError) as e:
+            print(f"Gravações pendentes descartadas: {e}")
+
+
+atexit.register(flush_all)
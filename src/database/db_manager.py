@@ -1,25 +1,83 @@
-import sqlite3
-import pandas as pd
+import json
 from datetime import datetime
 
-class DBManager:
+from src.database.connection import get_connection, get_writer, init_schema_once
+from src.analysis.markets import DEFAULT_MARKETS, get_market, load_market_catalog, market_corners, settle_selection
+from src.database.queries import (
+    HISTORICAL_DATA_SQL, HISTORY_VERSION_SQL, NOW_EPOCH_SQL, performance_sql, rolling_features_sql,
+)
+from src.database.repository import Repository
+from src.instrumentation import timed
+
+# Tentativas de re-busca antes de o jogo ir para o dead-letter (refetch_queue.dead = 1)
+REFETCH_MAX_ATTEMPTS = 5
+
+SAVE_MATCH_SQL = '''
+    INSERT OR REPLACE INTO matches (
+        match_id, tournament_name, season_id, round, status, 
+        start_timestamp, home_team_id, home_team_name, 
+        away_team_id, away_team_name, home_score, away_score
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SAVE_STATS_SQL = '''
+    INSERT OR REPLACE INTO match_stats (
+        match_id, 
+        corners_home_ft, corners_away_ft, 
+        corners_home_ht, corners_away_ht,
+        shots_ot_home_ft, shots_ot_away_ft,
+        shots_ot_home_ht, shots_ot_away_ht,
+        quality, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {now})
+'''.format(now=NOW_EPOCH_SQL)
+
+
+def _match_row(match_data):
+    return (
+        match_data['id'], match_data['tournament'], match_data['season_id'],
+        match_data.get('round'), match_data['status'], match_data['timestamp'],
+        match_data['home_id'], match_data['home_name'],
+        match_data['away_id'], match_data['away_name'],
+        match_data['home_score'], match_data['away_score']
+    )
+
+
+def _stats_row(match_id, stats_data, quality):
+    return (
+        match_id,
+        stats_data['corners_home_ft'], stats_data['corners_away_ft'],
+        stats_data['corners_home_ht'], stats_data['corners_away_ht'],
+        stats_data['shots_ot_home_ft'], stats_data['shots_ot_away_ft'],
+        stats_data['shots_ot_home_ht'], stats_data['shots_ot_away_ht'],
+        quality
+    )
+
+
+class DBManager(Repository):
+    # Instâncias são baratas: conexões vêm do pool por thread, o schema é criado
+    # uma vez por processo e todas as escritas passam pela thread escritora.
     def __init__(self, db_path="data/football_data.db"):
         self.db_path = db_path
-        self.conn = None
-        self.create_tables()
+        init_schema_once(db_path, self._create_schema)
+        self.writer = get_writer(db_path)
 
     def connect(self):
-        if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path)
-        return self.conn
+        # Leitura: garante que as escritas já enfileiradas estejam visíveis
+        if self.writer.pending:
+            self.writer.flush()
+        return get_connection(self.db_path)
+
+    def flush(self):
+        self.writer.flush()
 
     def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        # A conexão pertence ao pool da thread; aqui só esperamos as escritas pendentes
+        self.writer.flush()
 
     def create_tables(self):
-        conn = self.connect()
+        self._create_schema(self.connect())
+
+    def _create_schema(self, conn):
         cursor = conn.cursor()
 
         # Tabela de Jogos
@@ -57,6 +115,10 @@ class DBManager:
                 shots_ot_home_ht INTEGER,
                 shots_ot_away_ht INTEGER,
                 
+                -- Bits de src/database/quality.py (0 = ok; != 0 fica fora do histórico)
+                quality INTEGER DEFAULT 0,
+                updated_at REAL, -- epoch da última gravação (versão do histórico)
+                
                 FOREIGN KEY(match_id) REFERENCES matches(match_id)
             )
         ''')
@@ -72,12 +134,77 @@ class DBManager:
                 probability REAL,
                 odds REAL, -- Odd Justa
                 category TEXT, -- 'Top7', 'Easy', 'Medium', 'Hard'
-                status TEXT DEFAULT 'PENDING', -- 'PENDING', 'GREEN', 'RED'
+                status TEXT DEFAULT 'PENDING', -- 'PENDING', 'GREEN', 'RED', 'PUSH'
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY(match_id) REFERENCES matches(match_id)
             )
         ''')
         
+        # Resultados do backtest: mesmas colunas de predictions (mesmo relatório de
+        # desempenho) + execução, número real do mercado e lucro por unidade.
+        # created_at = início do jogo, para as janelas seguirem a ordem do replay.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS backtest_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                match_id INTEGER,
+                prediction_type TEXT,
+                predicted_value REAL,
+                market TEXT,
+                probability REAL,
+                odds REAL,
+                category TEXT,
+                market_group TEXT,
+                status TEXT,
+                actual INTEGER,
+                profit REAL,
+                created_at TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtest_run ON backtest_results(run_id)")
+
+        # Jogos cujas estatísticas não vieram (throttling, timeout, circuito aberto):
+        # ficam aqui em vez de virar zeros e saem quando save_stats grava o jogo
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS refetch_queue (
+                match_id INTEGER PRIMARY KEY,
+                reason TEXT,
+                attempts INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                dead INTEGER DEFAULT 0 -- 1 = não adianta buscar de novo (404 ou tentativas esgotadas)
+            )
+        ''')
+
+        # Odds de mercado por jogo/mercado/linha/lado e casa (a mais recente de cada)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS odds (
+                match_id INTEGER,
+                market TEXT,
+                line REAL,
+                kind TEXT,
+                bookmaker TEXT DEFAULT '',
+                odd REAL,
+                source TEXT,
+                updated_at INTEGER,
+                PRIMARY KEY (match_id, market, line, kind, bookmaker)
+            )
+        ''')
+        
+        # Log da rotina diária (src/orchestrator.py): uma linha por passo por execução
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pipeline_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                step TEXT,
+                status TEXT, -- 'ok', 'skipped', 'failed', 'blocked'
+                started_at INTEGER,
+                finished_at INTEGER,
+                detail TEXT -- JSON
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_runs_step ON pipeline_runs(step, status)")
+
         # Add columns if they don't exist (Migration for existing DB)
         try:
             cursor.execute("ALTER TABLE predictions ADD COLUMN odds REAL")
@@ -91,137 +218,328 @@ class DBManager:
             cursor.execute("ALTER TABLE predictions ADD COLUMN market_group TEXT")
         except:
             pass
+        try:
+            cursor.execute("ALTER TABLE match_stats ADD COLUMN quality INTEGER DEFAULT 0")
+        except:
+            pass
+        try:
+            cursor.execute("ALTER TABLE match_stats ADD COLUMN updated_at REAL")
+        except:
+            pass
+        try:
+            cursor.execute("ALTER TABLE refetch_queue ADD COLUMN dead INTEGER DEFAULT 0")
+        except:
+            pass
 
         conn.commit()
 
     def save_prediction(self, match_id, pred_type, value, market, prob, odds=0.0, category=None, market_group=None, verbose=False):
-        conn = self.connect()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT INTO predictions (match_id, prediction_type, predicted_value, market, probability, odds, category, market_group)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (match_id, pred_type, value, market, prob, odds, category, market_group))
-            conn.commit()
-            if verbose:
-                print(f"Previsão salva para o jogo {match_id}!")
-        except Exception as e:
-            print(f"Erro ao salvar previsão: {e}")
+        self.writer.submit('''
+            INSERT INTO predictions (match_id, prediction_type, predicted_value, market, probability, odds, category, market_group)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (match_id, pred_type, value, market, prob, odds, category, market_group), error="Erro ao salvar previsão")
+        if verbose:
+            print(f"Previsão salva para o jogo {match_id}!")
 
-    def check_predictions(self):
+    def check_predictions(self, verbose=True):
         # Verifica previsões pendentes
         conn = self.connect()
         cursor = conn.cursor()
         
         # Busca previsões pendentes de jogos que já terminaram
         query = '''
-            SELECT p.id, p.match_id, p.market, p.predicted_value, s.corners_home_ft, s.corners_away_ft
+            SELECT p.id, p.match_id, p.market, p.market_group, p.odds,
+                   s.corners_home_ft, s.corners_away_ft, s.corners_home_ht, s.corners_away_ht
             FROM predictions p
             JOIN matches m ON p.match_id = m.match_id
             JOIN match_stats s ON m.match_id = s.match_id
-            WHERE p.status = 'PENDING' AND m.status = 'finished'
+            WHERE p.status = 'PENDING' AND m.status = 'finished' AND COALESCE(s.quality, 0) = 0
         '''
         
-        pending = pd.read_sql_query(query, conn)
+        # Só sqlite3 (sem pandas): roda rápido a partir do cron
+        pending = cursor.execute(query).fetchall()
         
-        if pending.empty:
-            return
+        if not pending:
+            return []
             
-        print(f"Verificando {len(pending)} previsões pendentes...")
+        if verbose:
+            print(f"Verificando {len(pending)} previsões pendentes...")
         
-        for _, row in pending.iterrows():
-            total_corners = row['corners_home_ft'] + row['corners_away_ft']
-            status = 'RED'
-            
-            # Lógica simples para Over/Under
-            if 'Over' in row['market']:
-                line = float(row['market'].split(' ')[1])
-                if total_corners > line:
-                    status = 'GREEN'
-            elif 'Under' in row['market']:
-                line = float(row['market'].split(' ')[1])
-                if total_corners < line:
-                    status = 'GREEN'
-            
-            # Atualiza status
-            cursor.execute("UPDATE predictions SET status = ? WHERE id = ?", (status, row['id']))
-            print(f"Previsão {row['id']} (Jogo {row['match_id']}): {row['market']} vs {total_corners} Cantos -> {status}")
+        markets = load_market_catalog()
+        settled = []
+        for pred_id, match_id, market, market_group, odds, c_home_ft, c_away_ft, c_home_ht, c_away_ht in pending:
+            # Cada pick é conferido no seu mercado (HT, 2T, só mandante...); ML e
+            # previsões sem grupo valem para o total do jogo
+            group = get_market(markets, market_group) or get_market(DEFAULT_MARKETS, market_group) or DEFAULT_MARKETS[0]
+            stats = {'corners_home_ft': c_home_ft, 'corners_away_ft': c_away_ft,
+                     'corners_home_ht': c_home_ht, 'corners_away_ht': c_away_ht}
+            total_corners = market_corners(group, stats)
+            status, _ = settle_selection(market, total_corners, odds)
             
-            print(f"Previsão {row['id']} (Jogo {row['match_id']}): {row['market']} vs {total_corners} Cantos -> {status}")
+            settled.append((pred_id, match_id, market, total_corners, status))
+            if verbose:
+                print(f"Previsão {pred_id} (Jogo {match_id}): {market} vs {total_corners} Cantos -> {status}")
             
-        conn.commit()
+        # Atualiza status (um lote só na thread escritora)
+        self.writer.submit_many("UPDATE predictions SET status = ? WHERE id = ?",
+                                [(status, pred_id) for pred_id, _, _, _, status in settled])
+        self.writer.flush()
+        return settled
 
-    def delete_predictions(self, match_id):
-        conn = self.connect()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("DELETE FROM predictions WHERE match_id = ?", (match_id,))
-            conn.commit()
+    def delete_predictions(self, match_id, verbose=True):
+        self.writer.submit("DELETE FROM predictions WHERE match_id = ?", (match_id,),
+                           error="Erro ao remover previsões antigas")
+        if verbose:
             print(f"Previsões antigas removidas para o jogo {match_id}.")
-        except Exception as e:
-            print(f"Erro ao remover previsões antigas: {e}")
 
-    def save_match(self, match_data):
+    def get_match(self, match_id):
         conn = self.connect()
         cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO matches (
-                    match_id, tournament_name, season_id, round, status, 
-                    start_timestamp, home_team_id, home_team_name, 
-                    away_team_id, away_team_name, home_score, away_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                match_data['id'], match_data['tournament'], match_data['season_id'],
-                match_data.get('round'), match_data['status'], match_data['timestamp'],
-                match_data['home_id'], match_data['home_name'],
-                match_data['away_id'], match_data['away_name'],
-                match_data['home_score'], match_data['away_score']
-            ))
-            conn.commit()
-        except Exception as e:
-            print(f"Erro ao salvar jogo {match_data['id']}: {e}")
+        cursor.execute("SELECT * FROM matches WHERE match_id = ?", (match_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], row))
 
-    def save_stats(self, match_id, stats_data):
+    def get_predictions(self, match_id, category=None):
+        # category aceita padrão LIKE (ex: 'Suggestion_%')
         conn = self.connect()
         cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO match_stats (
-                    match_id, 
-                    corners_home_ft, corners_away_ft, 
-                    corners_home_ht, corners_away_ht,
-                    shots_ot_home_ft, shots_ot_away_ft,
-                    shots_ot_home_ht, shots_ot_away_ht
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                match_id,
-                stats_data['corners_home_ft'], stats_data['corners_away_ft'],
-                stats_data['corners_home_ht'], stats_data['corners_away_ht'],
-                stats_data['shots_ot_home_ft'], stats_data['shots_ot_away_ft'],
-                stats_data['shots_ot_home_ht'], stats_data['shots_ot_away_ht']
-            ))
-            conn.commit()
-        except Exception as e:
-            print(f"Erro ao salvar stats do jogo {match_id}: {e}")
+        query = "SELECT * FROM predictions WHERE match_id = ?"
+        params = [match_id]
+        if category:
+            query += " AND category LIKE ?"
+            params.append(category)
+        cursor.execute(query + " ORDER BY probability DESC", params)
+        cols = [c[0] for c in cursor.description]
+        return [dict(zip(cols, row)) for row in cursor.fetchall()]
 
-    def get_historical_data(self):
+    def history_version(self):
+        # Barato (uma agregação): compara com o valor anterior para saber se o histórico mudou
+        return tuple(self.connect().execute(HISTORY_VERSION_SQL).fetchone())
+
+    def get_stats_match_ids(self):
         conn = self.connect()
-        # Avoid selecting match_id twice by specifying columns or using a different join strategy
-        # SQLite doesn't support 'SELECT * EXCEPT ...'
-        # We will select m.* and specific stats columns
-        query = '''
-            SELECT 
-                m.*, 
-                s.corners_home_ft, s.corners_away_ft, 
-                s.corners_home_ht, s.corners_away_ht,
-                s.shots_ot_home_ft, s.shots_ot_away_ft,
-                s.shots_ot_home_ht, s.shots_ot_away_ht
-            FROM matches m
+        return {row[0] for row in conn.execute("SELECT match_id FROM match_stats")}
+
+    def count_team_matches(self, team_id, venue=None, tournament_keyword=None):
+        # Jogos finalizados do time que já têm estatísticas válidas
+        # venue: 'home' | 'away' | None; tournament_keyword: trecho do nome do torneio
+        conn = self.connect()
+        if venue == 'home':
+            where, params = "m.home_team_id = ?", [team_id]
+        elif venue == 'away':
+            where, params = "m.away_team_id = ?", [team_id]
+        else:
+            where, params = "(m.home_team_id = ? OR m.away_team_id = ?)", [team_id, team_id]
+        if tournament_keyword:
+            where += " AND LOWER(m.tournament_name) LIKE ?"
+            params.append(f"%{tournament_keyword.lower()}%")
+        row = conn.execute(f'''
+            SELECT COUNT(*) FROM matches m
             JOIN match_stats s ON m.match_id = s.match_id
-            WHERE m.status = 'finished'
-            ORDER BY m.start_timestamp ASC
-        '''
-        return pd.read_sql_query(query, conn)
+            WHERE m.status = 'finished' AND COALESCE(s.quality, 0) = 0 AND {where}
+        ''', params).fetchone()
+        return row[0]
+
+    def save_match(self, match_data):
+        self.writer.submit(SAVE_MATCH_SQL, _match_row(match_data), error=f"Erro ao salvar jogo {match_data['id']}")
+
+    def save_matches(self, matches):
+        # Lote de jogos num único item da fila de escrita (ingestão em streaming)
+        self.writer.submit_many(SAVE_MATCH_SQL, [_match_row(m) for m in matches], error="Erro ao salvar jogos")
+
+    def save_stats(self, match_id, stats_data):
+        # Validação na ingestão: linha suspeita é gravada marcada (fora do histórico)
+        # e vai para a fila de re-busca se uma nova busca puder corrigi-la
+        from src.database.quality import REFETCHABLE, describe_flags, stats_flags
+
+        quality = stats_flags(stats_data)
+        self.writer.submit(SAVE_STATS_SQL, _stats_row(match_id, stats_data, quality),
+                           error=f"Erro ao salvar stats do jogo {match_id}")
+        if quality & REFETCHABLE:
+            self.queue_refetch([match_id], reason=describe_flags(quality))
+        else:
+            self.writer.submit("DELETE FROM refetch_queue WHERE match_id = ?", (match_id,))
+        return quality
+
+    def save_stats_many(self, items):
+        # items: [(match_id, stats)]. Mesma validação de save_stats, vetorizada no lote
+        from src.database.quality import REFETCHABLE, describe_flags, quality_flags, stats_matrix
+
+        if not items:
+            return []
+        flags = quality_flags(stats_matrix([stats for _, stats in items])).tolist()
+        self.writer.submit_many(SAVE_STATS_SQL, [_stats_row(match_id, stats, q) for (match_id, stats), q in zip(items, flags)],
+                                error="Erro ao salvar estatísticas")
+        suspect = {}
+        for (match_id, _), q in zip(items, flags):
+            if q & REFETCHABLE:
+                suspect.setdefault(q, []).append(match_id)
+        for q, match_ids in suspect.items():
+            self.queue_refetch(match_ids, reason=describe_flags(q))
+        self.writer.submit_many("DELETE FROM refetch_queue WHERE match_id = ?",
+                                [(match_id,) for (match_id, _), q in zip(items, flags) if not q & REFETCHABLE])
+        return flags
+
+    def queue_refetch(self, match_ids, reason=None, permanent=False):
+        # Re-enfileira jogos sem estatísticas; repetir o mesmo jogo soma uma tentativa.
+        # permanent (404, resposta sem estatísticas) ou REFETCH_MAX_ATTEMPTS tentativas:
+        # o jogo vai para o dead-letter e não é buscado de novo
+        self.writer.submit_many('''
+            INSERT INTO refetch_queue (match_id, reason, dead) VALUES (?, ?, ?)
+            ON CONFLICT(match_id) DO UPDATE SET
+                attempts = attempts + 1, reason = excluded.reason, updated_at = CURRENT_TIMESTAMP,
+                dead = CASE WHEN excluded.dead = 1 OR attempts + 1 >= ? THEN 1 ELSE dead END
+        ''', [(match_id, reason, int(permanent), REFETCH_MAX_ATTEMPTS) for match_id in match_ids],
+            error="Erro ao enfileirar re-busca")
+
+    def save_odds(self, rows):
+        # rows: dicts com match_id, market, line, kind ('OVER'/'UNDER'), odd e
+        # opcionalmente bookmaker/source. Substitui a cotação anterior da mesma casa
+        now = int(datetime.now().timestamp())
+        self.writer.submit_many('''
+            INSERT OR REPLACE INTO odds (match_id, market, line, kind, bookmaker, odd, source, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(r['match_id'], r['market'], float(r['line']), r['kind'], r.get('bookmaker') or '', float(r['odd']),
+               r.get('source'), now) for r in rows], error="Erro ao salvar odds")
+
+    def get_odds(self, match_ids=None):
+        import pandas as pd
+
+        query = "SELECT match_id, market, line, kind, bookmaker, odd, source, updated_at FROM odds"
+        params = []
+        if match_ids is not None:
+            match_ids = list(match_ids)
+            query += f" WHERE match_id IN ({', '.join('?' * len(match_ids))})"
+            params = match_ids
+        return pd.read_sql_query(query, self.connect(), params=params)
+
+    def get_odds_match_ids(self, include_finished=False):
+        # Jogos com odds (por padrão só os que ainda não terminaram)
+        query = "SELECT DISTINCT o.match_id FROM odds o LEFT JOIN matches m ON m.match_id = o.match_id"
+        if not include_finished:
+            query += " WHERE COALESCE(m.status, '') != 'finished'"
+        return [row[0] for row in self.connect().execute(query + " ORDER BY o.match_id")]
+
+    def get_upcoming_matches(self, start_ts, end_ts):
+        # Jogos ainda não iniciados com início em [start_ts, end_ts)
+        cursor = self.connect().execute('''
+            SELECT * FROM matches
+            WHERE status = 'notstarted' AND start_timestamp >= ? AND start_timestamp < ?
+            ORDER BY start_timestamp, match_id
+        ''', (int(start_ts), int(end_ts)))
+        cols = [c[0] for c in cursor.description]
+        return [dict(zip(cols, row)) for row in cursor.fetchall()]
+
+    def get_complete_rounds(self, season_id):
+        # Rodadas da temporada em que todos os jogos já têm estatísticas válidas
+        # ("todos" = o maior número de jogos com estatísticas numa rodada)
+        rows = self.connect().execute('''
+            SELECT m.round, COUNT(*)
+            FROM matches m JOIN match_stats s ON s.match_id = m.match_id
+            WHERE m.season_id = ? AND m.status = 'finished' AND COALESCE(s.quality, 0) = 0
+            GROUP BY m.round
+        ''', (season_id,)).fetchall()
+        if not rows:
+            return set()
+        full = max(n for _, n in rows)
+        return {rnd for rnd, n in rows if n >= full}
+
+    def log_pipeline_step(self, run_id, step, status, started_at, finished_at, detail=None):
+        self.writer.submit('''
+            INSERT INTO pipeline_runs (run_id, step, status, started_at, finished_at, detail)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (run_id, step, status, int(started_at), int(finished_at), json.dumps(detail or {}, default=str)),
+            error="Erro ao gravar o log da rotina")
+
+    def get_pipeline_runs(self, step=None, status=None, limit=None):
+        # Mais recentes primeiro; detail já decodificado
+        query = "SELECT run_id, step, status, started_at, finished_at, detail FROM pipeline_runs"
+        clauses, params = [], []
+        if step is not None:
+            clauses.append("step = ?")
+            params.append(step)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [
+            {'run_id': run_id, 'step': step_, 'status': status_, 'started_at': started, 'finished_at': finished,
+             'detail': json.loads(detail) if detail else {}}
+            for run_id, step_, status_, started, finished, detail in self.connect().execute(query, params)
+        ]
+
+    def audit_stats(self):
+        # Revalida todo o match_stats (vetorizado); ver src/database/quality.py
+        from src.database.quality import audit_stats
+
+        return audit_stats(self)
+
+    def get_refetch_queue(self, limit=None, max_attempts=None):
+        # Ids na ordem em que falharam há mais tempo (sem o dead-letter)
+        query = "SELECT match_id FROM refetch_queue WHERE dead = 0"
+        params = []
+        if max_attempts is not None:
+            query += " AND attempts <= ?"
+            params.append(max_attempts)
+        query += " ORDER BY updated_at, match_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self.connect().execute(query, params)]
+
+    def get_dead_letter_ids(self):
+        # Jogos que não adianta buscar de novo (somam-se aos de match_stats como "conhecidos")
+        return {row[0] for row in self.connect().execute("SELECT match_id FROM refetch_queue WHERE dead = 1")}
+
+    @timed("db.get_historical_data")
+    def get_historical_data(self):
+        import pandas as pd
+
+        conn = self.connect()
+        # m.* + colunas de estatísticas (match_id não vem duplicado)
+        return pd.read_sql_query(HISTORICAL_DATA_SQL, conn)
+
+    @timed("db.get_rolling_features")
+    def get_rolling_features(self, window=5):
+        # Matriz de features já pronta (funções de janela no SQLite 3.25+)
+        import pandas as pd
+
+        return pd.read_sql_query(rolling_features_sql(window), self.connect())
+
+    def save_backtest_results(self, rows):
+        # rows: dicts de src/analysis/backtest.py (mesmas chaves das colunas)
+        self.writer.submit_many('''
+            INSERT INTO backtest_results (
+                run_id, match_id, prediction_type, predicted_value, market, probability,
+                odds, category, market_group, status, actual, profit, created_at
+            ) VALUES (
+                :run_id, :match_id, :prediction_type, :predicted_value, :market, :probability,
+                :odds, :category, :market_group, :status, :actual, :profit, :created_at
+            )
+        ''', rows, error="Erro ao salvar resultados do backtest")
+
+    def prediction_performance(self, table="predictions", run_id=None):
+        import pandas as pd
+
+        sql, params = performance_sql(table, run_id)
+        return pd.read_sql_query(sql, self.connect(), params=params)
+
+    def iter_query(self, sql, params=None, chunk_size=5000):
+        cursor = self.connect().execute(sql, params or ())
+        columns = [c[0] for c in cursor.description]
+
+        def chunks():
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+
+        return columns, chunks()
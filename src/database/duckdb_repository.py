@@ -0,0 +1,178 @@
+from src.database.db_manager import DBManager
+from src.database.queries import HISTORICAL_DATA_SQL, TABLES, performance_sql, rolling_features_sql
+from src.database.repository import Repository
+from src.instrumentation import timed
+
+# Backend analítico embutido (sem servidor). O arquivo SQLite continua sendo a
+# fonte da verdade: escritas e consultas pontuais vão para o DBManager, e as
+# leituras analíticas rodam no DuckDB (colunar) sobre os mesmos dados.
+#   - com a extensão sqlite do DuckDB: ATTACH do arquivo (leitura sempre atual)
+#   - sem ela (ex: offline): cópia das tabelas, recarregada depois de escritas
+
+
+class DuckDBRepository(Repository):
+    def __init__(self, db_path="data/football_data.db", duckdb_path=":memory:"):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("duckdb não instalado. Instale com: pip install duckdb")
+
+        self.db_path = db_path
+        self.sqlite = DBManager(db_path)
+        self.con = duckdb.connect(duckdb_path)
+        self.attached = self._attach(duckdb)
+        self._stale = not self.attached
+
+    def _attach(self, duckdb):
+        try:
+            self.con.execute("INSTALL sqlite")
+            self.con.execute("LOAD sqlite")
+            self.con.execute(f"ATTACH '{self.db_path}' AS bet (TYPE sqlite, READ_ONLY)")
+            self.con.execute("USE bet")
+            return True
+        except duckdb.Error:
+            return False
+
+    def _refresh(self):
+        self.sqlite.flush()
+        if not self._stale:
+            return
+        import pandas as pd
+
+        conn = self.sqlite.connect()
+        for table in TABLES:
+            snapshot = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            self.con.register("_snapshot", snapshot)
+            self.con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM _snapshot")
+            self.con.unregister("_snapshot")
+        self._stale = False
+
+    def _query(self, sql, params=None):
+        self._refresh()
+        return self.con.execute(sql, params or []).df()
+
+    def _written(self):
+        if not self.attached:
+            self._stale = True
+
+    # --- Escrita (SQLite) ---
+    def save_match(self, match_data):
+        self.sqlite.save_match(match_data)
+        self._written()
+
+    def save_matches(self, matches):
+        self.sqlite.save_matches(matches)
+        self._written()
+
+    def save_stats(self, match_id, stats_data):
+        self.sqlite.save_stats(match_id, stats_data)
+        self._written()
+
+    def save_stats_many(self, items):
+        flags = self.sqlite.save_stats_many(items)
+        self._written()
+        return flags
+
+    def save_prediction(self, match_id, pred_type, value, market, prob, odds=0.0, category=None, market_group=None, verbose=False):
+        self.sqlite.save_prediction(match_id, pred_type, value, market, prob, odds=odds, category=category,
+                                    market_group=market_group, verbose=verbose)
+        self._written()
+
+    def delete_predictions(self, match_id, verbose=True):
+        self.sqlite.delete_predictions(match_id, verbose=verbose)
+        self._written()
+
+    def save_backtest_results(self, rows):
+        self.sqlite.save_backtest_results(rows)
+        self._written()
+
+    def queue_refetch(self, match_ids, reason=None, permanent=False):
+        self.sqlite.queue_refetch(match_ids, reason=reason, permanent=permanent)
+
+    def save_odds(self, rows):
+        self.sqlite.save_odds(rows)
+
+    def log_pipeline_step(self, run_id, step, status, started_at, finished_at, detail=None):
+        self.sqlite.log_pipeline_step(run_id, step, status, started_at, finished_at, detail)
+
+    def audit_stats(self):
+        result = self.sqlite.audit_stats()
+        self._written()
+        return result
+
+    def check_predictions(self, verbose=True):
+        settled = self.sqlite.check_predictions(verbose=verbose)
+        if settled:
+            self._written()
+        return settled
+
+    # --- Consultas pontuais (SQLite, índice por chave primária) ---
+    def get_match(self, match_id):
+        return self.sqlite.get_match(match_id)
+
+    def get_predictions(self, match_id, category=None):
+        return self.sqlite.get_predictions(match_id, category=category)
+
+    def history_version(self):
+        return self.sqlite.history_version()
+
+    def get_stats_match_ids(self):
+        return self.sqlite.get_stats_match_ids()
+
+    def count_team_matches(self, team_id, venue=None, tournament_keyword=None):
+        return self.sqlite.count_team_matches(team_id, venue=venue, tournament_keyword=tournament_keyword)
+
+    def get_refetch_queue(self, limit=None, max_attempts=None):
+        return self.sqlite.get_refetch_queue(limit=limit, max_attempts=max_attempts)
+
+    def get_dead_letter_ids(self):
+        return self.sqlite.get_dead_letter_ids()
+
+    def get_odds(self, match_ids=None):
+        # Leitura pontual e sempre fresca (as odds mudam o tempo todo): direto do SQLite
+        return self.sqlite.get_odds(match_ids)
+
+    def get_odds_match_ids(self, include_finished=False):
+        return self.sqlite.get_odds_match_ids(include_finished=include_finished)
+
+    def get_upcoming_matches(self, start_ts, end_ts):
+        return self.sqlite.get_upcoming_matches(start_ts, end_ts)
+
+    def get_complete_rounds(self, season_id):
+        return self.sqlite.get_complete_rounds(season_id)
+
+    def get_pipeline_runs(self, step=None, status=None, limit=None):
+        return self.sqlite.get_pipeline_runs(step=step, status=status, limit=limit)
+
+    # --- Analítico (DuckDB) ---
+    @timed("db.get_historical_data")
+    def get_historical_data(self):
+        return self._query(HISTORICAL_DATA_SQL)
+
+    @timed("db.get_rolling_features")
+    def get_rolling_features(self, window=5):
+        return self._query(rolling_features_sql(window))
+
+    def prediction_performance(self, table="predictions", run_id=None):
+        sql, params = performance_sql(table, run_id)
+        return self._query(sql, params)
+
+    def iter_query(self, sql, params=None, chunk_size=5000):
+        self._refresh()
+        cursor = self.con.execute(sql, params or [])
+        return [c[0] for c in cursor.description], _fetch_chunks(cursor, chunk_size)
+
+    def flush(self):
+        self.sqlite.flush()
+
+    def close(self):
+        self.sqlite.close()
+        self.con.close()
+
+
+def _fetch_chunks(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
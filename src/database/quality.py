@@ -0,0 +1,116 @@
+import numpy as np
+
+from src.database.queries import NOW_EPOCH_SQL
+
+# Validação das linhas de match_stats (vetorizada: um array, sem loop por linha).
+# Cada problema é um bit em match_stats.quality (0 = ok). Linhas com quality != 0
+# ficam fora do histórico (features, médias do StatisticalAnalyzer, conferência);
+# as com bits de REFETCHABLE vão para refetch_queue. Roda na ingestão (save_stats)
+# e em lote (audit).
+
+STATS_COLUMNS = (
+    'corners_home_ft', 'corners_away_ft', 'corners_home_ht', 'corners_away_ht',
+    'shots_ot_home_ft', 'shots_ot_away_ft', 'shots_ot_home_ht', 'shots_ot_away_ht',
+)
+
+MISSING = 1          # algum valor nulo
+ZERO_FILLED = 2      # tudo zero: falha de coleta gravada como dado
+HT_EXCEEDS_FT = 4    # 1º tempo maior que o jogo todo (2T negativo)
+NEGATIVE = 8
+IMPLAUSIBLE = 16     # acima do limite físico plausível por time
+HT_MISSING = 32      # 1º tempo todo zerado num jogo movimentado (período 1ST não veio)
+
+# Problemas que uma nova busca pode corrigir (resposta parcial ou falha gravada como
+# zeros). HT_EXCEEDS_FT, NEGATIVE, IMPLAUSIBLE e HT_MISSING vêm da própria fonte: a
+# linha fica marcada, sem re-busca. Um 0x0 genuíno esgota REFETCH_MAX_ATTEMPTS.
+REFETCHABLE = MISSING | ZERO_FILLED
+
+FLAG_NAMES = {
+    MISSING: "missing",
+    ZERO_FILLED: "zero_filled",
+    HT_EXCEEDS_FT: "ht_exceeds_ft",
+    NEGATIVE: "negative",
+    IMPLAUSIBLE: "implausible",
+    HT_MISSING: "ht_missing",
+}
+
+MAX_TEAM_CORNERS = 25
+MAX_TEAM_SHOTS = 30
+HT_MISSING_MIN_FT = 14  # escanteios + chutes no gol no jogo para exigir algo no 1º tempo
+
+
+def quality_flags(values):
+    # values: array (n, 8) na ordem de STATS_COLUMNS (NaN = nulo) -> array (n,) de bits
+    values = np.asarray(values, dtype=float).reshape(-1, len(STATS_COLUMNS))
+    flags = np.zeros(len(values), dtype=np.int64)
+
+    # Comparações com NaN dão False: um nulo só dispara MISSING
+    flags[np.isnan(values).any(axis=1)] |= MISSING
+
+    ft = values[:, [0, 1, 4, 5]]
+    ht = values[:, [2, 3, 6, 7]]
+    corners_ft, shots_ft = values[:, [0, 1]], values[:, [4, 5]]
+
+    flags[(values == 0).all(axis=1)] |= ZERO_FILLED
+    flags[(ht > ft).any(axis=1)] |= HT_EXCEEDS_FT
+    flags[(values < 0).any(axis=1)] |= NEGATIVE
+    flags[(corners_ft > MAX_TEAM_CORNERS).any(axis=1) | (shots_ft > MAX_TEAM_SHOTS).any(axis=1)] |= IMPLAUSIBLE
+    flags[(ht == 0).all(axis=1) & (ft.sum(axis=1) >= HT_MISSING_MIN_FT)] |= HT_MISSING
+    return flags
+
+
+def stats_matrix(stats_list):
+    # [dict de parse_match_stats] -> array (n, 8) para quality_flags
+    return np.array([[np.nan if s.get(c) is None else s[c] for c in STATS_COLUMNS] for s in stats_list],
+                    dtype=float).reshape(-1, len(STATS_COLUMNS))
+
+
+def stats_flags(stats):
+    # Um jogo (dict de parse_match_stats) -> bits
+    return int(quality_flags(stats_matrix([stats]))[0])
+
+
+def describe_flags(flags):
+    return ",".join(name for bit, name in FLAG_NAMES.items() if flags & bit) or "ok"
+
+
+def audit_stats(db, chunk_size=200000):
+    # Auditoria em lote de match_stats: recalcula quality de todas as linhas em blocos,
+    # grava só as que mudaram e enfileira as suspeitas para re-busca.
+    # Retorna {nome_do_problema: linhas} e o total auditado.
+    conn = db.connect()
+    cols = ", ".join(STATS_COLUMNS)
+    cursor = conn.execute(f"SELECT match_id, COALESCE(quality, 0), {cols} FROM match_stats")
+
+    counts = {name: 0 for name in FLAG_NAMES.values()}
+    total = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        data = np.array(rows, dtype=float)  # None -> nan
+        ids, old = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64)
+        flags = quality_flags(data[:, 2:])
+        total += len(rows)
+
+        for bit, name in FLAG_NAMES.items():
+            counts[name] += int(np.count_nonzero(flags & bit))
+
+        changed = flags != old
+        if changed.any():
+            db.writer.submit_many(f"UPDATE match_stats SET quality = ?, updated_at = {NOW_EPOCH_SQL} WHERE match_id = ?",
+                                  zip(flags[changed].tolist(), ids[changed].tolist()),
+                                  error="Erro ao gravar qualidade")
+        # Só as que acabaram de ficar suspeitas e que uma re-busca pode corrigir
+        # (as outras já estão na fila)
+        suspect = (flags & REFETCHABLE) != 0
+        if (changed & suspect).any():
+            db.queue_refetch(ids[changed & suspect].tolist(), reason="quality")
+        # Linhas que voltaram a ficar ok (ou sem re-busca possível) saem da fila
+        # (inclui as marcadas antes de REFETCHABLE existir, mesmo sem mudança)
+        fixed = (changed | (flags != 0)) & ~suspect
+        if fixed.any():
+            db.writer.submit_many("DELETE FROM refetch_queue WHERE match_id = ?",
+                                  [(i,) for i in ids[fixed].tolist()])
+    db.flush()
+    return counts, total
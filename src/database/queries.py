@@ -0,0 +1,212 @@
+# SQL analítico compartilhado pelos backends (src/database/repository.py).
+# Só SQL padrão + funções de janela: roda igual no SQLite (3.25+) e no DuckDB.
+
+TABLES = ("matches", "match_stats", "predictions", "backtest_results")
+
+# Linhas marcadas pela auditoria de qualidade (quality != 0) ficam de fora
+FINISHED_MATCHES_SQL = '''
+    SELECT
+        m.*,
+        s.corners_home_ft, s.corners_away_ft,
+        s.corners_home_ht, s.corners_away_ht,
+        s.shots_ot_home_ft, s.shots_ot_away_ft,
+        s.shots_ot_home_ht, s.shots_ot_away_ht
+    FROM matches m
+    JOIN match_stats s ON m.match_id = s.match_id
+    WHERE m.status = 'finished' AND COALESCE(s.quality, 0) = 0
+'''
+
+# Epoch com fração de segundo (match_stats.updated_at)
+NOW_EPOCH_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
+# Muda sempre que o histórico muda: jogo novo, estatística regravada (updated_at),
+# linha que sai ou volta pela auditoria (COUNT). Usado para recarregar estado quente.
+HISTORY_VERSION_SQL = '''
+    SELECT COUNT(*), MAX(m.match_id), MAX(s.updated_at)
+    FROM matches m
+    JOIN match_stats s ON m.match_id = s.match_id
+    WHERE m.status = 'finished' AND COALESCE(s.quality, 0) = 0
+'''
+
+HISTORICAL_DATA_SQL = FINISHED_MATCHES_SQL + '''
+    ORDER BY m.start_timestamp ASC, m.match_id ASC
+'''
+
+# Médias móveis por time das N partidas anteriores (sem a atual), como em
+# src/ml/feature_engineering.calculate_rolling_stats, calculadas no banco.
+# Cada jogo vira duas linhas time-jogo (mandante e visitante); _against são os
+# números do adversário naquele jogo (escanteios/chutes/gols sofridos).
+ROLLING_FEATURES_SQL = '''
+    WITH hist AS ({finished}),
+    team_matches AS (
+        SELECT match_id, start_timestamp, home_team_id AS team_id, 1 AS is_home,
+               corners_home_ft AS corners, shots_ot_home_ft AS shots, home_score AS goals,
+               corners_away_ft AS corners_against, shots_ot_away_ft AS shots_against, away_score AS goals_against
+        FROM hist
+        UNION ALL
+        SELECT match_id, start_timestamp, away_team_id AS team_id, 0 AS is_home,
+               corners_away_ft, shots_ot_away_ft, away_score,
+               corners_home_ft, shots_ot_home_ft, home_score
+        FROM hist
+    ),
+    rolling AS (
+        SELECT
+            match_id, is_home,
+            AVG(corners) OVER w AS avg_corners,
+            AVG(shots) OVER w AS avg_shots,
+            AVG(goals) OVER w AS avg_goals,
+            AVG(corners_against) OVER w AS avg_corners_against,
+            AVG(shots_against) OVER w AS avg_shots_against,
+            AVG(goals_against) OVER w AS avg_goals_against
+        FROM team_matches
+        WINDOW w AS (
+            PARTITION BY team_id ORDER BY start_timestamp, match_id
+            ROWS BETWEEN {window} PRECEDING AND 1 PRECEDING
+        )
+    )
+    SELECT
+        h.*,
+        hr.avg_corners AS home_avg_corners, hr.avg_shots AS home_avg_shots, hr.avg_goals AS home_avg_goals,
+        ar.avg_corners AS away_avg_corners, ar.avg_shots AS away_avg_shots, ar.avg_goals AS away_avg_goals,
+        hr.avg_corners_against AS home_avg_corners_against, hr.avg_shots_against AS home_avg_shots_against,
+        hr.avg_goals_against AS home_avg_goals_against,
+        ar.avg_corners_against AS away_avg_corners_against, ar.avg_shots_against AS away_avg_shots_against,
+        ar.avg_goals_against AS away_avg_goals_against
+    FROM hist h
+    JOIN rolling hr ON hr.match_id = h.match_id AND hr.is_home = 1
+    JOIN rolling ar ON ar.match_id = h.match_id AND ar.is_home = 0
+    WHERE hr.avg_corners IS NOT NULL AND ar.avg_corners IS NOT NULL
+    ORDER BY h.start_timestamp, h.match_id
+'''
+
+
+def rolling_features_sql(window=5):
+    return ROLLING_FEATURES_SQL.format(finished=FINISHED_MATCHES_SQL, window=int(window))
+
+# Desempenho das previsões conferidas por categoria, com a taxa de acerto
+# das últimas 50 previsões de cada categoria (janela ordenada por data).
+# Roda sobre predictions ou backtest_results (mesmas colunas); PUSH fica de fora.
+PREDICTION_PERFORMANCE_SQL = '''
+    WITH settled AS (
+        SELECT
+            p.category,
+            p.market_group,
+            p.probability,
+            p.odds,
+            CASE WHEN p.status = 'GREEN' THEN 1 ELSE 0 END AS hit,
+            AVG(CASE WHEN p.status = 'GREEN' THEN 1.0 ELSE 0.0 END) OVER (
+                PARTITION BY p.category ORDER BY p.created_at, p.id
+                ROWS BETWEEN 49 PRECEDING AND CURRENT ROW
+            ) AS recent_hit_rate,
+            ROW_NUMBER() OVER (PARTITION BY p.category ORDER BY p.created_at DESC, p.id DESC) AS recency
+        FROM {table} p
+        WHERE p.status IN ('GREEN', 'RED') AND p.prediction_type = 'Statistical'{run_filter}
+    )
+    SELECT
+        category,
+        COUNT(*) AS bets,
+        COUNT(CASE WHEN hit = 1 THEN 1 END) AS greens,
+        AVG(1.0 * hit) AS hit_rate,
+        AVG(probability) AS avg_probability,
+        AVG(odds) AS avg_odds,
+        MAX(CASE WHEN recency = 1 THEN recent_hit_rate END) AS last_50_hit_rate
+    FROM settled
+    GROUP BY category
+    ORDER BY category
+'''
+
+
+def performance_sql(table="predictions", run_id=None):
+    # (sql, params) do relatório de desempenho; run_id filtra uma execução do backtest
+    if table not in ("predictions", "backtest_results"):
+        raise ValueError(f"Tabela inválida: {table}")
+    run_filter = " AND p.run_id = ?" if run_id is not None else ""
+    params = [run_id] if run_id is not None else []
+    return PREDICTION_PERFORMANCE_SQL.format(table=table, run_filter=run_filter), params
+
+# --- Exportação (src/export.py) ---
+# Mesmas colunas para predictions e backtest_results (este com run_id, actual e profit).
+# Filtros: data do jogo (start_timestamp), torneio (trecho, sem maiúsculas), categoria e status.
+
+EXPORT_PREDICTIONS_SQL = '''
+    SELECT
+        {run_column}p.id, p.match_id, m.start_timestamp, m.tournament_name, m.round,
+        m.home_team_name, m.away_team_name,
+        p.prediction_type, p.category, p.market_group, p.market,
+        p.predicted_value, p.probability, p.odds, p.status, p.created_at{extra_columns}
+    FROM {table} p
+    LEFT JOIN matches m ON m.match_id = p.match_id{stats_join}
+    {where}
+    ORDER BY p.id
+'''
+
+# Uma linha por análise salva (jogo; no backtest, jogo da execução)
+EXPORT_ANALYSES_SQL = '''
+    SELECT
+        {run_column}p.match_id, m.start_timestamp, m.tournament_name, m.round,
+        m.home_team_name, m.away_team_name,
+        MIN(p.created_at) AS analyzed_at,
+        MAX(CASE WHEN p.prediction_type = 'ML' THEN p.predicted_value END) AS ml_prediction,
+        COUNT(CASE WHEN p.category = 'Top7' THEN 1 END) AS top7,
+        MAX(CASE WHEN p.category = 'Suggestion_Easy' THEN p.market_group || ' ' || p.market END) AS suggestion_easy,
+        MAX(CASE WHEN p.category = 'Suggestion_Medium' THEN p.market_group || ' ' || p.market END) AS suggestion_medium,
+        MAX(CASE WHEN p.category = 'Suggestion_Hard' THEN p.market_group || ' ' || p.market END) AS suggestion_hard,
+        COUNT(CASE WHEN p.status = 'GREEN' THEN 1 END) AS greens,
+        COUNT(CASE WHEN p.status = 'RED' THEN 1 END) AS reds,
+        COUNT(CASE WHEN p.status = 'PUSH' THEN 1 END) AS pushes,
+        COUNT(CASE WHEN p.status = 'PENDING' THEN 1 END) AS pending
+    FROM {table} p
+    LEFT JOIN matches m ON m.match_id = p.match_id
+    {where}
+    GROUP BY {run_column}p.match_id, m.start_timestamp, m.tournament_name, m.round, m.home_team_name, m.away_team_name
+    ORDER BY m.start_timestamp, p.match_id
+'''
+
+SETTLED_STATUSES = ('GREEN', 'RED', 'PUSH')
+EXPORT_DATASETS = ("predictions", "analyses", "settlements")
+
+
+def export_filters(since=None, until=None, tournament=None, categories=None, statuses=None, run_id=None):
+    # (cláusula WHERE, params). since/until: timestamps (until exclusivo)
+    clauses, params = [], []
+    if run_id is not None:
+        clauses.append("p.run_id = ?")
+        params.append(run_id)
+    if since is not None:
+        clauses.append("m.start_timestamp >= ?")
+        params.append(int(since))
+    if until is not None:
+        clauses.append("m.start_timestamp < ?")
+        params.append(int(until))
+    if tournament:
+        clauses.append("LOWER(m.tournament_name) LIKE ?")
+        params.append(f"%{tournament.lower()}%")
+    for column, values in (("p.category", categories), ("p.status", statuses)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def export_sql(dataset, run_id=None, statuses=None, **filters):
+    # (sql, params) de um conjunto exportável; run_id lê backtest_results em vez de predictions
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Conjunto inválido: {dataset}. Opções: {', '.join(EXPORT_DATASETS)}")
+    backtest = run_id is not None
+    table = "backtest_results" if backtest else "predictions"
+    run_column = "p.run_id, " if backtest else ""
+    if dataset == "settlements":
+        statuses = [s for s in (statuses or SETTLED_STATUSES) if s in SETTLED_STATUSES]
+    where, params = export_filters(run_id=run_id, statuses=statuses, **filters)
+
+    if dataset == "analyses":
+        return EXPORT_ANALYSES_SQL.format(table=table, run_column=run_column, where=where), params
+
+    extra_columns = ", p.actual, p.profit" if backtest else ""
+    stats_join = ""
+    if dataset == "settlements" and not backtest:
+        # Número real e lucro saem do match_stats em src/export.py (mesma regra do check_predictions)
+        extra_columns = ", s.corners_home_ft, s.corners_away_ft, s.corners_home_ht, s.corners_away_ht"
+        stats_join = "\n    LEFT JOIN match_stats s ON s.match_id = p.match_id"
+    return EXPORT_PREDICTIONS_SQL.format(table=table, run_column=run_column, extra_columns=extra_columns,
+                                         stats_join=stats_join, where=where), params
@@ -0,0 +1,146 @@
+import os
+from abc import ABC, abstractmethod
+
+# Interface de armazenamento. DBManager (SQLite) é a implementação padrão;
+# DuckDBRepository roda as leituras analíticas no DuckDB sobre o mesmo arquivo.
+# Backend incompleto falha ao ser instanciado (ABC), não no meio de um pipeline.
+# Escolha do backend: get_repository(backend=...) ou PROJETO_BET_DB_BACKEND=sqlite|duckdb
+
+BACKEND_ENV = "PROJETO_BET_DB_BACKEND"
+BACKENDS = ("sqlite", "duckdb")
+
+
+class Repository(ABC):
+    # --- Escrita ---
+    @abstractmethod
+    def save_match(self, match_data):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_matches(self, matches):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_stats(self, match_id, stats_data):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_stats_many(self, items):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_prediction(self, match_id, pred_type, value, market, prob, odds=0.0, category=None, market_group=None, verbose=False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_predictions(self, match_id, verbose=True):
+        raise NotImplementedError
+
+    @abstractmethod
+    def check_predictions(self, verbose=True):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_backtest_results(self, rows):
+        raise NotImplementedError
+
+    @abstractmethod
+    def queue_refetch(self, match_ids, reason=None, permanent=False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_odds(self, rows):
+        raise NotImplementedError
+
+    @abstractmethod
+    def audit_stats(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def log_pipeline_step(self, run_id, step, status, started_at, finished_at, detail=None):
+        raise NotImplementedError
+
+    # --- Consultas pontuais ---
+    @abstractmethod
+    def get_match(self, match_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_predictions(self, match_id, category=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def history_version(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_stats_match_ids(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_team_matches(self, team_id, venue=None, tournament_keyword=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_refetch_queue(self, limit=None, max_attempts=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_dead_letter_ids(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_odds(self, match_ids=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_odds_match_ids(self, include_finished=False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_upcoming_matches(self, start_ts, end_ts):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_complete_rounds(self, season_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pipeline_runs(self, step=None, status=None, limit=None):
+        raise NotImplementedError
+
+    # --- Analítico (DataFrames) ---
+    @abstractmethod
+    def get_historical_data(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_rolling_features(self, window=5):
+        raise NotImplementedError
+
+    @abstractmethod
+    def prediction_performance(self, table="predictions", run_id=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_query(self, sql, params=None, chunk_size=5000):
+        # (colunas, gerador de blocos de linhas): exportações sem carregar a tabela inteira
+        raise NotImplementedError
+
+    # --- Ciclo de vida ---
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def get_repository(db_path="data/football_data.db", backend=None, **kwargs):
+    backend = backend or os.environ.get(BACKEND_ENV, "sqlite")
+    if backend == "sqlite":
+        from src.database.db_manager import DBManager
+        return DBManager(db_path)
+    if backend == "duckdb":
+        from src.database.duckdb_repository import DuckDBRepository
+        return DuckDBRepository(db_path, **kwargs)
+    raise ValueError(f"Backend desconhecido: {backend}. Opções: {', '.join(BACKENDS)}")
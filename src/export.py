@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+import sys
+
+from src.analysis.markets import DEFAULT_MARKETS, get_market, load_market_catalog, market_corners, settle_selection
+from src.database.queries import EXPORT_DATASETS, export_sql
+from src.instrumentation import metrics
+
+# Exportação de previsões, análises, liquidações e desempenho para CSV, JSON Lines ou
+# Parquet. As linhas saem do banco em blocos (cursor.fetchmany) e cada bloco é gravado
+# antes do próximo ser lido: a memória fica constante, sem DataFrame da tabela inteira.
+#   predictions  - uma linha por previsão, com o jogo
+#   analyses     - uma linha por análise salva (ML, Top7, sugestões e placar de GREEN/RED)
+#   settlements  - previsões conferidas com o número real e o lucro por unidade
+#   performance  - agregado das liquidações por categoria e mercado
+# Com run_id, tudo sai de backtest_results (uma execução do backtest).
+# Parquet usa o pyarrow (opcional), um row group por bloco.
+
+EXPORT_DIR = "data/exports"
+FORMATS = ("csv", "jsonl", "parquet")
+DATASETS = EXPORT_DATASETS + ("performance",)
+DEFAULT_CHUNK_SIZE = 5000
+
+STATS_COLUMNS = ("corners_home_ft", "corners_away_ft", "corners_home_ht", "corners_away_ht")
+
+# Tipos das colunas no Parquet (o resto é texto); o schema sai do primeiro bloco
+INT_COLUMNS = {
+    "id", "match_id", "start_timestamp", "round", "top7", "greens", "reds", "pushes", "pending", "bets",
+} | set(STATS_COLUMNS)
+FLOAT_COLUMNS = {
+    "predicted_value", "probability", "odds", "actual", "profit", "ml_prediction",
+    "hit_rate", "avg_probability", "avg_odds", "roi", "brier",
+}
+
+
+def format_for(path, fmt=None):
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato inválido: {fmt}. Opções: {', '.join(FORMATS)}")
+        return fmt
+    ext = os.path.splitext(path or "")[1].lower().lstrip(".")
+    return {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(ext, ext if ext in FORMATS else "csv")
+
+
+def default_path(dataset, fmt):
+    return os.path.join(EXPORT_DIR, f"{dataset}.{fmt}")
+
+
+def _open(path, newline=None):
+    # "-" = stdout (CSV/JSONL)
+    if path == "-":
+        return sys.stdout
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(path, "w", encoding="utf-8", newline=newline)
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = _open(path, newline="")
+        self.writer = csv.writer(self.file)
+        self.header = False
+
+    def write(self, columns, rows):
+        if not self.header:
+            self.writer.writerow(columns)
+            self.header = True
+        self.writer.writerows(rows)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self.file = _open(path)
+
+    def write(self, columns, rows):
+        self.file.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+                             for row in rows)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        if path == "-":
+            raise ValueError("Parquet não pode ser gravado na saída padrão.")
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow não instalado. Instale com: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.schema = None
+        self.writer = None
+
+    def _type(self, column):
+        if column in INT_COLUMNS:
+            return self.pa.int64()
+        if column in FLOAT_COLUMNS:
+            return self.pa.float64()
+        return self.pa.string()
+
+    def write(self, columns, rows):
+        pa = self.pa
+        if self.writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.schema = pa.schema([(c, self._type(c)) for c in columns])
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        arrays = []
+        for i, field in enumerate(self.schema):
+            values = [row[i] for row in rows]
+            if field.type == pa.string():
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "parquet": ParquetSink}
+
+
+def _settle_chunk(columns, rows, markets):
+    # Número real do mercado e lucro por unidade (mesma regra do check_predictions);
+    # None quando o jogo não tem estatísticas
+    idx = {c: i for i, c in enumerate(columns)}
+    out = []
+    for row in rows:
+        stats = {c: row[idx[c]] for c in STATS_COLUMNS}
+        if any(v is None for v in stats.values()):
+            out.append(row + (None, None))
+            continue
+        group_name = row[idx["market_group"]]
+        group = get_market(markets, group_name) or get_market(DEFAULT_MARKETS, group_name) or DEFAULT_MARKETS[0]
+        actual = market_corners(group, stats)
+        _, profit = settle_selection(row[idx["market"]], actual, row[idx["odds"]])
+        out.append(row + (float(actual), profit))
+    return out
+
+
+def iter_rows(db, dataset, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    # (colunas, gerador de blocos) de um dos conjuntos de EXPORT_DATASETS
+    sql, params = export_sql(dataset, **filters)
+    columns, chunks = db.iter_query(sql, params, chunk_size=chunk_size)
+    if dataset != "settlements" or "actual" in columns:
+        return columns, chunks
+    markets = load_market_catalog()
+    return columns + ["actual", "profit"], (_settle_chunk(columns, rows, markets) for rows in chunks)
+
+
+PERFORMANCE_COLUMNS = ["category", "market_group", "bets", "greens", "reds", "pushes", "hit_rate",
+                       "avg_probability", "avg_odds", "profit", "roi", "brier"]
+
+
+def performance_rows(columns, chunks):
+    # Agrega as liquidações bloco a bloco: {(categoria, mercado): somas}
+    idx = {c: i for i, c in enumerate(columns)}
+    groups = {}
+    for rows in chunks:
+        for row in rows:
+            category = row[idx["category"]] or row[idx["prediction_type"]]
+            g = groups.setdefault((category, row[idx["market_group"]] or ""), [0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0])
+            status = row[idx["status"]]
+            g[0] += 1
+            g[1] += status == "GREEN"
+            g[2] += status == "RED"
+            g[3] += status == "PUSH"
+            g[4] += row[idx["probability"]] or 0.0
+            g[5] += row[idx["odds"]] or 0.0
+            g[6] += row[idx["profit"]] or 0.0
+            if status != "PUSH" and row[idx["prediction_type"]] == "Statistical":
+                g[7] += ((row[idx["probability"]] or 0.0) - (status == "GREEN")) ** 2
+                g[8] += 1
+
+    out = []
+    for (category, market_group), (bets, greens, reds, pushes, prob, odds, profit, brier, decided) in sorted(groups.items()):
+        out.append((
+            category, market_group, bets, greens, reds, pushes,
+            greens / (greens + reds) if greens + reds else None,
+            prob / bets, odds / bets, profit, profit / bets,
+            brier / decided if decided else None,
+        ))
+    return out
+
+
+def export_dataset(db, dataset, path=None, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    # Grava o conjunto em path e retorna (caminho, linhas gravadas).
+    # filters: since/until (timestamps), tournament, categories, statuses, run_id
+    if dataset not in DATASETS:
+        raise ValueError(f"Conjunto inválido: {dataset}. Opções: {', '.join(DATASETS)}")
+    fmt = format_for(path, fmt)
+    path = path or default_path(dataset, fmt)
+    sink = SINKS[fmt](path)
+
+    n = 0
+    try:
+        if dataset == "performance":
+            columns, chunks = iter_rows(db, "settlements", chunk_size=chunk_size, **filters)
+            rows = performance_rows(columns, chunks)
+            sink.write(PERFORMANCE_COLUMNS, rows)
+            n = len(rows)
+        else:
+            columns, chunks = iter_rows(db, dataset, chunk_size=chunk_size, **filters)
+            for rows in chunks:
+                sink.write(columns, rows)
+                n += len(rows)
+                metrics.incr("export.rows", len(rows))
+            if n == 0:
+                sink.write(columns, [])
+    finally:
+        sink.close()
+    return path, n
@@ -0,0 +1,213 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.database.archive import (
+    EVENT_ENDPOINT, ROUND_ENDPOINT, STATS_ENDPOINT, TEAM_EVENTS_ENDPOINT, decompress,
+)
+from src.scrapers.parsing import event_to_match_data, parse_event_odds, parse_match_stats, parse_stats_result
+
+# Ingestão sob demanda (fora do scraping completo de temporada).
+
+
+def sync_team_history(scraper, db, team_id, n=10, tournament_id=None, tournament_keyword=None, venue=None):
+    # Garante os últimos N jogos do time no banco. Jogos que já têm estatísticas
+    # em match_stats (ou no dead-letter) não são buscados de novo. Retorna quantos jogos
+    # novos foram salvos.
+    known_ids = db.get_stats_match_ids() | db.get_dead_letter_ids()
+    history = scraper.collect_team_history(
+        team_id, n=n,
+        tournament_id=tournament_id,
+        tournament_keyword=tournament_keyword,
+        venue=venue,
+        known_ids=known_ids,
+    )
+
+    return store_history(db, history, known_ids)
+
+
+def store_history(db, history, known_ids):
+    # history: saída de collect_team_history. Jogos novos com estatísticas são
+    # gravados; os que falharam (stats None fora de known_ids) vão para a fila de
+    # re-busca, nunca como zeros (falhas permanentes direto para o dead-letter).
+    # Retorna quantos jogos novos foram salvos.
+    saved = 0
+    missing = []
+    unavailable = []
+    for event, stats, permanent in history:
+        if event['id'] in known_ids:
+            continue
+        db.save_match(event_to_match_data(event, status='finished'))
+        if stats is None:
+            (unavailable if permanent else missing).append(event['id'])
+            continue
+        db.save_stats(event['id'], stats)
+        saved += 1
+    if missing:
+        db.queue_refetch(missing, reason="stats")
+    if unavailable:
+        db.queue_refetch(unavailable, reason="unavailable", permanent=True)
+    return saved
+
+
+def refetch_missing_stats(scraper, db, limit=200, max_attempts=None):
+    # Tenta de novo os jogos da fila de re-busca (em lote). Retorna (salvos, ainda sem dado).
+    # Falhas permanentes e jogos que esgotam REFETCH_MAX_ATTEMPTS saem da fila (dead-letter)
+    match_ids = db.get_refetch_queue(limit=limit, max_attempts=max_attempts)
+    if not match_ids:
+        return 0, 0
+    saved = 0
+    missing = []
+    unavailable = []
+    for match_id, result in zip(match_ids, scraper.fetch_match_stats_many(match_ids)):
+        stats, permanent = parse_stats_result(result)
+        if stats is None:
+            (unavailable if permanent else missing).append(match_id)
+        else:
+            db.save_stats(match_id, stats)
+            saved += 1
+    if missing:
+        db.queue_refetch(missing, reason="stats")
+    if unavailable:
+        db.queue_refetch(unavailable, reason="unavailable", permanent=True)
+    return saved, len(missing) + len(unavailable)
+
+
+def ensure_team_history(scraper, db, team_id, n=10, **filters):
+    # Cold start: só vai à API se o time tem menos de N jogos no banco
+    # (contando com os mesmos filtros de mando/torneio da coleta)
+    count = db.count_team_matches(team_id, venue=filters.get('venue'),
+                                  tournament_keyword=filters.get('tournament_keyword'))
+    if count >= n:
+        return 0
+    return sync_team_history(scraper, db, team_id, n=n, **filters)
+
+
+# --- Odds de mercado (tabela odds, usada pelo scanner de valor em src/analysis/value.py) ---
+
+EVENT_API = "https://www.sofascore.com/api/v1/event"
+
+
+def fetch_odds(scraper, db, match_ids):
+    # Jogo + odds de escanteios do SofaScore num lote concorrente. Retorna quantas odds foram gravadas
+    urls = []
+    for match_id in match_ids:
+        urls += [f"{EVENT_API}/{match_id}", f"{EVENT_API}/{match_id}/odds/1/all"]
+    data = scraper.fetch_many(urls)
+    rows = []
+    for i, match_id in enumerate(match_ids):
+        event, odds = data[2 * i], data[2 * i + 1]
+        if event and 'event' in event:
+            db.save_match(event_to_match_data(event['event']))
+        rows += parse_event_odds(odds, match_id)
+    db.save_odds(rows)
+    return len(rows)
+
+
+def read_odds_csv(path, markets):
+    # CSV com match_id, market, odd e line+kind (OVER/UNDER) ou selection ("Over 9.5");
+    # bookmaker opcional. Retorna (linhas no formato de save_odds, números das linhas
+    # ignoradas no arquivo). Coluna obrigatória ausente -> ValueError
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    kind_line = {'kind', 'line'} <= set(df.columns)
+    missing = [c for c in ('match_id', 'market', 'odd') if c not in df.columns]
+    if not kind_line and 'selection' not in df.columns:
+        missing.append("line+kind ou selection")
+    if missing:
+        raise ValueError(f"{path}: colunas ausentes: {', '.join(missing)}")
+    if not kind_line:
+        # "Over" sem linha (ou célula vazia) vira linha NaN e a linha do CSV é ignorada
+        parts = df['selection'].astype(str).str.strip().str.partition(' ')
+        df['kind'], df['line'] = parts[0], parts[2]
+    df['kind'] = df['kind'].astype(str).str.strip().str.upper()
+    df['market'] = df['market'].astype(str).str.strip()
+    df['line'] = pd.to_numeric(df['line'], errors='coerce')
+    df['odd'] = pd.to_numeric(df['odd'], errors='coerce')
+    df['match_id'] = pd.to_numeric(df['match_id'], errors='coerce')
+    if 'bookmaker' not in df.columns:
+        df['bookmaker'] = 'csv'
+
+    valid = (df['market'].isin({m.name for m in markets}) & df['kind'].isin(('OVER', 'UNDER'))
+             & df['line'].notna() & (df['odd'] > 1) & df['match_id'].notna())
+    skipped = (df.index[~valid] + 2).tolist()  # linha 1 = cabeçalho
+    df = df[valid].assign(match_id=lambda d: d['match_id'].astype(int), source='csv')
+    rows = df[['match_id', 'market', 'line', 'kind', 'odd', 'bookmaker', 'source']].to_dict('records')
+    return rows, skipped
+
+
+# --- Reprocessamento offline do arquivo de respostas cruas (src/database/archive.py) ---
+
+REPROCESS_ENDPOINTS = (ROUND_ENDPOINT, TEAM_EVENTS_ENDPOINT, EVENT_ENDPOINT, STATS_ENDPOINT)
+
+
+def _derive_payload(endpoint, key, codec, blob):
+    # Uma resposta arquivada -> (jogos, estatísticas)
+    data = json.loads(decompress(blob, codec))
+    if endpoint == STATS_ENDPOINT:
+        parsed = parse_match_stats(data)
+        return [], [] if parsed is None else [(int(key), parsed)]
+    if endpoint == EVENT_ENDPOINT:
+        return [event_to_match_data(data['event'])] if data.get('event') else [], []
+    # Rodada (temporada vem da chave) ou páginas de jogos de um time
+    season_id = int(key.split('/')[1]) if endpoint == ROUND_ENDPOINT else None
+    return [event_to_match_data(ev, season_id=season_id, status='finished')
+            for ev in data.get('events', []) if ev.get('status', {}).get('type') == 'finished'], []
+
+
+def _derive_chunk(rows):
+    # Worker: descomprime e converte um bloco do arquivo -> (jogos, estatísticas, ignoradas).
+    # Resposta ilegível (gzip/JSON corrompido, zstandard ausente, evento malformado) é
+    # ignorada sozinha: ignoradas = {motivo: respostas}
+    matches, stats, skipped = [], [], {}
+    for endpoint, key, codec, blob in rows:
+        try:
+            m, s = _derive_payload(endpoint, key, codec, blob)
+        except Exception as e:
+            reason = f"{type(e).__name__}: {e}"
+            skipped[reason] = skipped.get(reason, 0) + 1
+            continue
+        matches += m
+        stats += s
+    return matches, stats, skipped
+
+
+def reprocess_archive(archive, db, workers=None, chunk_size=500):
+    # Re-deriva matches/match_stats de todas as respostas arquivadas, sem rede.
+    # Os blocos são decodificados em paralelo (processos) e gravados na ordem em que
+    # foram buscados: a resposta mais recente de cada jogo prevalece.
+    # Retorna {'payloads', 'matches', 'stats', 'skipped', 'skip_reasons'}
+    workers = workers or os.cpu_count() or 1
+    counts = {"payloads": 0, "matches": 0, "stats": 0, "skipped": 0, "skip_reasons": {}}
+
+    def store(rows, result):
+        matches, stats, skipped = result
+        db.save_matches(matches)
+        db.save_stats_many(stats)
+        counts["payloads"] += len(rows)
+        counts["matches"] += len(matches)
+        counts["stats"] += len(stats)
+        for reason, n in skipped.items():
+            counts["skipped"] += n
+            counts["skip_reasons"][reason] = counts["skip_reasons"].get(reason, 0) + n
+
+    chunks = archive.iter_chunks(endpoints=REPROCESS_ENDPOINTS, chunk_size=chunk_size)
+    if workers <= 1:
+        for rows in chunks:
+            store(rows, _derive_chunk(rows))
+    else:
+        # Janela limitada de blocos em voo: o arquivo inteiro nunca fica em memória
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for rows in chunks:
+                pending.append((rows, pool.submit(_derive_chunk, rows)))
+                if len(pending) >= workers * 2:
+                    rows, future = pending.popleft()
+                    store(rows, future.result())
+            while pending:
+                rows, future = pending.popleft()
+                store(rows, future.result())
+    db.flush()
+    return counts
@@ -0,0 +1,246 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ingestion import refetch_missing_stats
+from src.instrumentation import metrics
+from src.scrapers.parsing import event_to_match_data, parse_stats_result
+
+# Scraping da temporada em estágios concorrentes ligados por filas limitadas:
+#   rodadas -> estatísticas -> parse -> gravação em lote (thread escritora do banco)
+# - O Playwright síncrono só funciona na thread que o abriu: toda chamada ao scraper
+#   roda numa thread dedicada ("browser") e o event loop coordena os estágios. Cada
+#   ida ao browser é um lote concorrente (Promise.all) no ritmo do AIMDRateLimiter.
+# - Filas limitadas dão backpressure: se a gravação atrasa, a coleta espera.
+# - Ctrl-C: os estágios de rede param, o que já chegou é gravado (lotes parciais
+#   inclusive) e os jogos que ficaram sem estatísticas vão para a fila de re-busca.
+# - Todos os estágios são vigiados juntos: se um cai, os produtores são cancelados,
+#   as filas destravadas e o erro sobe (sem ficar preso num put de fila cheia).
+
+ROUNDS = range(1, 39)
+FLUSH_INTERVAL = 0.5  # s sem itens novos antes de gravar um lote incompleto
+
+_DONE = object()
+
+
+class SeasonStream:
+    def __init__(self, scraper, db, renderer, queue_size=256, fetch_batch=32, write_batch=50, max_pending_writes=5000):
+        # fetch_batch: URLs por ida à thread do browser (lá dentro o scraper ainda divide
+        # no ritmo do AIMD, disparando o lote seguinte enquanto o atual está em voo);
+        # max_pending_writes: itens na fila da thread escritora antes de a gravação esperar
+        self.scraper = scraper
+        self.db = db
+        self.renderer = renderer
+        self.queue_size = queue_size
+        self.fetch_batch = fetch_batch
+        self.write_batch = write_batch
+        self.max_pending_writes = max_pending_writes
+        self.browser = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+        self.counts = {"rounds_missing": 0, "matches": 0, "known": 0, "saved": 0, "missing": 0, "unavailable": 0}
+        self.interrupted = False
+        self.season = None  # (t_id, s_id) depois de encontrados
+        self._inflight = []
+
+    async def call(self, fn, *args):
+        # Roda fn na thread do browser
+        return await asyncio.get_running_loop().run_in_executor(self.browser, fn, *args)
+
+    async def sync(self, query="Brasileirão", year="2025", rounds=ROUNDS, incremental=False):
+        # incremental: pula as rodadas em que todos os jogos já têm estatísticas
+        renderer = self.renderer
+        try:
+            await self.call(self.scraper.start)
+
+            t_id = await self.call(self.scraper.get_tournament_id, query)
+            if not t_id:
+                renderer.error("Torneio não encontrado.")
+                return
+            s_id = await self.call(self.scraper.get_season_id, t_id, year)
+            if not s_id:
+                renderer.error("Temporada não encontrada.")
+                return
+            renderer.message(f"ID Torneio: {t_id}, ID Temporada: {s_id}")
+            self.season = (t_id, s_id)
+            if incremental:
+                complete = self.db.get_complete_rounds(s_id)
+                rounds = [r for r in rounds if r not in complete]
+                renderer.message(f"Sync incremental: {len(complete)} rodadas completas no banco, {len(rounds)} a buscar.")
+
+            await self.stream(t_id, s_id, rounds)
+            c = self.counts
+            renderer.message(f"Encontrados {c['matches']} jogos encerrados: {c['saved']} com estatísticas novas, "
+                             f"{c['known']} já no banco, {c['missing']} para re-busca, "
+                             f"{c['unavailable']} sem estatísticas na API.")
+            if self.interrupted:
+                renderer.error("Interrompido: lotes parciais gravados, jogos pendentes na fila de re-busca.")
+                return
+
+            # Fila de re-busca (falhas desta e de execuções anteriores)
+            saved, still_missing = await self.call(refetch_missing_stats, self.scraper, self.db, None)
+            if saved or still_missing:
+                renderer.message(f"Re-busca de estatísticas: {saved} recuperados, {still_missing} ainda pendentes.")
+        except asyncio.CancelledError:
+            self.interrupted = True
+            renderer.error("Interrompido.")
+        finally:
+            # Espera a requisição em andamento na thread do browser antes de fechá-lo
+            await asyncio.shield(self.call(self.scraper.stop))
+            self.browser.shutdown(wait=True)
+            await asyncio.to_thread(self.db.flush)
+
+    async def stream(self, tournament_id, season_id, rounds=ROUNDS):
+        # Jogos que já têm estatísticas (ou estão no dead-letter) não são buscados de novo
+        # (só o placar é regravado)
+        known_ids = self.db.get_stats_match_ids() | self.db.get_dead_letter_ids()
+        events = asyncio.Queue(self.queue_size)
+        raw = asyncio.Queue(self.queue_size)
+        rows = asyncio.Queue(self.queue_size)
+
+        fetchers = [
+            asyncio.create_task(self._fetch_rounds(tournament_id, season_id, list(rounds), known_ids, events, rows)),
+            asyncio.create_task(self._fetch_stats(events, raw)),
+        ]
+        writers = [
+            asyncio.create_task(self._parse(season_id, raw, rows)),
+            asyncio.create_task(self._write(rows)),
+        ]
+        tasks = fetchers + writers
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            self.interrupted = True
+        error = _first_error(tasks)
+        if self.interrupted or error:
+            for task in fetchers:
+                task.cancel()
+            await asyncio.gather(*fetchers, return_exceptions=True)
+            parse, write = writers
+            if write.done():
+                # Sem gravação não há o que salvar: o parse pode estar preso em rows.put
+                parse.cancel()
+            elif parse.done():
+                # Parse caiu: a gravação fecha o lote que já tem
+                await rows.put(_DONE)
+            else:
+                # Jogos descobertos mas não buscados: placar gravado, estatísticas para re-busca
+                pending = self._inflight + [e for e in _drain(events) if e is not _DONE]
+                for ev in pending:
+                    await rows.put((event_to_match_data(ev, season_id=season_id, status='finished'), None, "stats"))
+                # O que já chegou é parseado e gravado mesmo com Ctrl-C ou erro
+                await raw.put(_DONE)
+        await asyncio.shield(asyncio.gather(*writers, return_exceptions=True))
+        for q in (events, raw, rows):
+            _drain(q)
+        error = error or _first_error(writers)
+        if error:
+            raise error
+
+    async def _fetch_rounds(self, tournament_id, season_id, rounds, known_ids, events, rows):
+        i = 0
+        while i < len(rounds):
+            # Primeiras rodadas em lote pequeno: as estatísticas começam a sair logo
+            chunk = rounds[i:i + (self.scraper.batch_size if i == 0 else self.fetch_batch)]
+            i += len(chunk)
+            for round_events in await self.call(self.scraper.get_round_events_many, tournament_id, season_id, chunk):
+                if round_events is None:
+                    self.counts["rounds_missing"] += 1
+                    continue
+                for ev in round_events:
+                    if ev.get('status', {}).get('type') != 'finished':
+                        continue
+                    self.counts["matches"] += 1
+                    if ev['id'] in known_ids:
+                        self.counts["known"] += 1
+                        await rows.put((event_to_match_data(ev, season_id=season_id, status='finished'), None, None))
+                    else:
+                        await events.put(ev)
+        await events.put(_DONE)
+
+    async def _fetch_stats(self, events, raw):
+        while True:
+            # Lote com o que já está na fila (sem esperar encher)
+            batch = [await events.get()]
+            while len(batch) < self.fetch_batch and not events.empty():
+                batch.append(events.get_nowait())
+            done = batch[-1] is _DONE
+            if done:
+                batch.pop()
+            if batch:
+                self._inflight = batch
+                results = await self.call(self.scraper.fetch_match_stats_many, [ev['id'] for ev in batch])
+                for ev, result in zip(list(batch), results):
+                    await raw.put((ev, result))
+                    batch.remove(ev)
+                self._inflight = []
+            if done:
+                await raw.put(_DONE)
+                return
+
+    async def _parse(self, season_id, raw, rows):
+        while True:
+            item = await raw.get()
+            if item is _DONE:
+                break
+            ev, result = item
+            # Sem dado -> fila de re-busca (ou dead-letter, se permanente), nunca zeros
+            stats, permanent = parse_stats_result(result)
+            miss = None if stats is not None else ("unavailable" if permanent else "stats")
+            await rows.put((event_to_match_data(ev, season_id=season_id, status='finished'), stats, miss))
+        await rows.put(_DONE)
+
+    async def _write(self, rows):
+        batch = []
+        while True:
+            try:
+                if batch:
+                    item = await asyncio.wait_for(rows.get(), timeout=FLUSH_INTERVAL)
+                else:
+                    item = await rows.get()
+            except asyncio.TimeoutError:
+                item = None
+            if item is not None and item is not _DONE:
+                batch.append(item)
+                if len(batch) < self.write_batch:
+                    continue
+            if batch:
+                await self._write_batch(batch)
+                batch = []
+            if item is _DONE:
+                return
+
+    async def _write_batch(self, batch):
+        # Entrega o lote à thread escritora (uma transação por lote lá)
+        db = self.db
+        db.save_matches([match_data for match_data, _, _ in batch])
+        db.save_stats_many([(match_data['id'], stats) for match_data, stats, _ in batch if stats is not None])
+        missing = [match_data['id'] for match_data, _, miss in batch if miss == "stats"]
+        unavailable = [match_data['id'] for match_data, _, miss in batch if miss == "unavailable"]
+        if missing:
+            db.queue_refetch(missing, reason="stats")
+        if unavailable:
+            db.queue_refetch(unavailable, reason="unavailable", permanent=True)
+
+        self.counts["saved"] += sum(stats is not None for _, stats, _ in batch)
+        self.counts["missing"] += len(missing)
+        self.counts["unavailable"] += len(unavailable)
+        metrics.incr("stream.matches_written", len(batch))
+        written = sum(self.counts[k] for k in ("saved", "missing", "unavailable", "known"))
+        self.renderer.progress(written, self.counts["matches"], f"Gravados {len(batch)} jogos...")
+
+        # Backpressure da thread escritora: a fila do SQLite não cresce sem limite
+        if db.writer.pending > self.max_pending_writes:
+            with metrics.timer("stream.write_wait"):
+                await asyncio.to_thread(db.flush)
+
+
+def _first_error(tasks):
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            return task.exception()
+    return None
+
+
+def _drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Instrumentação leve de hot paths (scraping, banco, features, modelo, simulação).
+# - timers/contadores em memória (perf_counter + dict, sem I/O no caminho quente)
+# - histogramas de latência por requisição do scraper
+# - relatório JSON por execução em data/reports/
+# - captura opcional de profile: PROJETO_BET_PROFILE=cprofile | pyinstrument
+
+REPORTS_DIR = "data/reports"
+PROFILE_ENV = "PROJETO_BET_PROFILE"
+
+# Limites superiores (ms) dos buckets dos histogramas de latência
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Aproximação pelo limite superior do bucket
+        if not self.count:
+            return None
+        target = q * self.count
+        acc = 0
+        for upper, c in zip(self.buckets, self.counts):
+            acc += c
+            if acc >= target:
+                return self.max if upper == float("inf") else upper
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "buckets": {("inf" if b == float("inf") else str(b)): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}  # nome -> [chamadas, total, min, max] (segundos)
+            self.counters = {}
+            self.histograms = {}
+
+    def record(self, name, elapsed):
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = [1, elapsed, elapsed, elapsed]
+            else:
+                t[0] += 1
+                t[1] += elapsed
+                t[2] = min(t[2], elapsed)
+                t[3] = max(t[3], elapsed)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram()
+            h.observe(value)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            timers = {
+                name: {"calls": c, "total_s": tot, "mean_s": tot / c, "min_s": mn, "max_s": mx}
+                for name, (c, tot, mn, mx) in self.timers.items()
+            }
+            counters = dict(self.counters)
+            histograms = {name: h.to_dict() for name, h in self.histograms.items()}
+
+        # Vazão de ingestão (linhas/s sobre o tempo gasto escrevendo no banco)
+        rates = {}
+        db_write = timers.get("db.write")
+        if db_write and db_write["total_s"] > 0:
+            rates["db.rows_per_sec"] = counters.get("db.rows_written", 0) / db_write["total_s"]
+        fetch = timers.get("scraper.fetch")
+        if fetch and fetch["total_s"] > 0:
+            rates["scraper.requests_per_sec"] = fetch["calls"] / fetch["total_s"]
+
+        return {"timers": timers, "counters": counters, "histograms": histograms, "rates": rates}
+
+
+metrics = Metrics()
+timer = metrics.timer
+timed = metrics.timed
+
+
+class _Profiler:
+    def __init__(self, mode):
+        self.mode = mode
+        self.profiler = None
+
+    def start(self):
+        if self.mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("pyinstrument não instalado, usando cProfile.")
+                self.mode = "cprofile"
+            else:
+                self.profiler = Profiler()
+                self.profiler.start()
+                return
+        if self.mode == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self, base_path):
+        if self.profiler is None:
+            return None
+        if self.mode == "pyinstrument":
+            self.profiler.stop()
+            path = base_path + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.profiler.output_html())
+            return path
+        self.profiler.disable()
+        path = base_path + ".prof"
+        self.profiler.dump_stats(path)
+        return path
+
+
+def new_run_id(now=None):
+    # Único mesmo para execuções no mesmo segundo (microssegundos + pid)
+    now = now or datetime.now()
+    return f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}"
+
+
+_report_depth = 0
+
+
+@contextmanager
+def run_report(name, profile=None, reports_dir=REPORTS_DIR):
+    # Zera as métricas, executa o bloco e grava data/reports/<name>_<run id>.json.
+    # Um relatório aninhado (ex: análise dentro da rotina diária) não zera as métricas
+    # do externo nem abre um segundo profiler.
+    global _report_depth
+    outermost = _report_depth == 0
+    profile = (profile or os.environ.get(PROFILE_ENV)) if outermost else None
+    if outermost:
+        metrics.reset()
+    _report_depth += 1
+    started_at = datetime.now()
+    profiler = _Profiler(profile) if profile else None
+    if profiler:
+        profiler.start()
+
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield metrics
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _report_depth -= 1
+        duration = time.perf_counter() - start
+        os.makedirs(reports_dir, exist_ok=True)
+        base_path = os.path.join(reports_dir, f"{name}_{new_run_id(started_at)}")
+
+        report = {
+            "run": name,
+            "status": status,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "duration_s": duration,
+            "profile": profiler.stop(base_path) if profiler else None,
+        }
+        report.update(metrics.snapshot())
+
+        with open(base_path + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -1,331 +1,549 @@
+import argparse
 import sys
 import os
-import pandas as pd
 import re
 
 #
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+# Só módulos leves no topo. pandas, sklearn, scipy e Playwright são importados
+# dentro de cada comando, então `show` e `settle` abrem apenas o SQLite.
 from src.database.db_manager import DBManager
-from src.scrapers.sofascore import SofaScoreScraper
-from src.ml.feature_engineering import prepare_training_data
-from src.ml.model import CornerPredictor
-from src.analysis.statistical import StatisticalAnalyzer, Colors
+from src.database.repository import BACKEND_ENV, BACKENDS, get_repository
+from src.analysis.renderers import RENDERERS, TerminalRenderer, get_renderer
+from src.instrumentation import run_report
+from src.orchestrator import STEPS as DAILY_STEPS
 
-def update_database():
+EVENT_API = "https://www.sofascore.com/api/v1/event"
+
+def parse_match_id(target):
+    # Aceita o ID puro ou a URL do SofaScore (...#id:12345678)
+    target = str(target).strip()
+    if target.isdigit():
+        return int(target)
+    match_id_search = re.search(r'id:(\d+)', target)
+    return int(match_id_search.group(1)) if match_id_search else None
+
+def update_database(renderer=None):
+    with run_report("update_database"):
+        _update_database(renderer or TerminalRenderer())
+
+def _update_database(renderer):
+    import asyncio
+    from src.scrapers.sofascore import SofaScoreScraper
+    from src.ingestion_stream import SeasonStream
+    from src.database.archive import RawArchive
+
+    verbose = isinstance(renderer, TerminalRenderer)
     db = DBManager()
     
     # Check for feedback loop updates first
-    print("Verificando resultados de previsões anteriores...")
-    db.check_predictions()
+    renderer.message("Verificando resultados de previsões anteriores...")
+    db.check_predictions(verbose=verbose)
     
-    scraper = SofaScoreScraper(headless=True) # Set headless=False to debug
+    # Job longo: com o upstream instável espera o circuito reabrir em vez de desistir
+    # Toda resposta fica no arquivo cru (main.py reprocess re-deriva o banco sem scraping)
+    scraper = SofaScoreScraper(headless=True, verbose=verbose, circuit_wait=True,
+                               archive=RawArchive()) # Set headless=False to debug
     
+    # Rodadas, estatísticas, parse e gravação em paralelo (src/ingestion_stream.py);
+    # Ctrl-C grava os lotes parciais antes de sair
     try:
-        scraper.start()
-        
-        # 1. Get Tournament/Season IDs
-        t_id = scraper.get_tournament_id("Brasileirão")
-        if not t_id:
-            print("Torneio não encontrado.")
-            return
-            
-        s_id = scraper.get_season_id(t_id, "2025")
-        if not s_id:
-            print("Temporada não encontrada.")
-            return
-            
-        print(f"ID Torneio: {t_id}, ID Temporada: {s_id}")
-        
-        # 2. Get Matches
-        matches = scraper.get_matches(t_id, s_id)
-        print(f"Encontrados {len(matches)} jogos.")
-        
-        # 3. Process Matches & Stats
-        for i, m in enumerate(matches):
-            if m['status']['type'] == 'finished':
-                print(f"[{i+1}/{len(matches)}] Processando {m['homeTeam']['name']} vs {m['awayTeam']['name']}...")
-                
-                # Save Match Info
-                match_data = {
-                    'id': m['id'],
-                    'tournament': m['tournament']['name'],
-                    'season_id': s_id,
-                    'round': m['roundInfo']['round'],
-                    'status': 'finished',
-                    'timestamp': m['startTimestamp'],
-                    'home_id': m['homeTeam']['id'],
-                    'home_name': m['homeTeam']['name'],
-                    'away_id': m['awayTeam']['id'],
-                    'away_name': m['awayTeam']['name'],
-                    'home_score': m['homeScore']['display'],
-                    'away_score': m['awayScore']['display']
-                }
-                db.save_match(match_data)
-                
-                # Get & Save Stats
-                stats = scraper.get_match_stats(m['id'])
-                db.save_stats(m['id'], stats)
-                
+        asyncio.run(SeasonStream(scraper, db, renderer).sync("Brasileirão", "2025"))
     except Exception as e:
-        print(f"Erro: {e}")
+        renderer.error(f"Erro: {e}")
     finally:
-        scraper.stop()
         db.close()
 
-def train_model():
-    db = DBManager()
-    df = db.get_historical_data()
+def train_model(feature_set="full", model="multi"):
+    with run_report("train_model"):
+        _train_model(feature_set, model)
+
+def _train_model(feature_set, model):
+    from src.ml.feature_engineering import load_training_data, prepare_full_training_data
+    from src.ml.model import CornerPredictor, MultiTargetPredictor, target_matrix
+
+    db = get_repository()
+    if feature_set == "legacy":
+        # 6 médias móveis calculadas no banco (funções de janela)
+        X, y, df_processed = load_training_data(db)
+    else:
+        X, y, df_processed = prepare_full_training_data(db.get_historical_data())
     db.close()
     
-    if df.empty:
+    if X.empty:
         print("Banco de dados vazio. Execute a atualização primeiro.")
         return
         
-    print(f"Carregados {len(df)} registros para treino.")
-    
-    X, y, _ = prepare_training_data(df)
+    print(f"Carregados {len(X)} registros para treino ({X.shape[1]} features).")
     
-    predictor = CornerPredictor()
-    predictor.train(X, y)
+    # Uma construção de features serve aos dois modelos
+    if model in ("single", "all"):
+        CornerPredictor().train(X, y)
+    if model in ("multi", "all"):
+        MultiTargetPredictor().train(X, target_matrix(df_processed))
 
-def analyze_match_url():
+def analyze_match_url(renderer=None):
+    renderer = renderer or TerminalRenderer()
     url = input("Cole a URL do jogo do SofaScore: ")
-    match_id_search = re.search(r'id:(\d+)', url)
+    match_id = parse_match_id(url)
     
-    if not match_id_search:
-        print("ID do jogo não encontrado na URL.")
+    if not match_id:
+        renderer.error("ID do jogo não encontrado na URL.")
         return
 
-    match_id = match_id_search.group(1)
-    print(f"Analisando jogo ID: {match_id}...")
-    
-    scraper = SofaScoreScraper(headless=True)
+    analyze_matches([match_id], renderer)
+
+def analyze_matches(match_ids, renderer=None, seed=0, sampling="stratified"):
+    renderer = renderer or TerminalRenderer()
+    with run_report("analysis"):
+        return _analyze_matches(match_ids, renderer, seed, sampling)
+
+def _analyze_matches(match_ids, renderer, seed, sampling):
+    from src.scrapers.sofascore import SofaScoreScraper
+    from src.database.archive import RawArchive
+    from src.ml.model import load_predictor
+    from src.analysis.statistical import StatisticalAnalyzer
+
+    # Um browser, uma conexão e um modelo para todos os jogos pedidos
+    scraper = SofaScoreScraper(headless=True, verbose=isinstance(renderer, TerminalRenderer), archive=RawArchive())
+    db = DBManager()
+    # Simulação semeada por (seed, jogo, mercado): re-análises dão as mesmas probabilidades
+    analyzer = StatisticalAnalyzer(seed=seed, sampling=sampling)
+    predictor = load_predictor()
+
+    analyzed = 0
     try:
         scraper.start()
-        
-        # Get Match Details
-        api_url = f"https://www.sofascore.com/api/v1/event/{match_id}"
-        ev_data = scraper._fetch_api(api_url)
-        
-        if not ev_data or 'event' not in ev_data:
-            print("Erro ao buscar dados do jogo.")
-            return
-            
-        ev = ev_data['event']
-        home_id = ev['homeTeam']['id']
-        away_id = ev['awayTeam']['id']
-        match_name = f"{ev['homeTeam']['name']} vs {ev['awayTeam']['name']}"
-        print(f"Jogo: {match_name}")
-        
-        # Save Match Info to DB (for retrieval in Option 4)
-        db = DBManager()
-        match_data = {
-            'id': match_id,
-            'tournament': ev.get('tournament', {}).get('name', 'Unknown'),
-            'season_id': ev.get('season', {}).get('id', 0),
-            'round': ev.get('roundInfo', {}).get('round', 0),
-            'status': 'finished', # Assuming finished for analysis context or update later
-            'timestamp': ev.get('startTimestamp', 0),
-            'home_id': home_id,
-            'home_name': ev['homeTeam']['name'],
-            'away_id': away_id,
-            'away_name': ev['awayTeam']['name'],
-            'home_score': ev.get('homeScore', {}).get('display', 0),
-            'away_score': ev.get('awayScore', {}).get('display', 0)
-        }
-        db.save_match(match_data)
+        fixtures = []
+        for match_id in match_ids:
+            renderer.message(f"Analisando jogo ID: {match_id}...")
+            try:
+                match_data = _collect_match(match_id, scraper, db, renderer)
+            except Exception as e:
+                renderer.error(f"Erro na análise: {e}")
+                continue
+            if match_data is not None:
+                fixtures.append(match_data)
+        if fixtures:
+            analyzed = _analyze_fixtures(fixtures, db, analyzer, predictor, renderer)
+    finally:
+        scraper.stop()
         db.close()
+    return analyzed
+
+def _collect_match(match_id, scraper, db, renderer):
+    from src.scrapers.parsing import event_to_match_data
+    from src.ingestion import ensure_team_history
+
+    # Get Match Details
+    ev_data = scraper._fetch_api(f"{EVENT_API}/{match_id}")
+    
+    if not ev_data or 'event' not in ev_data:
+        renderer.error("Erro ao buscar dados do jogo.")
+        return None
         
-        # Get Last Games for Home and Away
-        print("Coletando histórico recente...")
-        
-        db = DBManager()
-        df = db.get_historical_data()
+    # Save Match Info to DB (for retrieval with `show`)
+    ev = ev_data['event']
+    # Status real do evento: um jogo futuro não pode virar 'finished' 0x0
+    match_data = event_to_match_data(ev)
+    db.save_match(match_data)
+    renderer.message(f"Jogo: {match_data['home_name']} vs {match_data['away_name']}")
+    
+    # Get Last Games for Home and Away (cold start: busca só o que falta no banco)
+    # Sem filtro de torneio: a contagem e a análise usam os últimos jogos em qualquer competição
+    renderer.message("Coletando histórico recente...")
+    for team_id in (match_data['home_id'], match_data['away_id']):
+        ensure_team_history(scraper, db, team_id, n=10)
+    return match_data
+
+def _analyze_fixtures(fixtures, db, analyzer, predictor, renderer):
+    from src.analysis.pipeline import prepare_fixture, save_analysis, score_fixtures
+    from src.ml.feature_engineering import FeatureBuilder
+
+    # Um histórico e um FeatureBuilder para todos os jogos pedidos
+    df = db.get_historical_data()
+    if df.empty:
+        renderer.error("Banco de dados vazio. Treine o modelo primeiro para melhores resultados.")
+        return 0
+    features = FeatureBuilder()
+    features.update_many(df)
+
+    # Perfis e ML por jogo; a simulação de todos de uma vez (em paralelo com muitos alvos)
+    jobs = []
+    for match_data in fixtures:
+        try:
+            # Run Analysis (ML Prediction is used for suggestion alignment)
+            job = prepare_fixture(match_data, df, analyzer, predictor=predictor, features=features)
+        except Exception as e:
+            renderer.error(f"Erro na análise: {e}")
+            continue
+        if job is None:
+            renderer.error(f"Dados insuficientes para análise estatística (jogo {match_data['id']}).")
+            continue
+        jobs.append(job)
+
+    analyzed = 0
+    for result in score_fixtures(jobs, analyzer):
+        renderer.analysis(result)
+
+        # Save Predictions (Feedback Loop): ML, Top 7 and AI Suggestions
+        save_analysis(db, result)
+        renderer.message("✅ Previsões salvas no banco de dados.")
+        analyzed += 1
+    return analyzed
+
+def retrieve_analysis(match_id=None, renderer=None):
+    renderer = renderer or TerminalRenderer()
+    if match_id is None:
+        match_id = input("Digite o ID do jogo: ")
+    from src.analysis.pipeline import load_analysis
+
+    db = DBManager()
+    try:
+        renderer.analysis(load_analysis(db, match_id))
+    finally:
         db.close()
-        
-        if df.empty:
-            print("Banco de dados vazio. Treine o modelo primeiro para melhores resultados.")
-            return
 
-        # Filter for Home Team
-        home_games = df[(df['home_team_id'] == home_id) | (df['away_team_id'] == home_id)].tail(5)
-        away_games = df[(df['home_team_id'] == away_id) | (df['away_team_id'] == away_id)].tail(5)
-        
-        if len(home_games) < 3 or len(away_games) < 3:
-            print("Dados insuficientes no histórico para análise precisa.")
-        
-        # Calculate averages for ML
-        def get_avg_corners(games, team_id):
-            corners = []
-            for _, row in games.iterrows():
-                if row['home_team_id'] == team_id:
-                    corners.append(row['corners_home_ft'])
-                else:
-                    corners.append(row['corners_away_ft'])
-            return sum(corners) / len(corners) if corners else 0
-
-        h_avg_corners = get_avg_corners(home_games, home_id)
-        a_avg_corners = get_avg_corners(away_games, away_id)
-        
-        print(f"Média Escanteios (Últimos 5): Casa {h_avg_corners:.1f} | Fora {a_avg_corners:.1f}")
-        
-        # Clear old predictions for this match to avoid duplicates
-        db = DBManager()
-        db.delete_predictions(match_id)
+def track_live_matches(match_ids=None, renderer=None):
+    renderer = renderer or TerminalRenderer()
+    if match_ids is None:
+        raw = input("IDs dos jogos ao vivo (separados por vírgula): ")
+        match_ids = [x.strip() for x in raw.split(",") if x.strip()]
+
+    from src.scrapers.sofascore import SofaScoreScraper
+    from src.analysis.pipeline import build_team_stats, team_games
+    from src.analysis.live import LiveTracker
+
+    db = DBManager()
+    df = db.get_historical_data()
+    db.close()
+
+    # Sem retentativas com backoff: o LiveTracker tem o próprio backoff por jogo
+    scraper = SofaScoreScraper(headless=True, verbose=False, max_retries=0)
+    try:
+        scraper.start()
+        tracker = LiveTracker(scraper)
+
+        events = scraper.fetch_many([f"{EVENT_API}/{mid}" for mid in match_ids])
+        for mid, ev_data in zip(match_ids, events):
+            if not ev_data or 'event' not in ev_data:
+                renderer.error(f"Jogo {mid} não encontrado.")
+                continue
+            ev = ev_data['event']
+            home_id, away_id = ev['homeTeam']['id'], ev['awayTeam']['id']
+            df_h = build_team_stats(team_games(df, home_id, n=10), home_id)
+            df_a = build_team_stats(team_games(df, away_id, n=10), away_id)
+            if df_h.empty or df_a.empty:
+                renderer.error(f"Sem histórico para {ev['homeTeam']['name']} vs {ev['awayTeam']['name']}.")
+                continue
+            tracker.track(mid, df_h, df_a)
+            renderer.message(f"Acompanhando {ev['homeTeam']['name']} vs {ev['awayTeam']['name']} (ID {mid})")
+
+        tracker.run(renderer.live)
+    except KeyboardInterrupt:
+        renderer.message("Acompanhamento encerrado.")
+    finally:
+        scraper.stop()
+
+def settle_predictions(renderer=None):
+    renderer = renderer or TerminalRenderer()
+    db = DBManager()
+    try:
+        settled = db.check_predictions(verbose=isinstance(renderer, TerminalRenderer))
+    finally:
         db.close()
-        
-        # ML Prediction
-        predictor = CornerPredictor()
-        ml_prediction = 0
-        if predictor.load_model():
-            X_new = [[h_avg_corners, 0, 0, a_avg_corners, 0, 0]] 
-            pred = predictor.predict(X_new)
-            ml_prediction = pred[0]
-            print(f"\n🤖 Previsão da IA (Random Forest): {ml_prediction:.2f} Escanteios")
-            
-            # Save ML Prediction
-            db = DBManager()
-            db.save_prediction(match_id, 'ML', ml_prediction, f"Over {int(ml_prediction)}", 0.0, verbose=True)
-            db.close()
-            
-        # Statistical Analysis
-        analyzer = StatisticalAnalyzer()
-        
-        def prepare_team_df(games, team_id):
-            data = []
-            for _, row in games.iterrows():
-                is_home = row['home_team_id'] == team_id
-                data.append({
-                    'corners_ft': row['corners_home_ft'] if is_home else row['corners_away_ft'],
-                    'corners_ht': row['corners_home_ht'] if is_home else row['corners_away_ht'],
-                    'corners_2t': (row['corners_home_ft'] - row['corners_home_ht']) if is_home else (row['corners_away_ft'] - row['corners_away_ht']),
-                    'shots_ht': row['shots_ot_home_ht'] if is_home else row['shots_ot_away_ht']
-                })
-            return pd.DataFrame(data)
-
-        df_h_stats = prepare_team_df(home_games, home_id)
-        df_a_stats = prepare_team_df(away_games, away_id)
-
-        # Run Analysis (Pass ML Prediction for alignment)
-        top_picks = analyzer.analyze_match(df_h_stats, df_a_stats, ml_prediction=ml_prediction, match_name=match_name)
-        
-        # Save Predictions (Feedback Loop)
-        db = DBManager()
-        
-        # 1. Save Top 7 Opportunities
-        for pick in top_picks:
-            db.save_prediction(
-                match_id, 
-                'Statistical', 
-                0, 
-                pick['Seleção'], 
-                pick['Prob'],
-                odds=pick['Odd'],
-                category='Top7',
-                market_group=pick['Mercado']
-            )
-            
-        # 2. Save AI Suggestions
-        suggestions = analyzer.generate_suggestions(top_picks, ml_prediction=ml_prediction)
-        for level, pick in suggestions.items():
-            if pick:
-                db.save_prediction(
-                    match_id,
-                    'Statistical',
-                    0,
-                    pick['Seleção'],
-                    pick['Prob'],
-                    odds=pick['Odd'],
-                    category=f"Suggestion_{level}",
-                    market_group=pick['Mercado']
-                )
-        
-        print("✅ Previsões salvas no banco de dados.")
+    greens = sum(1 for *_, status in settled if status == 'GREEN')
+    pushes = sum(1 for *_, status in settled if status == 'PUSH')
+    renderer.message(f"{len(settled)} previsões conferidas ({greens} GREEN, {len(settled) - greens - pushes} RED, {pushes} PUSH).")
+    return settled
+
+def performance_report(run_id=None):
+    # Acerto das previsões conferidas por categoria (Top7, sugestões)
+    # run_id: mesmo relatório sobre uma execução do backtest
+    from tabulate import tabulate
+
+    db = get_repository()
+    try:
+        if run_id:
+            df = db.prediction_performance("backtest_results", run_id)
+        else:
+            df = db.prediction_performance()
+    finally:
         db.close()
+    if df.empty:
+        if run_id:
+            print(f"Nenhum resultado de backtest para o run_id {run_id}.")
+        else:
+            print("Nenhuma previsão conferida ainda. Rode `settle` depois dos jogos.")
+        return df
+    print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".3f"))
+    return df
 
-    except Exception as e:
-        print(f"Erro na análise: {e}")
+def export_data(dataset, path=None, fmt=None, since=None, until=None, tournament=None, categories=None,
+                statuses=None, run_id=None, chunk_size=None):
+    with run_report("export"):
+        return _export_data(dataset, path, fmt, since, until, tournament, categories, statuses, run_id, chunk_size)
+
+def _export_data(dataset, path, fmt, since, until, tournament, categories, statuses, run_id, chunk_size):
+    # Exportação em blocos (src/export.py). since/until: AAAA-MM-DD (data do jogo, until inclusivo)
+    from datetime import datetime, timedelta, timezone
+    from src.export import DEFAULT_CHUNK_SIZE, export_dataset
+
+    def day(value, offset=0):
+        if not value:
+            return None
+        return (datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=offset)).timestamp()
+
+    db = get_repository()
+    try:
+        path, n = export_dataset(
+            db, dataset, path, fmt, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE,
+            since=day(since), until=day(until, 1), tournament=tournament,
+            categories=categories, statuses=statuses, run_id=run_id,
+        )
     finally:
-        scraper.stop()
+        db.close()
+    # Com saída padrão (-) a mensagem vai para stderr
+    print(f"{n} linhas de {dataset} exportadas para {path}.", file=sys.stderr if path == "-" else sys.stdout)
+    return n
+
+def audit_database():
+    with run_report("audit"):
+        return _audit_database()
+
+def _audit_database():
+    # Revalida todas as estatísticas: suspeitas saem do histórico e vão para a re-busca
+    db = get_repository()
+    try:
+        counts, total = db.audit_stats()
+        queued = len(db.get_refetch_queue())
+        dead = len(db.get_dead_letter_ids())
+    finally:
+        db.close()
+    print(f"{total} linhas de estatísticas auditadas.")
+    for name, n in counts.items():
+        if n:
+            print(f"  {name}: {n}")
+    if not any(counts.values()):
+        print("  Nenhuma linha suspeita.")
+    print(f"Fila de re-busca: {queued} jogos (processada no próximo `sync`).")
+    if dead:
+        print(f"Dead-letter: {dead} jogos sem estatísticas na API ou com tentativas esgotadas.")
+    return counts
+
+def import_odds(match_ids=None, csv_path=None, renderer=None):
+    with run_report("odds"):
+        return _import_odds(match_ids or [], csv_path, renderer or TerminalRenderer())
+
+def _import_odds(match_ids, csv_path, renderer):
+    # Odds de mercado para o scanner de valor: CSV e/ou SofaScore
+    from src.analysis.markets import load_market_catalog
+    from src.ingestion import fetch_odds, read_odds_csv
 
-def retrieve_analysis():
-    match_id = input("Digite o ID do jogo: ")
     db = DBManager()
-    conn = db.connect()
-    
-    # Get Match Details
-    match_query = "SELECT home_team_name, away_team_name FROM matches WHERE match_id = ?"
-    match_info = pd.read_sql_query(match_query, conn, params=(match_id,))
-    
-    match_name = None
-    if not match_info.empty:
-        match_name = f"{match_info.iloc[0]['home_team_name']} vs {match_info.iloc[0]['away_team_name']}"
-    
-    # Fetch ML Prediction
-    query_ml = "SELECT predicted_value FROM predictions WHERE match_id = ? AND prediction_type = 'ML'"
-    ml_pred = pd.read_sql_query(query_ml, conn, params=(match_id,))
-    
-    if not ml_pred.empty:
-        print(f"\n🤖 Previsão da IA (Random Forest): {ml_pred.iloc[0]['predicted_value']:.2f} Escanteios")
+    saved = 0
+    try:
+        if csv_path:
+            try:
+                rows, skipped = read_odds_csv(csv_path, load_market_catalog())
+            except ValueError as e:
+                renderer.error(f"CSV de odds inválido: {e}")
+                return saved
+            db.save_odds(rows)
+            saved += len(rows)
+            renderer.message(f"{len(rows)} odds importadas de {csv_path}.")
+            if skipped:
+                lines = ", ".join(map(str, skipped[:10])) + (" ..." if len(skipped) > 10 else "")
+                renderer.error(f"{len(skipped)} linhas ignoradas (mercado fora do catálogo, lado, linha ou odd "
+                               f"inválidos): {lines}")
+        if match_ids:
+            from src.database.archive import RawArchive
+            from src.scrapers.sofascore import SofaScoreScraper
 
-    # Fetch Top 7
-    query_top7 = "SELECT market_group, market, probability, odds FROM predictions WHERE match_id = ? AND category = 'Top7' ORDER BY probability DESC"
-    top7 = pd.read_sql_query(query_top7, conn, params=(match_id,))
-    
-    if not top7.empty:
-        if match_name:
-             print(f"\n⚽ {Colors.BOLD}{match_name}{Colors.RESET}")
-        print(f"🏆 {Colors.BOLD}TOP 7 OPORTUNIDADES (RECUPERADO){Colors.RESET}")
-        tabela_display = []
-        for _, row in top7.iterrows():
-            prob = row['probability']
-            # Reconstruct Type based on market string (simple heuristic)
-            tipo = "OVER" if "Over" in row['market'] else "UNDER"
-            cor = Colors.GREEN if tipo == "OVER" else Colors.CYAN
-            seta = "▲" if tipo == "OVER" else "▼"
-            
-            # Use market_group if available, else 'RECUPERADO'
-            m_group = row['market_group'] if row['market_group'] else "RECUPERADO"
-            
-            linha_fmt = f"{cor}{row['market']}{Colors.RESET}"
-            prob_fmt = f"{prob * 100:.1f}%"
-            odd_fmt = f"{Colors.BOLD}@{row['odds']:.2f}{Colors.RESET}"
-            direcao_fmt = f"{cor}{seta} {tipo}{Colors.RESET}"
-            
-            tabela_display.append([m_group, linha_fmt, prob_fmt, odd_fmt, direcao_fmt])
-            
-        headers = ["MERCADO", "LINHA", "PROB.", "ODD JUSTA", "TIPO"]
-        from tabulate import tabulate
-        print(tabulate(tabela_display, headers=headers, tablefmt="fancy_grid", stralign="center"))
-    else:
-        print("Nenhuma análise Top 7 encontrada para este ID.")
+            scraper = SofaScoreScraper(headless=True, verbose=False, archive=RawArchive())
+            try:
+                scraper.start()
+                n = fetch_odds(scraper, db, match_ids)
+            finally:
+                scraper.stop()
+            saved += n
+            renderer.message(f"{n} odds de escanteios coletadas para {len(match_ids)} jogos.")
+    finally:
+        db.close()
+    return saved
 
-    # Fetch Suggestions
-    query_sugg = "SELECT category, market_group, market, probability, odds FROM predictions WHERE match_id = ? AND category LIKE 'Suggestion_%'"
-    suggs = pd.read_sql_query(query_sugg, conn, params=(match_id,))
-    
-    if not suggs.empty:
-        print(f"\n🎯 {Colors.BOLD}SUGESTÕES DA IA (RECUPERADO):{Colors.RESET}")
-        for _, row in suggs.iterrows():
-            level = row['category'].split('_')[1]
-            cor_nivel = Colors.GREEN if level == "Easy" else (Colors.YELLOW if level == "Medium" else Colors.RED)
-            m_group = row['market_group'] if row['market_group'] else ""
-            print(f"{cor_nivel}[{level.upper()}]{Colors.RESET} {m_group} - {row['market']} (@{row['odds']:.2f}) | Prob: {row['probability']*100:.1f}%")
-    else:
-        print("Nenhuma sugestão da IA encontrada para este ID.")
-        
-    db.close()
+def scan_value(match_ids=None, min_edge=0.0, kelly=0.25, bankroll=None, all_books=False):
+    with run_report("value"):
+        return _scan_value(match_ids, min_edge, kelly, bankroll, all_books)
+
+def _scan_value(match_ids, min_edge, kelly, bankroll, all_books):
+    # Edge e stake de Kelly de cada odd contra a probabilidade do modelo (src/analysis/value.py)
+    from tabulate import tabulate
+    from src.analysis.statistical import StatisticalAnalyzer
+    from src.analysis.value import build_scanner
+    from src.ml.model import load_predictor
+
+    db = get_repository()
+    try:
+        match_ids = match_ids or db.get_odds_match_ids()
+        odds = db.get_odds(match_ids)
+        if odds.empty:
+            print("Nenhuma odd no banco para esses jogos (por padrão só jogos não encerrados). Importe com `main.py odds` primeiro.")
+            return None
+        scanner, names = build_scanner(db, match_ids, StatisticalAnalyzer(engine="table"),
+                                       predictor=load_predictor(), kelly_fraction=kelly)
+    finally:
+        db.close()
+
+    results = scanner.scan(odds, min_edge=min_edge, best_only=not all_books)
+    print(f"{len(names)} jogos, {len(odds)} odds: {len(results)} oportunidades com edge >= {min_edge:.1%}.")
+    if results.empty:
+        return results
+
+    table = results.assign(
+        jogo=results['match_id'].map(names),
+        selecao=results['kind'].str.title() + " " + results['line'].astype(str),
+    )
+    columns = {'jogo': 'Jogo', 'market': 'Mercado', 'selecao': 'Seleção', 'bookmaker': 'Casa', 'odd': 'Odd',
+               'fair_odd': 'Odd justa', 'prob': 'Prob', 'edge': 'Edge', 'kelly': 'Kelly'}
+    if bankroll:
+        table['stake'] = table['kelly'] * bankroll
+        columns['stake'] = 'Stake'
+    print(tabulate(table[list(columns)].rename(columns=columns), headers="keys", tablefmt="fancy_grid",
+                   showindex=False, floatfmt=".3f"))
+    return results
+
+def reprocess_archive(workers=None):
+    with run_report("reprocess"):
+        return _reprocess_archive(workers)
+
+def _reprocess_archive(workers):
+    # Re-deriva matches/match_stats das respostas arquivadas (offline, em paralelo)
+    from src.database.archive import RawArchive
+    from src.ingestion import reprocess_archive as reprocess
+
+    archive = RawArchive()
+    summary = archive.summary()
+    if not summary:
+        print("Arquivo de respostas vazio. Execute um `sync` primeiro.")
+        return None
+    for endpoint, (n, raw, stored) in summary.items():
+        print(f"  {endpoint}: {n} respostas, {raw / 1e6:.1f} MB -> {stored / 1e6:.1f} MB")
+
+    db = DBManager()
+    try:
+        counts = reprocess(archive, db, workers=workers)
+    finally:
+        db.close()
+    print(f"{counts['payloads']} respostas reprocessadas: {counts['matches']} jogos, {counts['stats']} estatísticas.")
+    if counts["skipped"]:
+        print(f"  {counts['skipped']} respostas ilegíveis ignoradas:")
+        for reason, n in sorted(counts["skip_reasons"].items(), key=lambda kv: -kv[1])[:5]:
+            print(f"    {n}x {reason}")
+    return counts
+
+def run_backtest(since=None, model=None, retrain_every=250, engine="table", save=True, seed=0, sampling="stratified"):
+    with run_report("backtest"):
+        return _run_backtest(since, model, retrain_every, engine, save, seed, sampling)
+
+def _run_backtest(since, model, retrain_every, engine, save, seed, sampling):
+    # Repassa a temporada em ordem, sem dados futuros, e liquida as previsões
+    from datetime import datetime, timezone
+    from tabulate import tabulate
+    from src.analysis.backtest import Backtester, summarize
+    from src.analysis.statistical import StatisticalAnalyzer
+
+    start_ts = None
+    if since:
+        start_ts = datetime.strptime(since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+    db = get_repository()
+    try:
+        df = db.get_historical_data()
+        if df.empty:
+            print("Banco de dados vazio. Execute a atualização primeiro.")
+            return None
+
+        backtester = Backtester(StatisticalAnalyzer(engine=engine, seed=seed, sampling=sampling), model=model, retrain_every=retrain_every)
+        print(f"Backtest de {len(df)} jogos (modelo: {model or 'nenhum'}, motor: {engine})...")
+        run_id, results = backtester.run(df, start_ts=start_ts)
+        if results.empty:
+            print("Nenhum jogo com histórico suficiente no período.")
+            return run_id
+
+        print(tabulate(summarize(results), headers="keys", tablefmt="fancy_grid", showindex=False, floatfmt=".3f"))
+        print(f"Modelos treinados: {backtester.retrains}")
+        if save:
+            db.save_backtest_results(results.to_dict('records'))
+            db.flush()
+            print(f"Resultados salvos em backtest_results (run_id {run_id}). Relatório: main.py report --run {run_id}")
+        return run_id
+    finally:
+        db.close()
+
+def daily_routine(days=3, only=None, force=None, min_new=30, daemon=False, interval=6.0, seed=0, renderer=None):
+    # Sync incremental -> conferência -> retreino -> próximos jogos -> pré-análise (src/orchestrator.py)
+    # daemon: repete a cada `interval` horas até Ctrl-C (sem agendador externo)
+    import time
+    from datetime import datetime, timedelta
+
+    renderer = renderer or TerminalRenderer()
+    statuses = {}
+    while True:
+        with run_report("daily"):
+            statuses = _daily_routine(days, only, force, min_new, seed, renderer)
+        if not daemon:
+            return statuses
+        next_run = datetime.now() + timedelta(hours=interval)
+        renderer.message(f"Próxima execução às {next_run:%d/%m %H:%M}.")
+        try:
+            time.sleep(interval * 3600)
+        except KeyboardInterrupt:
+            return statuses
+
+def _daily_routine(days, only, force, min_new, seed, renderer):
+    from src.orchestrator import DailyPipeline
+
+    db = DBManager()
+    try:
+        return DailyPipeline(db, renderer, days=days, min_new_matches=min_new, force=force or (), seed=seed).run(only)
+    finally:
+        db.close()
+
+def daily_history(limit=20):
+    # Últimos passos da rotina diária (tabela pipeline_runs)
+    from datetime import datetime
+    from tabulate import tabulate
+
+    db = DBManager()
+    try:
+        runs = db.get_pipeline_runs(limit=limit)
+    finally:
+        db.close()
+    if not runs:
+        print("Nenhuma execução da rotina diária ainda.")
+        return runs
+    rows = []
+    for r in runs:
+        detail = r['detail']
+        text = detail.get('reason') or detail.get('error') or ", ".join(
+            f"{k}={v}" for k, v in detail.items() if k != 'version')
+        rows.append([r['run_id'], r['step'], r['status'], f"{datetime.fromtimestamp(r['started_at']):%d/%m %H:%M:%S}",
+                     f"{r['finished_at'] - r['started_at']}s", text])
+    print(tabulate(rows, headers=["Execução", "Passo", "Status", "Início", "Duração", "Detalhe"], tablefmt="simple"))
+    return runs
 
-def main():
+def interactive_menu():
     while True:
         print("\n--- SISTEMA DE PREVISÃO DE ESCANTEIOS (ML) ---")
         print("1. Atualizar Banco de Dados (Scraping Completo)")
         print("2. Treinar Modelo de IA")
         print("3. Analisar Jogo (URL)")
         print("4. Consultar Análise (ID)")
-        print("5. Sair")
+        print("5. Acompanhar Jogos Ao Vivo (IDs)")
+        print("6. Sair")
         
         choice = input("Escolha uma opção: ")
         
@@ -338,9 +556,182 @@ def main():
         elif choice == '4':
             retrieve_analysis()
         elif choice == '5':
+            track_live_matches()
+        elif choice == '6':
             break
         else:
             print("Opção inválida.")
 
+def _simulation_args(p):
+    p.add_argument("--seed", default="0",
+                   help="Semente da execução (número ou texto); com o ID do jogo fixa a simulação (padrão: 0)")
+    p.add_argument("--sampling", choices=("stratified", "qmc", "antithetic", "random"), default="stratified",
+                   help="Amostragem do Monte Carlo (padrão: stratified, ~2 mil amostras com erro menor que 10 mil sorteios)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Sistema de previsão de escanteios. Sem subcomando abre o menu interativo.",
+    )
+    parser.add_argument("--format", default="terminal", choices=list(RENDERERS), help="Formato de saída")
+    parser.add_argument("--backend", choices=BACKENDS, help=f"Backend das leituras analíticas (padrão: ${BACKEND_ENV} ou sqlite)")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("sync", help="Atualiza o banco (scraping completo da temporada)")
+    p = sub.add_parser("train", help="Treina o modelo de IA")
+    p.add_argument("--features", choices=("full", "legacy"), default="full",
+                   help="full: forma, mando, HT/2T, descanso e temporada; legacy: as 6 médias originais")
+    p.add_argument("--model", choices=("multi", "single", "all"), default="multi",
+                   help="multi: escanteios por lado e período com dispersão; single: só o total FT")
+
+    p = sub.add_parser("analyze", help="Analisa um ou mais jogos (ID ou URL do SofaScore)")
+    p.add_argument("targets", nargs="+", metavar="ID|URL")
+    _simulation_args(p)
+
+    p = sub.add_parser("show", help="Mostra a análise salva de um jogo (só SQLite)")
+    p.add_argument("match_id", metavar="ID|URL")
+
+    sub.add_parser("settle", help="Confere previsões pendentes de jogos finalizados (só SQLite)")
+    p = sub.add_parser("report", help="Taxa de acerto das previsões conferidas por categoria")
+    p.add_argument("--run", metavar="RUN_ID", help="Relatório de uma execução do backtest (backtest_results)")
+
+    p = sub.add_parser("export", help="Exporta previsões, análises, liquidações ou desempenho (CSV, JSONL, Parquet)")
+    p.add_argument("dataset", choices=("predictions", "analyses", "settlements", "performance"))
+    p.add_argument("-o", "--output", metavar="ARQUIVO",
+                   help="Destino (padrão: data/exports/<conjunto>.<formato>; - = saída padrão)")
+    p.add_argument("--format", dest="export_format", choices=("csv", "jsonl", "parquet"),
+                   help="Formato (padrão: pela extensão do arquivo, senão csv)")
+    p.add_argument("--since", metavar="AAAA-MM-DD", help="Jogos a partir da data")
+    p.add_argument("--until", metavar="AAAA-MM-DD", help="Jogos até a data (inclusive)")
+    p.add_argument("--tournament", help="Trecho do nome do torneio (ex: brasileir)")
+    p.add_argument("--category", action="append", metavar="CATEGORIA", help="Top7, Suggestion_Easy, ... (repetível)")
+    p.add_argument("--status", action="append", choices=("PENDING", "GREEN", "RED", "PUSH"), help="Repetível")
+    p.add_argument("--run", metavar="RUN_ID", help="Exporta uma execução do backtest (backtest_results)")
+    p.add_argument("--chunk-size", type=int, metavar="N", help="Linhas por bloco lido do banco (padrão: 5000)")
+
+    sub.add_parser("audit", help="Valida match_stats (zeros, HT > FT, ...) e enfileira linhas suspeitas para re-busca")
+
+    p = sub.add_parser("odds", help="Importa odds de escanteios (SofaScore por ID/URL e/ou --csv)")
+    p.add_argument("targets", nargs="*", metavar="ID|URL")
+    p.add_argument("--csv", metavar="ARQUIVO",
+                   help="CSV com match_id, market, line, kind (OVER/UNDER) ou selection, odd [, bookmaker]")
+
+    p = sub.add_parser("value", help="Edge e stake de Kelly de todas as odds contra as probabilidades do modelo")
+    p.add_argument("targets", nargs="*", metavar="ID|URL", help="Jogos (padrão: todos com odds ainda não encerrados)")
+    p.add_argument("--min-edge", type=float, default=0.0, help="Edge mínimo por unidade (ex: 0.03 = 3%%)")
+    p.add_argument("--kelly", type=float, default=0.25, help="Fração de Kelly (padrão: 0.25)")
+    p.add_argument("--bankroll", type=float, default=None, help="Banca para converter o Kelly em stake")
+    p.add_argument("--all-books", action="store_true", help="Uma linha por casa (padrão: só a melhor odd)")
+
+    p = sub.add_parser("reprocess", help="Re-deriva matches/match_stats do arquivo de respostas cruas (sem scraping)")
+    p.add_argument("--workers", type=int, default=None, metavar="N", help="Processos de decodificação (padrão: CPUs)")
+
+    p = sub.add_parser("backtest", help="Repassa o histórico em ordem (sem dados futuros) e liquida as previsões")
+    p.add_argument("--since", metavar="AAAA-MM-DD", help="Avalia só jogos a partir da data (antes só aquecem o estado)")
+    p.add_argument("--model", choices=("none", "single", "multi"), default="none",
+                   help="Modelo retreinado ao longo do backtest (padrão: só estatística)")
+    p.add_argument("--retrain-every", type=int, default=250, metavar="N", help="Retreina o modelo a cada N jogos")
+    p.add_argument("--engine", choices=("table", "montecarlo"), default="table", help="Motor do StatisticalAnalyzer")
+    p.add_argument("--no-save", action="store_true", help="Não grava em backtest_results")
+    _simulation_args(p)
+
+    p = sub.add_parser("daily", help="Rotina diária: sync incremental, conferência, retreino e pré-análise dos próximos jogos")
+    p.add_argument("--days", type=int, default=3, metavar="N", help="Pré-analisa os jogos dos próximos N dias (padrão: 3)")
+    p.add_argument("--only", action="append", choices=DAILY_STEPS, metavar="PASSO",
+                   help=f"Roda só este passo (repetível): {', '.join(DAILY_STEPS)}")
+    p.add_argument("--force", action="append", choices=DAILY_STEPS, metavar="PASSO",
+                   help="Roda o passo mesmo que esteja em dia (repetível)")
+    p.add_argument("--min-new", type=int, default=30, metavar="N",
+                   help="Retreina só com N jogos novos desde o último treino (padrão: 30)")
+    p.add_argument("--daemon", action="store_true", help="Repete a rotina até Ctrl-C")
+    p.add_argument("--interval", type=float, default=6.0, metavar="HORAS", help="Intervalo do --daemon (padrão: 6)")
+    p.add_argument("--seed", default="0", help="Semente da simulação nas pré-análises (padrão: 0)")
+    p.add_argument("--history", action="store_true", help="Mostra o log das últimas execuções e sai")
+
+    p = sub.add_parser("live", help="Acompanha jogos ao vivo")
+    p.add_argument("targets", nargs="+", metavar="ID|URL")
+
+    # Argumentos desconhecidos do `bench` são repassados para run_benchmarks.py
+    sub.add_parser("bench", help="Roda benchmarks/run_benchmarks.py (argumentos repassados)", add_help=False)
+    return parser
+
+def _match_ids(targets, renderer):
+    ids = []
+    for target in targets:
+        match_id = parse_match_id(target)
+        if match_id is None:
+            renderer.error(f"ID do jogo não encontrado em: {target}")
+        else:
+            ids.append(match_id)
+    return ids
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"argumentos não reconhecidos: {' '.join(extra)}")
+    if args.command is None:
+        interactive_menu()
+        return 0
+
+    renderer = get_renderer(args.format)
+    if args.backend:
+        os.environ[BACKEND_ENV] = args.backend
+
+    if args.command == "sync":
+        update_database(renderer)
+    elif args.command == "train":
+        train_model(args.features, args.model)
+    elif args.command == "analyze":
+        match_ids = _match_ids(args.targets, renderer)
+        analyzed = analyze_matches(match_ids, renderer, args.seed, args.sampling) if match_ids else 0
+        return 0 if analyzed == len(args.targets) else 1
+    elif args.command == "show":
+        match_id = parse_match_id(args.match_id)
+        if match_id is None:
+            renderer.error(f"ID do jogo não encontrado em: {args.match_id}")
+            return 1
+        retrieve_analysis(match_id, renderer)
+    elif args.command == "settle":
+        settle_predictions(renderer)
+    elif args.command == "report":
+        performance_report(args.run)
+    elif args.command == "export":
+        export_data(args.dataset, args.output, args.export_format, args.since, args.until, args.tournament,
+                    args.category, args.status, args.run, args.chunk_size)
+    elif args.command == "audit":
+        audit_database()
+    elif args.command == "odds":
+        match_ids = _match_ids(args.targets, renderer)
+        if not match_ids and not args.csv:
+            renderer.error("Informe IDs/URLs de jogos e/ou --csv.")
+            return 1
+        import_odds(match_ids, args.csv, renderer)
+    elif args.command == "value":
+        match_ids = _match_ids(args.targets, renderer)
+        scan_value(match_ids, args.min_edge, args.kelly, args.bankroll, args.all_books)
+    elif args.command == "reprocess":
+        reprocess_archive(args.workers)
+    elif args.command == "backtest":
+        model = None if args.model == "none" else args.model
+        run_backtest(args.since, model, args.retrain_every, args.engine, save=not args.no_save,
+                     seed=args.seed, sampling=args.sampling)
+    elif args.command == "daily":
+        if args.history:
+            daily_history()
+            return 0
+        statuses = daily_routine(args.days, args.only, args.force, args.min_new, args.daemon, args.interval,
+                                 args.seed, renderer)
+        return 1 if any(status in ("failed", "blocked") for status in statuses.values()) else 0
+    elif args.command == "live":
+        match_ids = _match_ids(args.targets, renderer)
+        if not match_ids:
+            return 1
+        track_live_matches(match_ids, renderer)
+    elif args.command == "bench":
+        from benchmarks.run_benchmarks import main as run_benchmarks
+        return run_benchmarks(extra)
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
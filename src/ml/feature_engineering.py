@@ -1,5 +1,10 @@
+from collections import deque
+
 import pandas as pd
 
+from src.instrumentation import timed
+
+@timed("features.rolling_stats")
 def calculate_rolling_stats(df, window=5):
     # Ensure data is sorted by date
     df = df.sort_values('start_timestamp')
@@ -42,18 +47,216 @@ def calculate_rolling_stats(df, window=5):
     
     return df_features
 
-def prepare_training_data(df):
-    df_processed = calculate_rolling_stats(df)
-    
+FEATURES = [
+    'home_avg_corners', 'home_avg_shots', 'home_avg_goals',
+    'away_avg_corners', 'away_avg_shots', 'away_avg_goals'
+]
+
+def training_matrix(df_processed, features=FEATURES):
     # Features (X)
-    features = [
-        'home_avg_corners', 'home_avg_shots', 'home_avg_goals',
-        'away_avg_corners', 'away_avg_shots', 'away_avg_goals'
-    ]
-    
     X = df_processed[features]
     
     # Targets (y) - Example: Total Corners
     y_corners = df_processed['corners_home_ft'] + df_processed['corners_away_ft']
     
     return X, y_corners, df_processed
+
+def prepare_training_data(df):
+    return training_matrix(calculate_rolling_stats(df))
+
+def load_training_data(db, window=5):
+    # Mesmo resultado de prepare_training_data(db.get_historical_data()), mas as
+    # médias móveis são calculadas no banco (funções de janela)
+    return training_matrix(db.get_rolling_features(window))
+
+
+# --- Features completas (incrementais) ---
+# Uma passada ordenada por (start_timestamp, match_id): para cada jogo, as features
+# saem do estado dos dois times ANTES do jogo e só depois o estado é atualizado.
+# O mesmo FeatureBuilder serve para treino (build_features) e para um jogo novo
+# (fixture_features), então o modelo vê em produção exatamente o que viu no treino.
+
+REST_DAYS_CAP = 30.0
+
+FULL_FEATURES = FEATURES + [
+    # Sofridos (ajuste pelo adversário)
+    'home_avg_corners_against', 'away_avg_corners_against',
+    'home_avg_shots_against', 'away_avg_shots_against',
+    'home_exp_corners', 'away_exp_corners',
+    # Forma por mando (mandante em casa, visitante fora)
+    'home_venue_avg_corners', 'home_venue_avg_corners_against',
+    'away_venue_avg_corners', 'away_venue_avg_corners_against',
+    # 1º/2º tempo
+    'home_avg_corners_ht', 'home_avg_corners_2t',
+    'away_avg_corners_ht', 'away_avg_corners_2t',
+    # Descanso e temporada
+    'home_rest_days', 'away_rest_days',
+    'home_season_games', 'home_season_avg_corners', 'home_season_avg_corners_against',
+    'away_season_games', 'away_season_avg_corners', 'away_season_avg_corners_against',
+    'league_avg_corners',
+]
+
+# Posições das tuplas guardadas em _TeamState.recent
+_CORNERS, _SHOTS, _GOALS, _CORNERS_AG, _SHOTS_AG, _GOALS_AG, _CORNERS_HT, _CORNERS_2T = range(8)
+
+
+def _mean(rows, i):
+    values = [r[i] for r in rows if r[i] is not None and r[i] == r[i]]
+    return sum(values) / len(values) if values else float('nan')
+
+
+class _TeamState:
+    def __init__(self, window):
+        self.recent = deque(maxlen=window)
+        self.venue = {1: deque(maxlen=window), 0: deque(maxlen=window)}  # is_home -> (a favor, contra)
+        self.last_ts = None
+        self.season_id = None
+        self.season_games = 0
+        self.season_corners = 0.0
+        self.season_corners_against = 0.0
+
+
+class FeatureBuilder:
+    def __init__(self, window=5):
+        self.window = window
+        self.teams = {}
+        self.league_corners = 0.0
+        self.league_team_games = 0
+        self.last_key = None  # (start_timestamp, match_id) do último jogo processado
+        self.match_ids = set()
+
+    def _team(self, team_id):
+        state = self.teams.get(team_id)
+        if state is None:
+            state = self.teams[team_id] = _TeamState(self.window)
+        return state
+
+    def features_for(self, home_id, away_id, timestamp, season_id=None):
+        league_avg = self.league_corners / self.league_team_games if self.league_team_games else float('nan')
+        f = {'league_avg_corners': league_avg}
+        home, away = self._team(home_id), self._team(away_id)
+
+        for side, team, opp, is_home in (('home', home, away, 1), ('away', away, home, 0)):
+            f[f'{side}_avg_corners'] = _mean(team.recent, _CORNERS)
+            f[f'{side}_avg_shots'] = _mean(team.recent, _SHOTS)
+            f[f'{side}_avg_goals'] = _mean(team.recent, _GOALS)
+            f[f'{side}_avg_corners_against'] = _mean(team.recent, _CORNERS_AG)
+            f[f'{side}_avg_shots_against'] = _mean(team.recent, _SHOTS_AG)
+            f[f'{side}_avg_corners_ht'] = _mean(team.recent, _CORNERS_HT)
+            f[f'{side}_avg_corners_2t'] = _mean(team.recent, _CORNERS_2T)
+
+            # Escanteios esperados: ataque do time x defesa do adversário / média da liga
+            opp_against = _mean(opp.recent, _CORNERS_AG)
+            f[f'{side}_exp_corners'] = f[f'{side}_avg_corners'] * opp_against / league_avg if league_avg else float('nan')
+
+            # Sem jogos no mesmo mando ainda: usa a forma geral
+            venue = team.venue[is_home]
+            f[f'{side}_venue_avg_corners'] = _mean(venue, 0) if venue else f[f'{side}_avg_corners']
+            f[f'{side}_venue_avg_corners_against'] = _mean(venue, 1) if venue else f[f'{side}_avg_corners_against']
+
+            rest = (timestamp - team.last_ts) / 86400 if team.last_ts is not None else REST_DAYS_CAP
+            f[f'{side}_rest_days'] = min(rest, REST_DAYS_CAP)
+
+            # Temporada nova (ou sem jogos nela): agregados zerados e média da liga
+            same_season = team.season_id == season_id and team.season_games
+            games = team.season_games if same_season else 0
+            f[f'{side}_season_games'] = games
+            f[f'{side}_season_avg_corners'] = team.season_corners / games if games else league_avg
+            f[f'{side}_season_avg_corners_against'] = team.season_corners_against / games if games else league_avg
+
+        return f
+
+    def update(self, row):
+        # row: linha de get_historical_data (dict ou namedtuple/Series com os mesmos nomes)
+        get = row.get if isinstance(row, dict) else lambda k: getattr(row, k)
+        ts = get('start_timestamp')
+        season_id = get('season_id')
+        c_h, c_a = get('corners_home_ft'), get('corners_away_ft')
+        ht_h, ht_a = get('corners_home_ht'), get('corners_away_ht')
+        s_h, s_a = get('shots_ot_home_ft'), get('shots_ot_away_ft')
+        g_h, g_a = get('home_score'), get('away_score')
+
+        sides = (
+            (get('home_team_id'), 1, (c_h, s_h, g_h, c_a, s_a, g_a, ht_h, c_h - ht_h)),
+            (get('away_team_id'), 0, (c_a, s_a, g_a, c_h, s_h, g_h, ht_a, c_a - ht_a)),
+        )
+        for team_id, is_home, values in sides:
+            team = self._team(team_id)
+            team.recent.append(values)
+            team.venue[is_home].append((values[_CORNERS], values[_CORNERS_AG]))
+            team.last_ts = ts
+            if team.season_id != season_id:
+                team.season_id = season_id
+                team.season_games = 0
+                team.season_corners = team.season_corners_against = 0.0
+            team.season_games += 1
+            team.season_corners += values[_CORNERS]
+            team.season_corners_against += values[_CORNERS_AG]
+
+        self.league_corners += c_h + c_a
+        self.league_team_games += 2
+        self.last_key = (ts, get('match_id'))
+        self.match_ids.add(get('match_id'))
+
+    def update_many(self, df):
+        # df: histórico completo (get_historical_data). Incremental quando só chegaram
+        # jogos posteriores ao último visto; jogos novos anteriores a ele (backfill de
+        # histórico antigo) ou jogos que saíram do histórico (auditoria) invalidam o
+        # estado, e tudo é reprocessado do zero na ordem certa.
+        df = df.sort_values(['start_timestamp', 'match_id'])
+        if self.last_key is not None:
+            ts, mid = self.last_key
+            after = (df['start_timestamp'] > ts) | ((df['start_timestamp'] == ts) & (df['match_id'] > mid))
+            backfill = (~after & ~df['match_id'].isin(self.match_ids)).any()
+            if backfill or not self.match_ids.issubset(df['match_id']):
+                self.__init__(self.window)
+            else:
+                df = df[after]
+        for row in df.itertuples(index=False):
+            self.update(row)
+        return len(df)
+
+    def build(self, df):
+        # Features de cada jogo de df (estado anterior ao jogo), em uma passada
+        # Jogos no mesmo horário não se enxergam: o estado só é atualizado depois
+        # de calcular as features de todo o grupo (igual a fixture_features)
+        df = df.sort_values(['start_timestamp', 'match_id'])
+        rows = []
+        pending = []
+        for row in df.itertuples(index=False):
+            if pending and pending[0].start_timestamp != row.start_timestamp:
+                for done in pending:
+                    self.update(done)
+                pending = []
+            rows.append(self.features_for(row.home_team_id, row.away_team_id, row.start_timestamp, row.season_id))
+            pending.append(row)
+        for done in pending:
+            self.update(done)
+        return pd.DataFrame(rows, index=df.index, columns=FULL_FEATURES)
+
+
+@timed("features.build")
+def build_features(df, window=5):
+    # df de get_historical_data -> df + FULL_FEATURES, ordenado por data.
+    # Descarta os mesmos jogos que calculate_rolling_stats (times sem jogo anterior).
+    df = df.sort_values(['start_timestamp', 'match_id'])
+    features = FeatureBuilder(window).build(df)
+    out = pd.concat([df, features], axis=1)
+    return out.dropna(subset=FEATURES).reset_index(drop=True)
+
+
+def prepare_full_training_data(df, window=5):
+    return training_matrix(build_features(df, window), FULL_FEATURES)
+
+
+def fixture_features(match_data, history_df=None, builder=None, window=5):
+    # Features de um jogo (dict de DBManager.save_match) com o mesmo código do treino.
+    # builder: FeatureBuilder já aquecido (ex: serviço); só é usado se ainda não
+    # tiver visto jogos posteriores ao início deste (sem vazamento do resultado).
+    key = (match_data['timestamp'], match_data['id'])
+    if builder is None or (builder.last_key is not None and builder.last_key >= key):
+        builder = FeatureBuilder(window)
+        if history_df is not None:
+            builder.update_many(history_df[history_df['start_timestamp'] < key[0]])
+    f = builder.features_for(match_data['home_id'], match_data['away_id'], match_data['timestamp'], match_data.get('season_id'))
+    return pd.DataFrame([f], columns=FULL_FEATURES)
@@ -1,18 +1,34 @@
+import os
+
 import joblib
+import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 
+from src.instrumentation import timed
+from src.ml.feature_engineering import FEATURES
+
 class CornerPredictor:
     def __init__(self, model_path="data/corner_model.pkl"):
         self.model_path = model_path
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.features = list(FEATURES)  # colunas usadas no treino (modelos antigos: as 6 originais)
         
+    def fit(self, X, y):
+        # Ajuste sem validação, print nem arquivo (ex: retreino walk-forward do backtest)
+        if hasattr(X, 'columns'):
+            self.features = list(X.columns)
+        self.model.fit(X, y)
+        return self
+
+    @timed("model.train")
     def train(self, X, y):
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         print("Treinando modelo...")
-        self.model.fit(X_train, y_train)
+        self.fit(X_train, y_train)
         
         y_pred = self.model.predict(X_test)
         mae = mean_absolute_error(y_test, y_pred)
@@ -23,18 +39,172 @@ class CornerPredictor:
         self.save_model()
         return mae, r2
 
+    @timed("model.predict")
     def predict(self, X_new):
+        # DataFrame de features (ex: fixture_features) -> só as colunas do treino, na ordem
+        if hasattr(X_new, 'columns'):
+            X_new = X_new[self.features]
         return self.model.predict(X_new)
 
     def save_model(self):
-        joblib.dump(self.model, self.model_path)
+        joblib.dump({"model": self.model, "features": self.features}, self.model_path)
         print(f"Modelo salvo em {self.model_path}")
 
+    @timed("model.load")
     def load_model(self):
         try:
-            self.model = joblib.load(self.model_path)
+            saved = joblib.load(self.model_path)
+            if isinstance(saved, dict):
+                self.model = saved["model"]
+                self.features = saved["features"]
+            else:
+                # Pickle antigo: só o RandomForest
+                self.model = saved
+                self.features = list(getattr(saved, "feature_names_in_", FEATURES))
             print("Modelo carregado com sucesso.")
             return True
         except FileNotFoundError:
             print("Modelo não encontrado. É necessário treinar primeiro.")
             return False
+
+
+# --- Modelo multi-alvo ---
+# Um RandomForest multi-saída prevê os escanteios de mandante e visitante em cada
+# período (FT, HT, 2T) a partir das mesmas features (uma construção de features,
+# um ajuste). A dispersão vem de um segundo forest treinado nos resíduos OOB ao
+# quadrado; a correlação mandante x visitante de cada período vem dos mesmos resíduos.
+# market_parameters() devolve [λ, variância] por mercado, no formato de
+# StatisticalAnalyzer.match_parameters.
+
+TARGETS = ['home_ft', 'away_ft', 'home_ht', 'away_ht', 'home_2t', 'away_2t']
+MIN_VARIANCE = 0.05
+
+
+def target_matrix(df_processed):
+    # Alvos por lado e período a partir das colunas de get_historical_data
+    return pd.DataFrame({
+        'home_ft': df_processed['corners_home_ft'],
+        'away_ft': df_processed['corners_away_ft'],
+        'home_ht': df_processed['corners_home_ht'],
+        'away_ht': df_processed['corners_away_ht'],
+        'home_2t': df_processed['corners_home_ft'] - df_processed['corners_home_ht'],
+        'away_2t': df_processed['corners_away_ft'] - df_processed['corners_away_ht'],
+    }, index=df_processed.index)
+
+
+class MultiTargetPredictor:
+    def __init__(self, model_path="data/corner_model_multi.pkl"):
+        self.model_path = model_path
+        self.mean_model = RandomForestRegressor(n_estimators=200, min_samples_leaf=3, oob_score=True, random_state=42)
+        self.var_model = RandomForestRegressor(n_estimators=100, min_samples_leaf=10, random_state=42)
+        self.features = list(FEATURES)
+        self.targets = list(TARGETS)
+        self.residual_corr = {}  # período -> correlação dos resíduos mandante x visitante
+
+    def fit(self, X, Y):
+        # Ajuste sem validação, print nem arquivo (ex: retreino walk-forward do backtest)
+        if hasattr(X, 'columns'):
+            self.features = list(X.columns)
+        Y = Y[self.targets]
+        self.mean_model.fit(X, Y)
+
+        # Resíduos fora da amostra (OOB) -> variância condicional e correlação por período
+        residuals = Y.values - self.mean_model.oob_prediction_
+        self.var_model.fit(X, residuals ** 2)
+        for period in ('ft', 'ht', '2t'):
+            h, a = self.targets.index(f'home_{period}'), self.targets.index(f'away_{period}')
+            corr = np.corrcoef(residuals[:, h], residuals[:, a])[0, 1]
+            self.residual_corr[period] = float(np.nan_to_num(corr))
+        return self
+
+    @timed("model.train")
+    def train(self, X, Y):
+        X_train, X_test, Y_train, Y_test = train_test_split(X, Y[self.targets], test_size=0.2, random_state=42)
+
+        print(f"Treinando modelo multi-alvo ({len(self.targets)} alvos)...")
+        self.fit(X_train, Y_train)
+
+        Y_pred = self.mean_model.predict(X_test)
+        maes = {t: mean_absolute_error(Y_test[t], Y_pred[:, i]) for i, t in enumerate(self.targets)}
+        total_true = Y_test['home_ft'] + Y_test['away_ft']
+        total_pred = Y_pred[:, self.targets.index('home_ft')] + Y_pred[:, self.targets.index('away_ft')]
+        mae = mean_absolute_error(total_true, total_pred)
+        r2 = r2_score(total_true, total_pred)
+
+        print("MAE por alvo: " + ", ".join(f"{t} {v:.2f}" for t, v in maes.items()))
+        print(f"Modelo treinado! Total FT - MAE: {mae:.2f}, R2: {r2:.2f}")
+
+        self.save_model()
+        return mae, r2
+
+    def _select(self, X_new):
+        return X_new[self.features] if hasattr(X_new, 'columns') else X_new
+
+    @timed("model.predict")
+    def predict_distribution(self, X_new):
+        # (médias, variâncias), cada uma (n_jogos, n_alvos) na ordem de self.targets
+        X_new = self._select(X_new)
+        means = np.clip(self.mean_model.predict(X_new), 0, None)
+        variances = np.clip(self.var_model.predict(X_new), MIN_VARIANCE, None)
+        return means, variances
+
+    def predict(self, X_new):
+        # Compatível com CornerPredictor: total de escanteios no jogo
+        means, _ = self.predict_distribution(X_new)
+        return means[:, self.targets.index('home_ft')] + means[:, self.targets.index('away_ft')]
+
+    def market_parameters(self, markets, X_new):
+        # [λ, variância] por mercado para um jogo (X_new com uma linha)
+        return self.market_parameters_many(markets, X_new)[0]
+
+    def market_parameters_many(self, markets, X_new):
+        # Vários jogos de uma vez: array (n_jogos, n_mercados, 2)
+        means, variances = self.predict_distribution(X_new)
+        params = np.empty((len(means), len(markets), 2))
+        for i, m in enumerate(markets):
+            h = self.targets.index(f'home_{m.period}')
+            a = self.targets.index(f'away_{m.period}')
+            if m.uses_home and m.uses_away:
+                cov = self.residual_corr.get(m.period, 0.0) * np.sqrt(variances[:, h] * variances[:, a])
+                params[:, i, 0] = means[:, h] + means[:, a]
+                params[:, i, 1] = np.maximum(variances[:, h] + variances[:, a] + 2 * cov, MIN_VARIANCE)
+            elif m.uses_home:
+                params[:, i, 0], params[:, i, 1] = means[:, h], variances[:, h]
+            else:
+                params[:, i, 0], params[:, i, 1] = means[:, a], variances[:, a]
+        return params
+
+    def save_model(self):
+        joblib.dump({
+            "kind": "multi",
+            "mean_model": self.mean_model,
+            "var_model": self.var_model,
+            "features": self.features,
+            "targets": self.targets,
+            "residual_corr": self.residual_corr,
+        }, self.model_path)
+        print(f"Modelo salvo em {self.model_path}")
+
+    @timed("model.load")
+    def load_model(self):
+        try:
+            saved = joblib.load(self.model_path)
+        except FileNotFoundError:
+            print("Modelo multi-alvo não encontrado. É necessário treinar primeiro.")
+            return False
+        self.mean_model = saved["mean_model"]
+        self.var_model = saved["var_model"]
+        self.features = saved["features"]
+        self.targets = saved["targets"]
+        self.residual_corr = saved["residual_corr"]
+        print("Modelo multi-alvo carregado com sucesso.")
+        return True
+
+
+def load_predictor():
+    # Prefere o modelo multi-alvo; sem ele, o CornerPredictor (total FT). None se nenhum existir.
+    for predictor in (MultiTargetPredictor(), CornerPredictor()):
+        if os.path.exists(predictor.model_path) and predictor.load_model():
+            return predictor
+    print("Modelo não encontrado. É necessário treinar primeiro.")
+    return None
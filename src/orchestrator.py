@@ -0,0 +1,307 @@
+import os
+import time
+from src.instrumentation import metrics, new_run_id
+
+# Rotina diária (main.py daily): um grafo de passos com dependências, checagem de
+# frescor e log de cada passo na tabela pipeline_runs.
+#   sync ──> settle ─────────────┐
+#     ├───> retrain ─────────────┤
+#     └───> fixtures ══════> preanalyze
+# ──> ordem (after): o passo espera o anterior, mas roda mesmo se ele falhar
+# ══> dependência (deps): se o anterior falhar, o passo fica 'blocked'
+# Cada passo pode se declarar em dia (fresh) e é pulado ('skipped') com o motivo:
+# sync recente, poucos jogos novos desde o último treino, próximos jogos já buscados,
+# análises já feitas com os mesmos dados e modelo. --force refaz um passo mesmo assim.
+
+DEFAULT_DAYS = 3
+DEFAULT_INTERVAL_HOURS = 6.0
+SYNC_INTERVAL = 6 * 3600
+FIXTURES_INTERVAL = 3 * 3600
+MIN_NEW_MATCHES = 30
+MAX_FIXTURE_PAGES = 5
+
+MODEL_PATHS = ("data/corner_model_multi.pkl", "data/corner_model.pkl")
+UPCOMING_API = "https://www.sofascore.com/api/v1/unique-tournament/{}/season/{}/events/next/{}"
+
+STEPS = ("sync", "settle", "retrain", "fixtures", "preanalyze")
+
+
+class Step:
+    def __init__(self, name, run, deps=(), after=(), fresh=None):
+        self.name = name
+        self.run = run        # () -> dict (detalhe gravado no log)
+        self.deps = tuple(deps)
+        self.after = tuple(after)
+        self.fresh = fresh    # () -> motivo para pular ou None
+
+
+def step_order(steps):
+    # Ordem topológica (Kahn), estável na ordem de declaração. Passos fora da
+    # seleção (--only) não seguram ninguém.
+    names = {s.name for s in steps}
+    pending = list(steps)
+    ordered = []
+    placed = set()
+    while pending:
+        ready = [s for s in pending if all(d in placed or d not in names for d in s.deps + s.after)]
+        if not ready:
+            raise ValueError(f"Ciclo entre os passos: {', '.join(s.name for s in pending)}")
+        step = ready[0]
+        ordered.append(step)
+        placed.add(step.name)
+        pending.remove(step)
+    return ordered
+
+
+def _ago(ts):
+    hours = (time.time() - ts) / 3600
+    return f"{hours:.1f}h" if hours >= 1 else f"{hours * 60:.0f}min"
+
+
+class DailyPipeline:
+    def __init__(self, db, renderer, query="Brasileirão", year="2025", days=DEFAULT_DAYS,
+                 min_new_matches=MIN_NEW_MATCHES, sync_interval=SYNC_INTERVAL, force=(), seed=0):
+        self.db = db
+        self.renderer = renderer
+        self.query = query
+        self.year = year
+        self.days = days
+        self.min_new_matches = min_new_matches
+        self.sync_interval = sync_interval
+        self.force = set(force or ())
+        self.seed = seed
+        self._scraper = None
+        self.steps = [
+            Step("sync", self.sync, fresh=self.sync_fresh),
+            Step("settle", self.settle, after=("sync",)),
+            Step("retrain", self.retrain, after=("sync",), fresh=self.retrain_fresh),
+            Step("fixtures", self.fixtures, after=("sync",), fresh=self.fixtures_fresh),
+            Step("preanalyze", self.preanalyze, deps=("fixtures",), after=("retrain", "settle"),
+                 fresh=self.preanalyze_fresh),
+        ]
+
+    # --- Execução ---
+    def run(self, only=None):
+        # only: nomes dos passos a rodar (padrão: todos). Retorna {passo: status}
+        steps = [s for s in self.steps if not only or s.name in only]
+        run_id = new_run_id()
+        statuses = {}
+        self.renderer.message(f"Rotina diária {run_id}: {', '.join(s.name for s in step_order(steps))}")
+        try:
+            for step in step_order(steps):
+                started = time.time()
+                status, detail = self._run_step(step, statuses)
+                statuses[step.name] = status
+                metrics.incr(f"daily.{status}")
+                self.db.log_pipeline_step(run_id, step.name, status, started, time.time(), detail)
+                text = detail.get('reason') or detail.get('error') or ", ".join(
+                    f"{k}={v}" for k, v in detail.items() if k != "version")
+                line = f"[{step.name}] {status}" + (f": {text}" if text else "")
+                if status in ("failed", "blocked"):
+                    self.renderer.error(line)
+                else:
+                    self.renderer.message(line)
+        finally:
+            if self._scraper is not None:
+                self._scraper.stop()
+                self._scraper = None
+            self.db.flush()
+        return statuses
+
+    def _run_step(self, step, statuses):
+        failed = [d for d in step.deps if statuses.get(d) in ("failed", "blocked")]
+        if failed:
+            return "blocked", {"reason": f"depende de {', '.join(failed)}"}
+        if step.name not in self.force and step.fresh is not None:
+            reason = step.fresh()
+            if reason:
+                return "skipped", {"reason": reason}
+        try:
+            with metrics.timer(f"daily.{step.name}"):
+                return "ok", step.run() or {}
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            first_line = (str(e).splitlines() or [""])[0]
+            return "failed", {"error": f"{type(e).__name__}: {first_line}"}
+
+    def last_ok(self, step):
+        runs = self.db.get_pipeline_runs(step=step, status="ok", limit=1)
+        return runs[0] if runs else None
+
+    def scraper(self):
+        # Browser da thread principal (fixtures/preanalyze), aberto só se algum passo precisar
+        if self._scraper is None:
+            from src.database.archive import RawArchive
+            from src.scrapers.sofascore import SofaScoreScraper
+
+            self._scraper = SofaScoreScraper(headless=True, verbose=False, circuit_wait=True, archive=RawArchive())
+            self._scraper.start()
+        return self._scraper
+
+    def season_ids(self):
+        # (t_id, s_id) do último sync/fixtures; sem eles, busca na API
+        for step in ("sync", "fixtures"):
+            last = self.last_ok(step)
+            if last and last['detail'].get('season_id'):
+                return last['detail']['tournament_id'], last['detail']['season_id']
+        scraper = self.scraper()
+        t_id = scraper.get_tournament_id(self.query)
+        s_id = scraper.get_season_id(t_id, self.year) if t_id else None
+        if not s_id:
+            raise RuntimeError(f"Torneio/temporada não encontrado: {self.query} {self.year}")
+        return t_id, s_id
+
+    # --- sync: rodadas ainda incompletas + fila de re-busca ---
+    def sync_fresh(self):
+        last = self.last_ok("sync")
+        if last and time.time() - last['finished_at'] < self.sync_interval:
+            return f"último sync há {_ago(last['finished_at'])}"
+        return None
+
+    def sync(self):
+        import asyncio
+        from src.database.archive import RawArchive
+        from src.ingestion_stream import SeasonStream
+        from src.scrapers.sofascore import SofaScoreScraper
+
+        scraper = SofaScoreScraper(headless=True, verbose=False, circuit_wait=True, archive=RawArchive())
+        stream = SeasonStream(scraper, self.db, self.renderer)
+        asyncio.run(stream.sync(self.query, self.year, incremental=True))
+        if stream.interrupted:
+            raise KeyboardInterrupt
+        if stream.season is None:
+            raise RuntimeError(f"Torneio/temporada não encontrado: {self.query} {self.year}")
+        t_id, s_id = stream.season
+        return {"tournament_id": t_id, "season_id": s_id, "saved": stream.counts["saved"],
+                "missing": stream.counts["missing"]}
+
+    # --- settle: confere previsões de jogos encerrados ---
+    def settle(self):
+        settled = self.db.check_predictions(verbose=False)
+        greens = sum(1 for *_, status in settled if status == 'GREEN')
+        pushes = sum(1 for *_, status in settled if status == 'PUSH')
+        return {"settled": len(settled), "green": greens, "red": len(settled) - greens - pushes, "push": pushes}
+
+    # --- retrain: só com jogos novos suficientes desde o último treino ---
+    def retrain_fresh(self):
+        last = self.last_ok("retrain")
+        if last is None or not any(os.path.exists(p) for p in MODEL_PATHS):
+            return None
+        new = len(self.db.get_stats_match_ids()) - last['detail'].get('stats', 0)
+        if new < self.min_new_matches:
+            return f"{new} jogos novos desde o último treino (mínimo {self.min_new_matches})"
+        return None
+
+    def retrain(self):
+        from src.ml.feature_engineering import prepare_full_training_data
+        from src.ml.model import MultiTargetPredictor, target_matrix
+
+        n_stats = len(self.db.get_stats_match_ids())
+        X, y, df_processed = prepare_full_training_data(self.db.get_historical_data())
+        if X.empty:
+            raise RuntimeError("Banco de dados vazio")
+        MultiTargetPredictor().train(X, target_matrix(df_processed))
+        return {"stats": n_stats, "rows": len(X)}
+
+    # --- fixtures: jogos dos próximos N dias (status 'notstarted') ---
+    def fixtures_fresh(self):
+        last = self.last_ok("fixtures")
+        if (last and time.time() - last['finished_at'] < FIXTURES_INTERVAL
+                and last['detail'].get('days', 0) >= self.days):
+            return f"próximos jogos buscados há {_ago(last['finished_at'])}"
+        return None
+
+    def fixtures(self):
+        from src.scrapers.parsing import event_to_match_data
+
+        t_id, s_id = self.season_ids()
+        scraper = self.scraper()
+        now = time.time()
+        horizon = now + self.days * 86400
+        fixtures = []
+        for page in range(MAX_FIXTURE_PAGES):
+            data = scraper._fetch_api(UPCOMING_API.format(t_id, s_id, page))
+            if data is None and page == 0:
+                raise RuntimeError("Próximos jogos indisponíveis")
+            events = (data or {}).get('events', [])
+            for ev in events:
+                if (ev.get('status', {}).get('type') == 'notstarted'
+                        and now <= ev.get('startTimestamp', 0) < horizon):
+                    fixtures.append(event_to_match_data(ev, season_id=s_id))
+            # A lista vem em ordem de data: para ao passar do horizonte
+            if not data or not data.get('hasNextPage') or any(ev.get('startTimestamp', 0) >= horizon for ev in events):
+                break
+        self.db.save_matches(fixtures)
+        self.db.flush()
+        return {"tournament_id": t_id, "season_id": s_id, "fixtures": len(fixtures), "days": self.days}
+
+    # --- preanalyze: análises prontas (predictions) para os próximos jogos ---
+    def data_version(self):
+        # Muda com estatísticas novas ou modelo retreinado
+        ids = self.db.get_stats_match_ids()
+        mtimes = [int(os.path.getmtime(p)) for p in MODEL_PATHS if os.path.exists(p)]
+        return [len(ids), max(ids, default=0), max(mtimes, default=0), str(self.seed)]
+
+    def _pending_fixtures(self):
+        # (jogos da janela, jogos a analisar, versão dos dados). Com a mesma versão da
+        # última pré-análise, jogos que já têm previsões ficam como estão.
+        now = time.time()
+        upcoming = self.db.get_upcoming_matches(now, now + self.days * 86400)
+        version = self.data_version()
+        last = self.last_ok("preanalyze")
+        if last is None or last['detail'].get('version') != version or "preanalyze" in self.force:
+            return upcoming, upcoming, version
+        return upcoming, [m for m in upcoming if not self.db.get_predictions(m['match_id'])], version
+
+    def preanalyze_fresh(self):
+        upcoming, todo, _ = self._pending_fixtures()
+        if upcoming and not todo:
+            return f"{len(upcoming)} análises em dia (mesmos dados e modelo)"
+        return None
+
+    def preanalyze(self):
+        from src.analysis.pipeline import prepare_fixture, save_analysis, score_fixtures
+        from src.analysis.statistical import StatisticalAnalyzer
+        from src.ingestion import ensure_team_history
+        from src.ml.feature_engineering import FeatureBuilder
+        from src.ml.model import load_predictor
+
+        upcoming, todo, version = self._pending_fixtures()
+        if not todo:
+            return {"fixtures": len(upcoming), "analyzed": 0, "version": version}
+
+        # Cold start dos times (só abre o browser se faltar histórico), depois um histórico
+        # para todos. Como na análise, contam os jogos em qualquer competição.
+        teams = {m['home_team_id'] for m in todo} | {m['away_team_id'] for m in todo}
+        for team_id in sorted(teams):
+            if self.db.count_team_matches(team_id) < 10:
+                ensure_team_history(self.scraper(), self.db, team_id, n=10)
+        self.db.flush()
+
+        history = self.db.get_historical_data()
+        if history.empty:
+            raise RuntimeError("Banco de dados vazio")
+        features = FeatureBuilder()
+        features.update_many(history)
+        analyzer = StatisticalAnalyzer(seed=self.seed)
+        predictor = load_predictor()
+
+        jobs = []
+        for m in todo:
+            match_data = {
+                'id': m['match_id'], 'season_id': m['season_id'], 'timestamp': m['start_timestamp'],
+                'home_id': m['home_team_id'], 'home_name': m['home_team_name'],
+                'away_id': m['away_team_id'], 'away_name': m['away_team_name'],
+            }
+            job = prepare_fixture(match_data, history, analyzer, predictor=predictor, features=features)
+            if job is not None:
+                jobs.append(job)
+        insufficient = len(todo) - len(jobs)
+        # Simulação de todos os jogos de uma vez (pool de processos com muitos jogos)
+        for result in score_fixtures(jobs, analyzer):
+            save_analysis(self.db, result)
+        analyzed = len(jobs)
+        self.db.flush()
+        # Jogos sem histórico suficiente ficam sem previsões e voltam na próxima execução
+        return {"fixtures": len(upcoming), "analyzed": analyzed, "insufficient": insufficient, "version": version}
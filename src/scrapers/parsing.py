@@ -0,0 +1,139 @@
+# Conversão dos payloads da API do SofaScore para o formato do banco.
+# Funções puras (sem browser/rede) para poderem ser reutilizadas fora do scraper.
+
+
+def event_to_match_data(ev, season_id=None, status=None):
+    # ev: objeto 'event' da API (/event/{id} ou /events/round/{n})
+    return {
+        'id': ev['id'],
+        'tournament': ev.get('tournament', {}).get('name', 'Unknown'),
+        'season_id': season_id if season_id is not None else ev.get('season', {}).get('id', 0),
+        'round': ev.get('roundInfo', {}).get('round', 0),
+        'status': status or ev.get('status', {}).get('type', 'finished'),
+        'timestamp': ev.get('startTimestamp', 0),
+        'home_id': ev['homeTeam']['id'],
+        'home_name': ev['homeTeam']['name'],
+        'away_id': ev['awayTeam']['id'],
+        'away_name': ev['awayTeam']['name'],
+        'home_score': ev.get('homeScore', {}).get('display', 0),
+        'away_score': ev.get('awayScore', {}).get('display', 0)
+    }
+
+
+_STAT_KEYWORDS = {
+    'corners': ('corner', 'escanteio'),
+    'shots_ot': ('shots on target', 'chutes no gol'),
+}
+
+
+def _period_items(groups):
+    # Uma passada pelos itens do período: o primeiro item que casa com cada estatística
+    found = {}
+    for g in groups or []:
+        for item in g['statisticsItems']:
+            name = item['name'].lower()
+            for stat, keywords in _STAT_KEYWORDS.items():
+                if stat not in found and any(k in name for k in keywords):
+                    found[stat] = item
+            if len(found) == len(_STAT_KEYWORDS):
+                return found
+    return found
+
+
+def _item_val(item, is_home):
+    if item is None: return 0
+    try:
+        return int(item['home' if is_home else 'away'])
+    except:
+        return 0
+
+
+def empty_match_stats():
+    # Jogo que ainda não começou (modo ao vivo): tudo zerado de verdade
+    return {
+        'corners_home_ft': 0, 'corners_away_ft': 0,
+        'corners_home_ht': 0, 'corners_away_ht': 0,
+        'shots_ot_home_ft': 0, 'shots_ot_away_ft': 0,
+        'shots_ot_home_ht': 0, 'shots_ot_away_ht': 0
+    }
+
+
+def parse_match_stats(data):
+    # data: resposta de /event/{id}/statistics
+    # None quando a resposta não veio ou não tem o período ALL: dado ausente não
+    # vira zeros no banco (o jogo vai para a fila de re-busca)
+    if not data or 'statistics' not in data:
+        return None
+
+    # Periods
+    stats_all = next((p['groups'] for p in data['statistics'] if p['period'] == 'ALL'), [])
+    stats_1st = next((p['groups'] for p in data['statistics'] if p['period'] == '1ST'), [])
+    if not stats_all:
+        return None
+    stats = empty_match_stats()
+
+    items_all = _period_items(stats_all)
+    items_1st = _period_items(stats_1st)
+    for stat in _STAT_KEYWORDS:
+        stats[f'{stat}_home_ft'] = _item_val(items_all.get(stat), True)
+        stats[f'{stat}_away_ft'] = _item_val(items_all.get(stat), False)
+        stats[f'{stat}_home_ht'] = _item_val(items_1st.get(stat), True)
+        stats[f'{stat}_away_ht'] = _item_val(items_1st.get(stat), False)
+
+    return stats
+
+
+def parse_stats_result(result):
+    # FetchResult de /statistics -> (stats | None, permanente). Permanente: 404/4xx ou
+    # resposta completa sem o período ALL (o jogo não tem estatísticas; não adianta
+    # repetir). Falhas transitórias (timeout, 429, 5xx...) voltam para a re-busca.
+    stats = parse_match_stats(result.data)
+    return stats, stats is None and not result.missing
+
+
+# Odds: /event/{id}/odds/1/all. marketName da API -> mercado do catálogo (src/analysis/markets.py)
+ODDS_MARKET_NAMES = {
+    "corners 2-way": "JOGO COMPLETO",
+    "total corners": "JOGO COMPLETO",
+    "match corners": "JOGO COMPLETO",
+    "1st half corners": "1º TEMPO (HT)",
+    "first half corners": "1º TEMPO (HT)",
+    "2nd half corners": "2º TEMPO (FT)",
+    "home team corners": "TOTAL MANDANTE",
+    "away team corners": "TOTAL VISITANTE",
+}
+
+
+def odd_value(choice):
+    # Odd decimal de uma escolha da API (decimalValue ou fracionária "4/5" -> 1.8)
+    if choice.get('decimalValue'):
+        return float(choice['decimalValue'])
+    frac = choice.get('fractionalValue')
+    if not frac:
+        return None
+    num, _, den = str(frac).partition('/')
+    try:
+        return 1 + float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_event_odds(data, match_id, market_names=ODDS_MARKET_NAMES, bookmaker="sofascore"):
+    # Linhas Over/Under de escanteios no formato de DBManager.save_odds (mercados
+    # fora de market_names e escolhas sem odd válida são ignorados)
+    rows = []
+    for m in (data or {}).get('markets', []):
+        market = market_names.get(str(m.get('marketName', '')).lower())
+        if market is None:
+            continue
+        try:
+            line = float(m.get('choiceGroup'))
+        except (TypeError, ValueError):
+            continue
+        for choice in m.get('choices', []):
+            kind = {'over': 'OVER', 'under': 'UNDER'}.get(str(choice.get('name', '')).lower())
+            odd = odd_value(choice)
+            if kind and odd and odd > 1:
+                rows.append({'match_id': match_id, 'market': market, 'line': line, 'kind': kind, 'odd': odd,
+                             'bookmaker': bookmaker, 'source': 'sofascore'})
+    return rows
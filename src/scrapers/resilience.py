@@ -0,0 +1,204 @@
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from src.instrumentation import metrics
+
+# Camada de resiliência das requisições ao SofaScore (sem browser/rede: só política).
+# - classify: status HTTP / erro -> tipo de falha
+# - AIMDRateLimiter: ritmo adaptativo. Sobe um pouco a cada segundo sem erro
+#   (aditivo) e cai 30% quando o upstream limita (429/403) (multiplicativo)
+# - CircuitBreaker: depois de N falhas seguidas para de bater no upstream por um
+#   tempo; em seguida deixa passar uma requisição de teste (half-open)
+# - backoff_delay: espera exponencial com jitter completo entre tentativas
+
+OK = "ok"
+NOT_FOUND = "not_found"      # 404: o recurso não existe (não adianta repetir)
+THROTTLED = "throttled"      # 429
+FORBIDDEN = "forbidden"      # 403: no SofaScore costuma ser bloqueio temporário por excesso
+SERVER_ERROR = "server_error"  # 5xx
+TIMEOUT = "timeout"
+NETWORK = "network"          # erro de rede / JSON inválido
+CLIENT_ERROR = "client_error"  # outros 4xx
+CIRCUIT_OPEN = "circuit_open"  # não enviada: circuito aberto
+
+RETRYABLE = (THROTTLED, FORBIDDEN, SERVER_ERROR, TIMEOUT, NETWORK)
+THROTTLING = (THROTTLED, FORBIDDEN)
+
+
+def classify(status, error=None):
+    # status: código HTTP (0/None quando a requisição nem completou); error: 'timeout' | texto
+    if error == "timeout":
+        return TIMEOUT
+    if not status:
+        return NETWORK
+    if 200 <= status < 300:
+        return OK if error is None else NETWORK
+    if status == 404:
+        return NOT_FOUND
+    if status == 429:
+        return THROTTLED
+    if status == 403:
+        return FORBIDDEN
+    if status >= 500:
+        return SERVER_ERROR
+    return CLIENT_ERROR
+
+
+class FetchResult:
+    __slots__ = ("url", "status", "kind", "data", "attempts", "retry_after")
+
+    def __init__(self, url, status=0, kind=NETWORK, data=None, attempts=1, retry_after=None):
+        self.url = url
+        self.status = status
+        self.kind = kind
+        self.data = data
+        self.attempts = attempts
+        self.retry_after = retry_after
+
+    @property
+    def ok(self):
+        return self.kind == OK
+
+    @property
+    def missing(self):
+        # Falha transitória: o dado existe mas não veio (volta para a fila de re-busca)
+        return self.kind not in (OK, NOT_FOUND, CLIENT_ERROR)
+
+
+def retry_after_seconds(value, now=None):
+    # Retry-After em segundos ("120") ou data HTTP ("Wed, 21 Oct 2026 07:28:00 GMT").
+    # Valor ilegível -> None (fica o backoff calculado)
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None or when.tzinfo is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    # Jitter completo (uniforme entre 0 e o teto exponencial); Retry-After é o piso
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    retry_after = retry_after_seconds(retry_after)
+    if retry_after:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+class AIMDRateLimiter:
+    def __init__(self, rate=1.0, min_rate=0.1, max_rate=5.0, increase=0.5, decrease=0.7, jitter=0.1,
+                 cooldown=2.0):
+        # rate em requisições/s; increase: req/s somados a cada segundo sem limitação;
+        # decrease: fator por limitação; cooldown: vários 429 do mesmo lote/janela
+        # contam como um único corte
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.cooldown = cooldown
+        self._next = 0.0
+        self._last_decrease = None
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        # Reserva n vagas no ritmo atual e dorme até a primeira delas
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            spacing = n / self.rate
+            # Jitter só para cima: desencontra os disparos sem passar do ritmo
+            self._next = start + spacing * random.uniform(1, 1 + self.jitter)
+        wait = start - now
+        if wait > 0:
+            metrics.record("scraper.rate_wait", wait)
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        # rate sucessos por segundo -> +increase req/s por segundo (aditivo no tempo)
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def burst(self, limit):
+        # Requisições concorrentes por lote: ~meio segundo do ritmo atual, para uma
+        # janela de 1s do upstream nunca receber dois lotes cheios de uma vez
+        return max(1, min(limit, int(self.rate / 2)))
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            retry_after = retry_after_seconds(retry_after)
+            if retry_after:
+                # Ninguém sai antes do prazo pedido pelo upstream
+                self._next = max(self._next, now + retry_after)
+            if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        metrics.incr("scraper.rate_decreases")
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=8, reset_timeout=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe = False
+            if self.state == self.HALF_OPEN and not self._probe:
+                # Uma única requisição de teste por vez
+                self._probe = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    metrics.incr("scraper.circuit_opened")
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self._probe = False
+
+    def remaining(self):
+        # Segundos até o circuito aberto aceitar a requisição de teste
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    @property
+    def is_open(self):
+        return self.remaining() > 0
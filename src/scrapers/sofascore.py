@@ -1,15 +1,56 @@
 import time
-import random
-from playwright.sync_api import sync_playwright
+
+from src.instrumentation import metrics
+from src.scrapers.parsing import parse_match_stats, parse_stats_result
+from src.scrapers.resilience import (
+    CIRCUIT_OPEN, NOT_FOUND, OK, RETRYABLE, THROTTLING,
+    AIMDRateLimiter, CircuitBreaker, FetchResult, backoff_delay, classify,
+)
+
+# fetch() no browser com timeout; devolve {status, data | error, retryAfter}
+_FETCH_JS = """
+    async (url, timeoutMs) => {
+        const ctrl = new AbortController();
+        const timer = setTimeout(() => ctrl.abort(), timeoutMs);
+        try {
+            const r = await fetch(url, {signal: ctrl.signal});
+            const retryAfter = r.headers.get('Retry-After');
+            if (r.status !== 200) return {status: r.status, retryAfter};
+            return {status: r.status, data: await r.json()};
+        } catch (e) {
+            return {status: 0, error: e.name === 'AbortError' ? 'timeout' : String(e)};
+        } finally {
+            clearTimeout(timer);
+        }
+    }
+"""
+_FETCH_ONE_JS = f"([url, timeoutMs]) => ({_FETCH_JS})(url, timeoutMs)"
 
 class SofaScoreScraper:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, verbose=True, max_retries=4, timeout=15.0, batch_size=8,
+                 circuit_wait=False, rate_limiter=None, breaker=None, archive=None):
+        # batch_size: requisições concorrentes por ida ao browser em fetch_many
+        # archive: RawArchive que guarda toda resposta bem-sucedida (reprocessamento offline)
+        # circuit_wait: com o circuito aberto, espera ele reabrir (jobs longos) em vez
+        # de falhar na hora (serviço / uso interativo)
         self.headless = headless
+        self.verbose = verbose
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.circuit_wait = circuit_wait
+        self.rate = rate_limiter or AIMDRateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.archive = archive
         self.playwright = None
         self.browser = None
         self.page = None
+        self._prefetched = set()
 
     def start(self):
+        # Import tardio: quem só lê o banco não paga o custo do Playwright
+        from playwright.sync_api import sync_playwright
+
         self.playwright = sync_playwright().start()
         self.browser = self.playwright.chromium.launch(headless=self.headless)
         self.page = self.browser.new_page()
@@ -25,30 +66,89 @@ class SofaScoreScraper:
         if self.playwright:
             self.playwright.stop()
 
+    def _log(self, text):
+        if self.verbose:
+            print(text)
+
+    def _result(self, url, raw):
+        raw = raw or {}
+        status = raw.get('status') or 0
+        kind = classify(status, raw.get('error'))
+        if kind == OK and raw.get('data') is None:
+            kind = classify(status, 'json')
+        if kind == OK and self.archive is not None:
+            self.archive.put(url, raw['data'])
+        return FetchResult(url, status=status, kind=kind, data=raw.get('data') if kind == OK else None,
+                           retry_after=raw.get('retryAfter'))
+
+    def _observe(self, result):
+        # Alimenta o ritmo (AIMD) e o circuito com o resultado; 404 conta como upstream saudável
+        metrics.incr(f"scraper.result.{result.kind}")
+        if result.kind in (OK, NOT_FOUND):
+            self.rate.on_success()
+            self.breaker.record_success()
+            return
+        metrics.incr("scraper.failures")
+        if result.kind in THROTTLING:
+            self.rate.on_throttle(result.retry_after)
+        if result.kind in RETRYABLE:
+            self.breaker.record_failure()
+
+    def _allow(self):
+        if self.breaker.allow():
+            return True
+        if self.circuit_wait:
+            wait = self.breaker.remaining()
+            self._log(f"Upstream instável, circuito aberto: aguardando {wait:.0f}s...")
+            time.sleep(wait)
+            return self.breaker.allow()
+        return False
+
+    def _request(self, url):
+        start = time.perf_counter()
+        raw = self.page.evaluate(_FETCH_ONE_JS, [url, self.timeout * 1000])
+        elapsed = time.perf_counter() - start
+
+        metrics.record("scraper.fetch", elapsed)
+        metrics.observe("scraper.fetch_latency_ms", elapsed * 1000)
+        metrics.incr("scraper.requests")
+        return self._result(url, raw)
+
+    def fetch(self, url):
+        # Uma URL com ritmo adaptativo, retentativas com backoff e circuit breaker.
+        # Retorna FetchResult; result.missing indica falha transitória (buscar de novo depois)
+        result = FetchResult(url, kind=CIRCUIT_OPEN, attempts=0)
+        for attempt in range(self.max_retries + 1):
+            if not self._allow():
+                metrics.incr("scraper.circuit_rejected")
+                result.kind = CIRCUIT_OPEN
+                return result
+            self.rate.acquire()
+            result = self._request(url)
+            result.attempts = attempt + 1
+            self._observe(result)
+            if result.kind not in RETRYABLE:
+                return result
+            if attempt < self.max_retries:
+                metrics.incr("scraper.retries")
+                time.sleep(backoff_delay(attempt, retry_after=result.retry_after))
+        return result
+
     def _fetch_api(self, url):
-        time.sleep(random.uniform(0.5, 1.5)) # Rate limiting
-        script = f"""
-            async () => {{
-                try {{
-                    const r = await fetch('{url}');
-                    if (r.status !== 200) return null;
-                    return await r.json();
-                }} catch {{ return null; }}
-            }}
-        """
-        return self.page.evaluate(script)
+        # Compatível com o código antigo: só o JSON (None se não veio)
+        return self.fetch(url).data
 
     def get_tournament_id(self, query="Brasileirão"):
         # Search for the tournament to get ID and Season ID
         url = f"https://www.sofascore.com/api/v1/search/{query}"
-        print(f"Buscando torneio: {query}...")
+        self._log(f"Buscando torneio: {query}...")
         data = self._fetch_api(url)
         
         if data and 'results' in data:
             for item in data['results']:
                 if item['type'] == 'uniqueTournament':
                     entity = item['entity']
-                    print(f"Encontrado: {entity['name']} (ID: {entity['id']})")
+                    self._log(f"Encontrado: {entity['name']} (ID: {entity['id']})")
                     if query.lower() in entity['name'].lower() or entity['name'].lower() in query.lower():
                         return entity['id']
         return None
@@ -66,53 +166,182 @@ class SofaScoreScraper:
         matches = []
         # Rounds usually go from 1 to 38
         for round_num in range(1, 39):
-            print(f"Coletando rodada {round_num}...")
+            self._log(f"Coletando rodada {round_num}...")
             url = f"https://www.sofascore.com/api/v1/unique-tournament/{tournament_id}/season/{season_id}/events/round/{round_num}"
-            data = self._fetch_api(url)
+            result = self.fetch(url)
+            if result.missing:
+                self._log(f"Rodada {round_num} indisponível ({result.kind}).")
+            data = result.data
             if data and 'events' in data:
                 for event in data['events']:
                     matches.append(event)
         return matches
 
+    def get_round_events_many(self, tournament_id, season_id, rounds):
+        # Eventos de várias rodadas num lote concorrente (None onde a rodada não veio)
+        base = f"https://www.sofascore.com/api/v1/unique-tournament/{tournament_id}/season/{season_id}/events/round"
+        out = []
+        for round_num, result in zip(rounds, self._collect([f"{base}/{n}" for n in rounds])):
+            if result.missing:
+                self._log(f"Rodada {round_num} indisponível ({result.kind}).")
+                out.append(None)
+            else:
+                out.append((result.data or {}).get('events', []))
+        return out
+
     def get_match_stats(self, match_id):
+        # None se as estatísticas não vieram (nunca um dict de zeros)
         url = f"https://www.sofascore.com/api/v1/event/{match_id}/statistics"
-        data = self._fetch_api(url)
-        
-        stats = {
-            'corners_home_ft': 0, 'corners_away_ft': 0,
-            'corners_home_ht': 0, 'corners_away_ht': 0,
-            'shots_ot_home_ft': 0, 'shots_ot_away_ft': 0,
-            'shots_ot_home_ht': 0, 'shots_ot_away_ht': 0
-        }
+        return parse_match_stats(self._fetch_api(url))
 
-        if not data or 'statistics' not in data:
-            return stats
-
-        def extract_val(groups, keywords, is_home):
-            if not groups: return 0
-            for g in groups:
-                for item in g['statisticsItems']:
-                    if any(k in item['name'].lower() for k in keywords):
-                        try:
-                            return int(item['home' if is_home else 'away'])
-                        except:
-                            return 0
-            return 0
-
-        # Periods
-        stats_all = next((p['groups'] for p in data['statistics'] if p['period'] == 'ALL'), [])
-        stats_1st = next((p['groups'] for p in data['statistics'] if p['period'] == '1ST'), [])
-        
-        # Corners
-        stats['corners_home_ft'] = extract_val(stats_all, ['corner', 'escanteio'], True)
-        stats['corners_away_ft'] = extract_val(stats_all, ['corner', 'escanteio'], False)
-        stats['corners_home_ht'] = extract_val(stats_1st, ['corner', 'escanteio'], True)
-        stats['corners_away_ht'] = extract_val(stats_1st, ['corner', 'escanteio'], False)
-        
-        # Shots on Target
-        stats['shots_ot_home_ft'] = extract_val(stats_all, ['shots on target', 'chutes no gol'], True)
-        stats['shots_ot_away_ft'] = extract_val(stats_all, ['shots on target', 'chutes no gol'], False)
-        stats['shots_ot_home_ht'] = extract_val(stats_1st, ['shots on target', 'chutes no gol'], True)
-        stats['shots_ot_away_ht'] = extract_val(stats_1st, ['shots on target', 'chutes no gol'], False)
+    def fetch_match_stats_many(self, match_ids):
+        # Respostas cruas (FetchResult) de /statistics num lote concorrente, sem parse
+        return self._collect([f"https://www.sofascore.com/api/v1/event/{mid}/statistics" for mid in match_ids])
+
+    def get_match_stats_many(self, match_ids):
+        # Estatísticas de vários jogos num lote concorrente (None onde não vieram)
+        return [parse_match_stats(r.data) for r in self.fetch_match_stats_many(match_ids)]
+
+    # --- Histórico por time (paginação preguiçosa + prefetch de estatísticas) ---
+
+    def _prefetch(self, urls):
+        # Dispara os fetches no browser sem aguardar; o resultado fica em window.__prefetch.
+        # Cada URL consome uma vaga do ritmo adaptativo na hora do disparo.
+        urls = [u for u in urls if u not in self._prefetched]
+        if not urls or not self.breaker.allow():
+            return
+        for url in urls:
+            self.rate.acquire()
+            self._prefetched.add(url)
+        self.page.evaluate("""
+            ([urls, timeoutMs, fetchJs]) => {
+                window.__fetchOne = window.__fetchOne || eval('(' + fetchJs + ')');
+                window.__prefetch = window.__prefetch || {};
+                for (const u of urls) {
+                    if (!(u in window.__prefetch)) {
+                        window.__prefetch[u] = window.__fetchOne(u, timeoutMs);
+                    }
+                }
+            }
+        """, [urls, self.timeout * 1000, _FETCH_JS])
+
+    def _collect(self, urls, retry=True):
+        # Aguarda (em paralelo) os fetches disparados por _prefetch; os que não foram
+        # disparados saem agora, em lotes (até batch_size) no ritmo adaptativo. Falhas
+        # transitórias são repetidas uma a uma por fetch() (backoff + circuito);
+        # retry=False devolve a falha na hora (quem chama tem o próprio backoff).
+        # Enquanto um lote está em voo o próximo já é disparado: a espera do ritmo
+        # se sobrepõe à latência da rede.
+        # Retorna [FetchResult] na ordem de urls.
+        results = {}
+        i = 0
+        # Lote limitado pelo ritmo atual (sem rajadas)
+        size = self.rate.burst(self.batch_size)
+        while i < len(urls):
+            batch = urls[i:i + size]
+            i += size
+            size = self.rate.burst(self.batch_size)
+            self._prefetch(batch)
+            self._prefetch(urls[i:i + size])
+            results.update(self._collect_batch(batch, retry))
+        return [results[u] for u in urls]
+
+    def _collect_batch(self, urls, retry=True):
+        results = {}
+        fresh = [u for u in urls if u not in self._prefetched]
+        if fresh and not self._allow():
+            metrics.incr("scraper.circuit_rejected", len(fresh))
+            for u in fresh:
+                results[u] = FetchResult(u, kind=CIRCUIT_OPEN, attempts=0)
+            urls = [u for u in urls if u not in results]
+        elif fresh:
+            self.rate.acquire(len(fresh))
+        if not urls:
+            return results
+
+        start = time.perf_counter()
+        raws = self.page.evaluate("""
+            async ([urls, timeoutMs, fetchJs]) => {
+                window.__fetchOne = window.__fetchOne || eval('(' + fetchJs + ')');
+                const pending = window.__prefetch || {};
+                const out = await Promise.all(urls.map(u => pending[u] || window.__fetchOne(u, timeoutMs)));
+                urls.forEach(u => delete pending[u]);
+                return out;
+            }
+        """, [urls, self.timeout * 1000, _FETCH_JS])
+        metrics.record("scraper.collect", time.perf_counter() - start)
+        metrics.incr("scraper.requests", len(urls))
+        self._prefetched.difference_update(urls)
+
+        for url, raw in zip(urls, raws):
+            result = self._result(url, raw)
+            self._observe(result)
+            if retry and result.kind in RETRYABLE:
+                metrics.incr("scraper.retries")
+                result = self.fetch(url)
+            results[url] = result
+        return results
+
+    def fetch_many(self, urls, retry=True):
+        # Várias requisições concorrentes em uma única ida ao browser (None onde falhou).
+        # retry=False: sem retentativas com backoff (polling ao vivo: um jogo instável
+        # não pode segurar o ciclo dos outros)
+        return [r.data for r in self._collect(urls, retry=retry)]
+
+    def iter_team_events(self, team_id, max_pages=10):
+        # Gerador: busca /team/{id}/events/last/{pag} só quando o consumidor pede mais jogos
+        for pag in range(max_pages):
+            data = self._fetch_api(f"https://www.sofascore.com/api/v1/team/{team_id}/events/last/{pag}")
+            if not data or 'events' not in data:
+                return
+            # A API devolve cada página do mais antigo para o mais recente
+            for event in reversed(data['events']):
+                yield event
+            if not data.get('hasNextPage', True):
+                return
+
+    def collect_team_history(self, team_id, n=10, tournament_id=None, tournament_keyword=None,
+                             venue=None, known_ids=None, max_pages=10):
+        # Coleta os N jogos mais recentes que passam nos filtros, parando a paginação
+        # assim que N são encontrados. As estatísticas dos jogos que ainda não estão em
+        # known_ids (ex: ids já em match_stats) são buscadas em paralelo enquanto as
+        # próximas páginas ainda estão sendo lidas.
+        # venue: 'home' | 'away' | None
+        # Retorna [(event, stats | None, permanente)]; stats None = já conhecido (em
+        # known_ids) ou busca falhou (dado ausente, nunca zeros): quem chama distingue por
+        # known_ids. permanente: falha que não adianta repetir (ver parse_stats_result)
+        known_ids = known_ids or set()
+        selected = []
+        to_fetch = []
+
+        for e in self.iter_team_events(team_id, max_pages=max_pages):
+            if e.get('status', {}).get('type') != 'finished':
+                continue
+
+            unique = e.get('tournament', {}).get('uniqueTournament', {})
+            if tournament_id is not None and unique.get('id') != tournament_id:
+                continue
+            if tournament_keyword and tournament_keyword.lower() not in unique.get('name', '').lower():
+                continue
+
+            is_home = e['homeTeam']['id'] == team_id
+            if venue == 'home' and not is_home:
+                continue
+            if venue == 'away' and is_home:
+                continue
+
+            selected.append(e)
+            if e['id'] not in known_ids:
+                url = f"https://www.sofascore.com/api/v1/event/{e['id']}/statistics"
+                to_fetch.append((e['id'], url))
+                self._prefetch([url])
+
+            if len(selected) >= n:
+                break
+
+        fetched = {}
+        if to_fetch:
+            results = self._collect([url for _, url in to_fetch])
+            fetched = {match_id: parse_stats_result(r) for (match_id, _), r in zip(to_fetch, results)}
 
-        return stats
+        return [(e, *fetched.get(e['id'], (None, False))) for e in selected]
@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.analysis.pipeline import analyze_fixture, load_analysis, save_analysis
+from src.analysis.statistical import StatisticalAnalyzer
+from src.database.db_manager import DBManager
+from src.ingestion import store_history
+from src.scrapers.parsing import event_to_match_data
+
+# Serviço HTTP/JSON local com estado quente (asyncio, sem dependências extras).
+#
+#   GET  /health
+#   POST /analyze          {"match_id": 123, "refresh": false}
+#   POST /batch-analyze    {"match_ids": [1, 2, 3]}
+#   GET  /retrieve/<id>
+#   POST /settle
+#
+# Mantidos em memória: conexão do DBManager, CornerPredictor carregado, histórico
+# (get_historical_data), FeatureBuilder já alimentado com ele, sessão do scraper e
+# cache de análises. Pedidos simultâneos do mesmo jogo compartilham uma única
+# computação (coalescing).
+#
+# Threads: o Playwright síncrono e a conexão SQLite só podem ser usados na thread
+# que os criou, então cada um tem seu executor de thread única.
+
+API = "https://www.sofascore.com/api/v1/event"
+
+
+class PredictionService:
+    def __init__(self, db_path="data/football_data.db", cache_ttl=900, history_games=10, cache_size=1024):
+        # cache_size: análises em memória (LRU; as expiradas saem a cada gravação)
+        self.db_path = db_path
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.history_games = history_games
+
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self._scraper_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scraper")
+
+        # Estado quente (acessado só pelas threads dedicadas)
+        self._db = None
+        self._history = None
+        self._history_version = None
+        self._features = None
+        self._predictor = None
+        self._analyzer = StatisticalAnalyzer()
+        self._scraper = None
+
+        # Estado do event loop
+        self._cache = OrderedDict()  # match_id -> (timestamp, dict), do menos ao mais usado
+        self._inflight = {}  # match_id -> asyncio.Future
+
+    # --- Thread do banco ---
+
+    def _warm_db(self):
+        from src.ml.model import load_predictor
+
+        self._db = DBManager(self.db_path)
+        self._refresh_history()
+        self._predictor = load_predictor()
+
+    def _refresh_history(self):
+        # Recarrega histórico e features quando o banco mudou, inclusive por outro
+        # processo (sync do CLI, rotina diária): compara history_version, uma agregação
+        from src.ml.feature_engineering import FeatureBuilder
+
+        version = self._db.history_version()
+        if self._history is not None and version == self._history_version:
+            return
+        self._history = self._db.get_historical_data()
+        if self._features is None or not self._features.update_many(self._history):
+            # Mesmos jogos com estatísticas regravadas (reprocess, re-busca): do zero
+            self._features = FeatureBuilder()
+            self._features.update_many(self._history)
+        self._history_version = version
+
+    def _known_state(self, team_ids):
+        counts = {tid: self._db.count_team_matches(tid) for tid in team_ids}
+        return self._db.get_stats_match_ids() | self._db.get_dead_letter_ids(), counts
+
+    def _store_and_analyze(self, match_data, histories, known_ids):
+        # Falhas de busca vão para a fila de re-busca (store_history), não para o histórico
+        for history in histories:
+            store_history(self._db, history, known_ids)
+
+        self._db.save_match(match_data)
+        self._refresh_history()
+
+        result = analyze_fixture(match_data, self._history, self._analyzer, predictor=self._predictor,
+                                 features=self._features)
+        if result is None:
+            return None
+        save_analysis(self._db, result)
+        return result.to_dict()
+
+    def _retrieve(self, match_id):
+        return load_analysis(self._db, match_id).to_dict()
+
+    def _settle(self):
+        return self._db.check_predictions(verbose=False)
+
+    # --- Thread do scraper ---
+
+    def _ensure_scraper(self):
+        if self._scraper is None:
+            from src.database.archive import RawArchive
+            from src.scrapers.sofascore import SofaScoreScraper
+
+            self._scraper = SofaScoreScraper(headless=True, verbose=False, archive=RawArchive())
+            self._scraper.start()
+        return self._scraper
+
+    def _fetch_event(self, match_id):
+        data = self._ensure_scraper()._fetch_api(f"{API}/{match_id}")
+        if not data or 'event' not in data:
+            return None
+        return data['event']
+
+    def _fetch_histories(self, known_ids, counts):
+        # Sem filtro de torneio: counts (count_team_matches) e a análise usam os
+        # últimos jogos do time em qualquer competição
+        scraper = self._ensure_scraper()
+        histories = []
+        for team_id, count in counts.items():
+            if count >= self.history_games:
+                continue
+            histories.append(scraper.collect_team_history(team_id, n=self.history_games, known_ids=known_ids))
+        return histories
+
+    def _stop_scraper(self):
+        if self._scraper is not None:
+            self._scraper.stop()
+            self._scraper = None
+
+    # --- API assíncrona ---
+
+    async def _in_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    async def _in_scraper(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._scraper_executor, func, *args)
+
+    async def start(self):
+        await self._in_db(self._warm_db)
+
+    async def close(self):
+        await self._in_scraper(self._stop_scraper)
+        if self._db is not None:
+            await self._in_db(self._db.close)
+        self._db_executor.shutdown()
+        self._scraper_executor.shutdown()
+
+    async def analyze(self, match_id, refresh=False):
+        match_id = int(match_id)
+        cached = self._cache.get(match_id)
+        if cached and not refresh and time.time() - cached[0] < self.cache_ttl:
+            self._cache.move_to_end(match_id)
+            return cached[1]
+        if cached:
+            del self._cache[match_id]
+
+        # Coalescing: quem chegar com o mesmo jogo em andamento aguarda o mesmo Future
+        inflight = self._inflight.get(match_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[match_id] = future
+        try:
+            result = await self._compute(match_id)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marca como recuperada (evita aviso sem waiters)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            if result is not None:
+                self._cache_put(match_id, result)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(match_id, None)
+
+    def _cache_put(self, match_id, result):
+        now = time.time()
+        self._cache[match_id] = (now, result)
+        self._cache.move_to_end(match_id)
+        # Sem isso o serviço cresce sem limite: expiradas saem, e acima de cache_size
+        # sai a menos usada
+        for key in [k for k, (ts, _) in self._cache.items() if now - ts >= self.cache_ttl]:
+            del self._cache[key]
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _compute(self, match_id):
+        ev = await self._in_scraper(self._fetch_event, match_id)
+        if ev is None:
+            raise LookupError(f"Jogo {match_id} não encontrado.")
+
+        # Status real do evento: um jogo futuro continua fora do histórico e nos próximos jogos
+        match_data = event_to_match_data(ev)
+        known_ids, counts = await self._in_db(self._known_state, (match_data['home_id'], match_data['away_id']))
+        histories = await self._in_scraper(self._fetch_histories, known_ids, counts)
+        return await self._in_db(self._store_and_analyze, match_data, histories, known_ids)
+
+    async def batch_analyze(self, match_ids):
+        results = await asyncio.gather(*(self.analyze(mid) for mid in match_ids), return_exceptions=True)
+        out = {}
+        for mid, res in zip(match_ids, results):
+            out[str(mid)] = {"error": str(res)} if isinstance(res, Exception) else res
+        return out
+
+    async def retrieve(self, match_id):
+        return await self._in_db(self._retrieve, int(match_id))
+
+    async def settle(self):
+        settled = await self._in_db(self._settle)
+        return {"settled": len(settled)}
+
+    # --- HTTP ---
+
+    async def handle(self, method, path, body):
+        if not isinstance(body, dict):
+            raise ValueError("o corpo deve ser um objeto JSON")
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "cached": len(self._cache), "inflight": len(self._inflight)}
+        if method == "POST" and path == "/analyze":
+            if not isinstance(body["match_id"], (int, str)):
+                raise ValueError("match_id deve ser um número")
+            result = await self.analyze(body["match_id"], refresh=body.get("refresh", False))
+            if result is None:
+                return 422, {"error": "Dados insuficientes para análise estatística."}
+            return 200, result
+        if method == "POST" and path == "/batch-analyze":
+            if not isinstance(body["match_ids"], list):
+                raise ValueError("match_ids deve ser uma lista")
+            return 200, await self.batch_analyze(body["match_ids"])
+        if method == "GET" and path.startswith("/retrieve/"):
+            return 200, await self.retrieve(path.rsplit("/", 1)[1])
+        if method == "POST" and path == "/settle":
+            return 200, await self.settle()
+        return 404, {"error": f"Rota não encontrada: {method} {path}"}
+
+    async def _on_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            raw = await reader.readexactly(length) if length else b""
+
+            try:
+                body = json.loads(raw) if raw else {}
+                status, payload = await self.handle(method.upper(), path, body)
+            except (KeyError, ValueError) as e:
+                status, payload = 400, {"error": f"Requisição inválida: {e}"}
+            except LookupError as e:
+                status, payload = 404, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERROR'}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, db_path="data/football_data.db"):
+    service = PredictionService(db_path=db_path)
+    await service.start()
+    server = await asyncio.start_server(service._on_connection, host, port)
+    print(f"Serviço de previsões em http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de previsões de escanteios")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="data/football_data.db")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.db))
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import pytest
+
+from src.database.archive import RawArchive, endpoint_key
+from src.database.db_manager import DBManager
+from src.ingestion import reprocess_archive
+
+URL = "https://api.sofascore.com/api/v1"
+
+
+def event(match_id, home=1, away=2):
+    return {'event': {
+        'id': match_id, 'tournament': {'name': 'Liga'}, 'season': {'id': 10}, 'roundInfo': {'round': 3},
+        'status': {'type': 'finished'}, 'startTimestamp': 1_700_000_000 + match_id,
+        'homeTeam': {'id': home, 'name': f'Time {home}'}, 'awayTeam': {'id': away, 'name': f'Time {away}'},
+        'homeScore': {'display': 1}, 'awayScore': {'display': 0},
+    }}
+
+
+def statistics(corners_home, corners_away):
+    def period(name, h, a):
+        return {'period': name, 'groups': [{'statisticsItems': [
+            {'name': 'Corner kicks', 'home': str(h), 'away': str(a)},
+            {'name': 'Shots on target', 'home': '2', 'away': '1'},
+        ]}]}
+    return {'statistics': [period('ALL', corners_home, corners_away), period('1ST', 2, 1)]}
+
+
+def codecs():
+    params = ["gzip"]
+    try:
+        import zstandard  # noqa: F401
+        params.append("zstd")
+    except ImportError:
+        pass
+    return params
+
+
+def test_endpoint_key():
+    assert endpoint_key(f"{URL}/event/123/statistics") == ("event/{}/statistics", "123")
+    assert endpoint_key(f"{URL}/unique-tournament/325/season/72034/events/round/1?x=1") == \
+        ("unique-tournament/{}/season/{}/events/round/{}", "325/72034/1")
+
+
+@pytest.mark.parametrize("codec", codecs())
+def test_archive_round_trip(tmp_path, codec):
+    archive = RawArchive(str(tmp_path / "raw.db"), codec=codec)
+    payloads = {f"{URL}/event/{i}": event(i) for i in range(1, 6)}
+    for url, data in payloads.items():
+        archive.put(url, data)
+    # Resposta mais recente de cada chave prevalece
+    archive.put(f"{URL}/event/3", event(3, home=7))
+    payloads[f"{URL}/event/3"] = event(3, home=7)
+
+    for url, data in payloads.items():
+        assert archive.get(url) == data
+    assert archive.get(f"{URL}/event/99") is None
+
+    chunks = list(archive.iter_chunks(chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    rows = [row for chunk in chunks for row in chunk]
+    assert {(endpoint, key) for endpoint, key, _, _ in rows} == {("event/{}", str(i)) for i in range(1, 6)}
+    assert all(c == codec for _, _, c, _ in rows)
+    assert archive.summary()["event/{}"][0] == 5
+    archive.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reprocess_skips_corrupted_payload(tmp_path, workers):
+    archive = RawArchive(str(tmp_path / "raw.db"))
+    for match_id, corners in ((1, (6, 4)), (2, (3, 5))):
+        archive.put(f"{URL}/event/{match_id}", event(match_id))
+        archive.put(f"{URL}/event/{match_id}/statistics", statistics(*corners))
+    archive.flush()
+    conn = archive.connect()
+    conn.execute("UPDATE raw_payloads SET payload = ? WHERE endpoint = ? AND entity_key = ?",
+                 (b"corrompido", "event/{}/statistics", "2"))
+    conn.commit()
+
+    db = DBManager(str(tmp_path / "football_data.db"))
+    counts = reprocess_archive(archive, db, workers=workers, chunk_size=1)
+    assert counts["payloads"] == 4
+    assert counts["matches"] == 2
+    assert counts["stats"] == 1
+    assert counts["skipped"] == 1
+    assert sum(counts["skip_reasons"].values()) == 1
+
+    assert db.get_match(1) is not None and db.get_match(2) is not None
+    assert db.get_stats_match_ids() == {1}
+    df = db.get_historical_data()
+    row = df[df['match_id'] == 1].iloc[0]
+    assert (row['corners_home_ft'], row['corners_away_ft']) == (6, 4)
+    db.close()
+    archive.close()
@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.analysis.backtest import Backtester
+from src.analysis.statistical import StatisticalAnalyzer
+
+
+class RecordingAnalyzer(StatisticalAnalyzer):
+    # Guarda o que o backtest passou para cada jogo
+    def __init__(self):
+        super().__init__(engine="table")
+        self.seen = {}
+
+    def analyze(self, df_home, df_away, ml_prediction=None, match_name=None, match_id=None, model_params=None):
+        self.seen[match_id] = (df_home.values.copy(), df_away.values.copy(), ml_prediction,
+                               None if model_params is None else np.array(model_params))
+        return super().analyze(df_home, df_away, ml_prediction=ml_prediction, match_id=match_id,
+                               model_params=model_params)
+
+
+def run(df, model):
+    analyzer = RecordingAnalyzer()
+    Backtester(analyzer=analyzer, model=model, retrain_every=10, min_train=20, min_games=2).run(df)
+    return analyzer.seen
+
+
+def assert_same_inputs(a, b):
+    for x, y in zip(a, b):
+        if x is None or y is None:
+            assert x is None and y is None
+        else:
+            np.testing.assert_array_equal(x, y)
+
+
+def test_backtest_ignores_same_timestamp_and_future_games(synthetic_db):
+    df = synthetic_db.get_historical_data()
+    # Duas rodadas no mesmo horário: cada time tem outro jogo no mesmo instante
+    df['start_timestamp'] = df['start_timestamp'] // (30 * 86400) * (30 * 86400)
+    rounds = np.sort(df['start_timestamp'].unique())
+    cutoff = rounds[len(rounds) // 2]
+
+    before = run(df, model="multi")
+
+    # Mexe no resultado de todos os jogos a partir da rodada de corte, inclusive ela
+    changed = df.copy()
+    later = changed['start_timestamp'] >= cutoff
+    for col in ('corners_home_ft', 'corners_away_ft', 'corners_home_ht', 'corners_away_ht',
+                'shots_ot_home_ht', 'shots_ot_away_ht'):
+        changed.loc[later, col] = changed.loc[later, col] * 2 + 3
+    after = run(changed, model="multi")
+
+    targets = df.loc[df['start_timestamp'] == cutoff, 'match_id']
+    assert targets.isin(before.keys()).all()
+    assert any(before[m][2] is not None for m in targets)
+    for match_id in targets:
+        assert_same_inputs(before[match_id], after[match_id])
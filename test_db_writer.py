@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from src.database.connection import DBWriter, get_connection
+
+INSERT = "INSERT INTO t (id, value) VALUES (?, ?)"
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = get_connection(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    conn.commit()
+    return DBWriter(path, batch_size=50)
+
+
+def stored(writer):
+    return get_connection(writer.db_path).execute("SELECT id, value FROM t ORDER BY id").fetchall()
+
+
+def test_flush_waits_for_queued_writes(writer):
+    for i in range(120):
+        writer.submit(INSERT, (i, f"v{i}"))
+    writer.submit_many(INSERT, [(i, f"v{i}") for i in range(120, 200)])
+    writer.flush()
+    assert writer.pending == 0
+    assert stored(writer) == [(i, f"v{i}") for i in range(200)]
+    assert writer.errors == 0
+
+
+def test_bad_rows_do_not_lose_the_batch(writer, capsys):
+    gate = threading.Event()
+    write = writer._write
+
+    def blocked(conn, batch):
+        gate.wait()
+        write(conn, batch)
+
+    writer._write = blocked
+    # Escritora travada: os itens se acumulam e linhas válidas e inválidas caem no mesmo lote
+    writer.submit(INSERT, (0, "a"))
+    writer.submit(INSERT, (1, "b"))
+    writer.submit(INSERT, (1, "duplicada"), error="Erro ao gravar t")
+    writer.submit(INSERT, (2, None))
+    writer.submit(INSERT, (2 ** 70, "overflow"))
+    writer.submit(INSERT, (3, "c"))
+    gate.set()
+    writer.flush()
+
+    assert stored(writer) == [(0, "a"), (1, "b"), (3, "c")]
+    assert writer.errors == 3
+    assert "Erro ao gravar t" in capsys.readouterr().out
+
+    # A escritora segue viva
+    writer.submit(INSERT, (4, "d"))
+    writer.flush()
+    assert stored(writer)[-1] == (4, "d")
+
+
+def test_flush_timeout(writer):
+    gate = threading.Event()
+    write = writer._write
+
+    def blocked(conn, batch):
+        gate.wait()
+        write(conn, batch)
+
+    writer._write = blocked
+    writer.submit(INSERT, (0, "a"))
+    with pytest.raises(TimeoutError):
+        writer.flush(timeout=0.1)
+    gate.set()
+    writer.flush()
+    assert stored(writer) == [(0, "a")]
@@ -0,0 +1,63 @@
+import csv
+import json
+
+import pytest
+
+from src.export import export_dataset
+
+
+@pytest.fixture
+def predictions_db(synthetic_db):
+    # 23 previsões estatísticas em jogos já com estatísticas, liquidadas pelo check_predictions
+    df = synthetic_db.get_historical_data().head(23)
+    for i, match_id in enumerate(df['match_id']):
+        synthetic_db.save_prediction(int(match_id), 'Statistical', 0.0, f"Over {8.5 + i % 3}", 0.55,
+                                     odds=1.8, category='Top7', market_group="JOGO COMPLETO")
+    synthetic_db.check_predictions(verbose=False)
+    return synthetic_db
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("dataset", ["predictions", "settlements"])
+def test_chunked_export_matches_single_chunk(predictions_db, tmp_path, dataset):
+    _, n = export_dataset(predictions_db, dataset, str(tmp_path / "one.csv"), chunk_size=10_000)
+    _, n_chunked = export_dataset(predictions_db, dataset, str(tmp_path / "chunked.csv"), chunk_size=4)
+    assert n == n_chunked == 23
+
+    one, chunked = read_csv(tmp_path / "one.csv"), read_csv(tmp_path / "chunked.csv")
+    assert chunked == one
+    # Cabeçalho uma vez só, mesmo com 6 blocos
+    assert (tmp_path / "chunked.csv").read_text(encoding="utf-8").count("match_id") == 1
+
+    _, n_jsonl = export_dataset(predictions_db, dataset, str(tmp_path / "chunked.jsonl"), chunk_size=4)
+    rows = read_jsonl(tmp_path / "chunked.jsonl")
+    assert n_jsonl == len(rows) == 23
+    assert [{k: "" if v is None else str(v) for k, v in row.items()} for row in rows] == one
+
+
+def test_settlements_export_settles_each_chunk(predictions_db, tmp_path):
+    _, n = export_dataset(predictions_db, "settlements", str(tmp_path / "s.jsonl"), chunk_size=5)
+    rows = read_jsonl(tmp_path / "s.jsonl")
+    assert n == 23
+    for row in rows:
+        total = row["corners_home_ft"] + row["corners_away_ft"]
+        assert row["actual"] == total
+        line = float(row["market"].split()[1])
+        assert row["profit"] == pytest.approx(0.8 if total > line else -1.0)
+        assert row["status"] == ("GREEN" if total > line else "RED")
+
+
+def test_empty_export_writes_header(synthetic_db, tmp_path):
+    path, n = export_dataset(synthetic_db, "predictions", str(tmp_path / "empty.csv"), chunk_size=4)
+    assert n == 0
+    assert read_csv(path) == []
+    assert "match_id" in (tmp_path / "empty.csv").read_text(encoding="utf-8")
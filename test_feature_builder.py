@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.ml.feature_engineering import FULL_FEATURES, FeatureBuilder, build_features, fixture_features
+
+
+def match_data(row):
+    return {
+        'id': int(row.match_id), 'timestamp': int(row.start_timestamp), 'season_id': int(row.season_id),
+        'home_id': int(row.home_team_id), 'away_id': int(row.away_team_id),
+    }
+
+
+def assert_same(actual, expected):
+    np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float), equal_nan=True)
+
+
+def test_fixture_features_equal_last_row_of_build_features(synthetic_db):
+    df = synthetic_db.get_historical_data()
+    built = build_features(df)
+    last = built.iloc[-1]
+
+    # Do zero (sem builder) e com um builder aquecido com o histórico anterior ao jogo
+    f = fixture_features(match_data(last), df)
+    assert_same(f.iloc[0][FULL_FEATURES], last[FULL_FEATURES])
+
+    builder = FeatureBuilder()
+    builder.update_many(df[df['start_timestamp'] < last['start_timestamp']])
+    f = fixture_features(match_data(last), df, builder=builder)
+    assert_same(f.iloc[0][FULL_FEATURES], last[FULL_FEATURES])
+
+
+def test_warmed_builder_is_not_used_after_the_fixture():
+    # Um builder que já viu jogos posteriores não pode vazar o resultado
+    builder = FeatureBuilder()
+    builder.last_key = (2_000_000_000, 1)
+    fixture = {'id': 5, 'timestamp': 1_000, 'season_id': 1, 'home_id': 1, 'away_id': 2}
+    f = fixture_features(fixture, None, builder=builder)
+    assert np.isnan(f.iloc[0]['home_avg_corners'])
+
+
+def test_update_many_with_backfill_equals_fresh_build(synthetic_db):
+    df = synthetic_db.get_historical_data().sort_values(['start_timestamp', 'match_id'])
+    old, recent = df.iloc[:40], df.iloc[40:]
+
+    # Chega primeiro o histórico recente, depois o antigo (backfill)
+    builder = FeatureBuilder()
+    builder.update_many(recent)
+    builder.update_many(pd.concat([old, recent]))
+    fresh = FeatureBuilder()
+    fresh.update_many(df)
+
+    row = df.iloc[-1]
+    assert builder.last_key == fresh.last_key
+    args = (row.home_team_id, row.away_team_id, row.start_timestamp + 1, row.season_id)
+    warmed, expected = builder.features_for(*args), fresh.features_for(*args)
+    assert_same([warmed[c] for c in FULL_FEATURES], [expected[c] for c in FULL_FEATURES])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.analysis.markets import Market, line_components, settle_selection
+from src.analysis.probability_table import get_probability_table, line_probabilities, line_probabilities_many
+
+
+def test_line_components():
+    assert line_components(9.5) == (9.5,)
+    assert line_components(10.0) == (10.0,)
+    assert line_components(9.75) == (9.5, 10.0)
+    assert line_components(9.25) == (9.0, 9.5)
+    assert line_components(-0.25) == (-0.5, 0.0)
+    with pytest.raises(ValueError):
+        line_components(9.1)
+
+
+def test_market_rejects_negative_line():
+    with pytest.raises(ValueError):
+        Market("X", "ft", "both", (-0.5,))
+
+
+@pytest.mark.parametrize("selection, corners, expected", [
+    ("Over 9.5", 10, ("GREEN", 1.0)),
+    ("Over 9.5", 9, ("RED", -1.0)),
+    ("Under 10.0", 10, ("PUSH", 0.0)),
+    ("Over 9.75", 10, ("GREEN", 0.5)),   # metade ganha (9.5), metade devolvida (10.0)
+    ("Over 9.25", 9, ("RED", -0.5)),     # metade devolvida (9.0), metade perdida (9.5)
+    ("Under 9.25", 9, ("GREEN", 0.5)),
+    ("Corners 9.5", 10, ("RED", -1.0)),
+])
+def test_settle_selection(selection, corners, expected):
+    status, profit = settle_selection(selection, corners)
+    assert status == expected[0]
+    assert profit == pytest.approx(expected[1])
+
+
+def test_settle_selection_uses_odd():
+    assert settle_selection("Over 9.75", 11, odd=1.9) == ("GREEN", pytest.approx(0.9))
+    assert settle_selection("Over 9.75", 10, odd=1.9) == ("GREEN", pytest.approx(0.45))
+
+
+def test_line_probabilities_many_matches_scalar():
+    cdfs = get_probability_table().cdf_rows([8.0, 10.0, 12.0, 9.5, 4.0], [8.0, 14.0, 12.0, 20.0, 4.0])
+    lines = np.array([9.5, 10.0, 9.75, 9.25, -0.25])
+    over, under, push = line_probabilities_many(cdfs, lines)
+    for i, line in enumerate(lines):
+        expected = line_probabilities(cdfs[i], line)
+        assert (over[i], under[i], push[i]) == pytest.approx(expected)
+    # Quarter line não tem devolução inteira: push é metade da linha inteira vizinha
+    assert push[2] == pytest.approx(line_probabilities(cdfs[2], 10.0)[2] / 2)
+    # Linha já passada (ao vivo): o under está perdido; só a metade em 0.0 pode devolver
+    assert under[4] == pytest.approx(0.0)
+    assert over[4] + push[4] == pytest.approx(1.0)
@@ -0,0 +1,29 @@
+import pytest
+
+from src.orchestrator import Step, step_order
+
+
+def names(steps):
+    return [s.name for s in step_order(steps)]
+
+
+def test_step_order_respects_deps_and_declaration_order():
+    steps = [
+        Step("preanalyze", None, deps=("fixtures",), after=("retrain",)),
+        Step("retrain", None, after=("sync",)),
+        Step("fixtures", None, deps=("sync",)),
+        Step("sync", None),
+        Step("settle", None, after=("sync",)),
+    ]
+    assert names(steps) == ["sync", "retrain", "fixtures", "preanalyze", "settle"]
+
+
+def test_step_order_ignores_unselected_steps():
+    # --only: passos fora da seleção não seguram ninguém
+    steps = [Step("preanalyze", None, deps=("fixtures",)), Step("settle", None, after=("sync",))]
+    assert names(steps) == ["preanalyze", "settle"]
+
+
+def test_step_order_detects_cycle():
+    with pytest.raises(ValueError):
+        step_order([Step("a", None, deps=("b",)), Step("b", None, deps=("a",))])
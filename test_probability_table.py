@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from scipy.stats import nbinom, poisson
+
+from src.analysis.probability_table import get_probability_table
+
+
+@pytest.mark.parametrize("lam", [0.5, 4.0, 9.5, 12.35])
+def test_poisson_rows_match_scipy(lam):
+    table = get_probability_table()
+    k = np.arange(table.k_max + 1)
+    assert table.cdf(lam, lam * 0.8) == pytest.approx(poisson.cdf(k, lam), abs=1e-9)
+
+
+@pytest.mark.parametrize("lam, var", [(4.0, 6.0), (9.5, 19.0), (11.0, 27.5)])
+def test_nbinom_rows_match_scipy(lam, var):
+    # Mesma parametrização de StatisticalAnalyzer.monte_carlo_simulation
+    table = get_probability_table()
+    k = np.arange(table.k_max + 1)
+    p = lam / var
+    n = lam ** 2 / (var - lam)
+    assert table.cdf(lam, var) == pytest.approx(nbinom.cdf(k, n, p), abs=1e-9)
+
+
+def test_cdf_rows_mixes_families_and_buckets():
+    table = get_probability_table()
+    rows = table.cdf_rows([9.5, 9.5, 9.52], [19.0, 9.0, np.nan])
+    k = np.arange(table.k_max + 1)
+    assert rows[0] == pytest.approx(nbinom.cdf(k, 9.5, 0.5), abs=1e-9)
+    assert rows[1] == pytest.approx(poisson.cdf(k, 9.5), abs=1e-9)
+    # Fora da grade: bucket mais próximo (9.50); variância NaN = Poisson
+    assert rows[2] == pytest.approx(poisson.cdf(k, 9.5), abs=1e-9)
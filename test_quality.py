@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.database.quality import (
+    HT_EXCEEDS_FT, HT_MISSING, IMPLAUSIBLE, MISSING, NEGATIVE, REFETCHABLE, ZERO_FILLED,
+    describe_flags, quality_flags, stats_flags,
+)
+
+# corners_home_ft, corners_away_ft, corners_home_ht, corners_away_ht,
+# shots_ot_home_ft, shots_ot_away_ft, shots_ot_home_ht, shots_ot_away_ht
+OK = [6, 4, 3, 2, 5, 3, 2, 1]
+
+
+def test_quality_flags():
+    rows = [
+        OK,
+        [6, 4, np.nan, 2, 5, 3, 2, 1],
+        [0] * 8,
+        [6, 4, 7, 2, 5, 3, 2, 1],
+        [6, -1, 3, -2, 5, 3, 2, 1],
+        [30, 4, 3, 2, 5, 3, 2, 1],
+        [8, 6, 0, 0, 5, 3, 0, 0],
+    ]
+    flags = quality_flags(rows).tolist()
+    assert flags[0] == 0
+    assert flags[1] == MISSING
+    assert flags[2] == ZERO_FILLED
+    assert flags[3] == HT_EXCEEDS_FT
+    assert flags[4] & NEGATIVE
+    assert flags[5] == IMPLAUSIBLE
+    assert flags[6] == HT_MISSING
+
+
+def test_quality_flags_matches_single_row():
+    keys = ('corners_home_ft', 'corners_away_ft', 'corners_home_ht', 'corners_away_ht',
+            'shots_ot_home_ft', 'shots_ot_away_ft', 'shots_ot_home_ht', 'shots_ot_away_ht')
+    stats = dict(zip(keys, OK), corners_home_ht=None)
+    assert stats_flags(stats) == MISSING
+    assert stats_flags(dict(zip(keys, OK))) == 0
+
+
+def test_refetchable_and_describe():
+    assert REFETCHABLE & MISSING and REFETCHABLE & ZERO_FILLED
+    assert not REFETCHABLE & (HT_EXCEEDS_FT | NEGATIVE | IMPLAUSIBLE | HT_MISSING)
+    assert describe_flags(0) == "ok"
+    assert describe_flags(MISSING | HT_MISSING) == "missing,ht_missing"
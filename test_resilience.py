@@ -0,0 +1,86 @@
+import pytest
+
+from src.scrapers.resilience import (
+    CLIENT_ERROR, NETWORK, NOT_FOUND, OK, SERVER_ERROR, THROTTLED, TIMEOUT,
+    AIMDRateLimiter, CircuitBreaker, FetchResult, backoff_delay, classify, retry_after_seconds,
+)
+
+
+def test_classify_and_missing():
+    assert classify(200) == OK
+    assert classify(404) == NOT_FOUND
+    assert classify(429) == THROTTLED
+    assert classify(503) == SERVER_ERROR
+    assert classify(400) == CLIENT_ERROR
+    assert classify(0) == NETWORK
+    assert classify(200, "timeout") == TIMEOUT
+    assert FetchResult("u", 503, SERVER_ERROR).missing
+    assert not FetchResult("u", 404, NOT_FOUND).missing
+
+
+def test_aimd_rate_limiter():
+    limiter = AIMDRateLimiter(rate=2.0, min_rate=0.5, max_rate=3.0, increase=0.5, decrease=0.5, cooldown=60)
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(2.25)
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(1.125)
+    # Vários 429 na mesma janela contam como um único corte
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(1.125)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == 3.0
+    assert limiter.burst(32) == 1
+    assert AIMDRateLimiter(rate=5.0).burst(32) == 2
+
+
+def test_aimd_rate_limiter_floor_and_retry_after():
+    limiter = AIMDRateLimiter(rate=1.0, min_rate=0.5, decrease=0.1, cooldown=0)
+    limiter.on_throttle(retry_after=30)
+    assert limiter.rate == 0.5
+    assert limiter._next > 0
+
+
+def test_circuit_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.remaining() == 10
+
+    now[0] = 10
+    # Meio aberto: uma única requisição de teste
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_retry_after_seconds_and_http_date():
+    assert retry_after_seconds("120") == 120.0
+    assert retry_after_seconds("Wed, 21 Oct 2026 07:28:00 GMT", now=1792567670.0) == 10.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("em breve") is None
+    assert retry_after_seconds("inf") is None
+    assert retry_after_seconds(None) is None
+
+
+def test_backoff_and_throttle_accept_http_date():
+    # Data HTTP (forma válida do Retry-After) não pode derrubar o loop de fetch
+    assert backoff_delay(0, base=0.001, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") <= 0.001
+    assert backoff_delay(0, base=0.001, retry_after="lixo") <= 0.001
+    assert backoff_delay(0, base=0.001, cap=5, retry_after="30") == 5
+    limiter = AIMDRateLimiter(rate=1.0, cooldown=0)
+    limiter.on_throttle(retry_after="Wed, 21 Oct 2015 07:28:00 GMT")
+    assert limiter.rate == pytest.approx(0.7)
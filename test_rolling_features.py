@@ -0,0 +1,20 @@
+import pandas as pd
+
+from src.ml.feature_engineering import FEATURES, calculate_rolling_stats, load_training_data, prepare_training_data
+
+
+def test_sql_rolling_features_match_pandas(synthetic_db):
+    df = synthetic_db.get_historical_data()
+    expected = calculate_rolling_stats(df).set_index('match_id').sort_index()
+    actual = synthetic_db.get_rolling_features().set_index('match_id').sort_index()
+
+    assert list(actual.index) == list(expected.index)
+    pd.testing.assert_frame_equal(actual[FEATURES], expected[FEATURES], check_dtype=False, atol=1e-9)
+
+
+def test_load_training_data_matches_prepare_training_data(synthetic_db):
+    X_sql, y_sql, df_sql = load_training_data(synthetic_db)
+    X_pd, y_pd, df_pd = prepare_training_data(synthetic_db.get_historical_data())
+    sql = X_sql.assign(y=y_sql.to_numpy(), match_id=df_sql['match_id'].to_numpy()).sort_values('match_id')
+    pdf = X_pd.assign(y=y_pd.to_numpy(), match_id=df_pd['match_id'].to_numpy()).sort_values('match_id')
+    pd.testing.assert_frame_equal(sql.reset_index(drop=True), pdf.reset_index(drop=True), check_dtype=False)
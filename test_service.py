@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from src.service import PredictionService
+
+
+class FakeService(PredictionService):
+    # Só o caminho assíncrono (coalescing e cache): sem banco nem browser
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    async def _compute(self, match_id):
+        self.calls.append(match_id)
+        await asyncio.sleep(0.01)
+        return {"match_id": match_id}
+
+
+def test_concurrent_analyze_shares_one_computation():
+    async def run():
+        service = FakeService()
+        a, b = await asyncio.gather(service.analyze(7), service.analyze("7"))
+        assert a is b
+        assert service.calls == [7]
+        # Depois: vem do cache, sem nova computação
+        assert await service.analyze(7) is a
+        assert service.calls == [7]
+        await service.analyze(7, refresh=True)
+        assert service.calls == [7, 7]
+
+    asyncio.run(run())
+
+
+def test_concurrent_failure_reaches_every_caller():
+    class Failing(FakeService):
+        async def _compute(self, match_id):
+            self.calls.append(match_id)
+            await asyncio.sleep(0.01)
+            raise LookupError("não encontrado")
+
+    async def run():
+        service = Failing()
+        results = await asyncio.gather(service.analyze(1), service.analyze(1), return_exceptions=True)
+        assert all(isinstance(r, LookupError) for r in results)
+        assert service.calls == [1]
+        assert not service._inflight
+
+    asyncio.run(run())
+
+
+def test_cache_is_bounded_and_drops_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.service.time.time", lambda: now[0])
+
+    async def run():
+        service = FakeService(cache_size=2, cache_ttl=60)
+        for mid in (1, 2, 3):
+            await service.analyze(mid)
+        assert list(service._cache) == [2, 3]
+
+        await service.analyze(2)  # hit: passa a ser a mais usada
+        await service.analyze(4)
+        assert list(service._cache) == [2, 4]
+
+        now[0] += 61
+        await service.analyze(5)
+        assert list(service._cache) == [5]
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scipy.stats import poisson
+
+from src.analysis.probability_table import line_probabilities
+from src.analysis.statistical import SAMPLING_METHODS, StatisticalAnalyzer
+
+
+def params_for(analyzer, lambda_val=10.0, var_val=10.0):
+    return np.tile([lambda_val, var_val], (len(analyzer.markets), 1))
+
+
+def probs(opportunities):
+    return [(o.market, o.selection, o.prob, o.se) for o in opportunities]
+
+
+@pytest.mark.parametrize("sampling", SAMPLING_METHODS)
+def test_same_seed_and_match_reproduce(sampling):
+    a = StatisticalAnalyzer(sampling=sampling, seed=7)
+    b = StatisticalAnalyzer(sampling=sampling, seed=7)
+    params = params_for(a)
+    first = probs(a.score_match(params, match_id=123))
+    assert first == probs(b.score_match(params, match_id=123))
+    # Outro jogo usa outro stream
+    assert first != probs(a.score_match(params, match_id=124))
+
+
+def test_market_stream_does_not_depend_on_catalog_order():
+    a = StatisticalAnalyzer(seed=7)
+    b = StatisticalAnalyzer(markets=list(reversed(a.markets)), seed=7)
+    params = params_for(a)
+    assert sorted(probs(a.score_match(params, match_id=1))) == sorted(probs(b.score_match(params, match_id=1)))
+
+
+@pytest.mark.parametrize("sampling", SAMPLING_METHODS)
+def test_standard_error_bounds_the_poisson_probability(sampling):
+    analyzer = StatisticalAnalyzer(sampling=sampling, seed=11)
+    lam = 10.0
+    exact = poisson(lam).cdf(np.arange(200))
+    ops = analyzer.score_match(params_for(analyzer, lam, lam), match_id=99)
+    assert ops
+    for op in ops:
+        line = float(op.selection.split()[1])
+        over, under, _ = line_probabilities(exact, line)
+        truth = over if op.kind == "OVER" else under
+        assert 0 < op.se < 0.02
+        assert abs(op.prob - truth) <= 5 * op.se + 1e-3
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis.pipeline import team_profile
+from src.analysis.statistical import StatisticalAnalyzer
+from src.analysis.team_cache import TeamParameterCache, team_key
+
+
+def history():
+    rows = []
+    for i in range(8):
+        home, away = (1, 2) if i % 2 == 0 else (2, 1)
+        rows.append({
+            'match_id': 100 + i, 'home_team_id': home, 'away_team_id': away, 'tournament_name': 'T',
+            'corners_home_ft': 5 + i % 3, 'corners_away_ft': 4, 'corners_home_ht': 2, 'corners_away_ht': 1,
+            'shots_ot_home_ht': 2, 'shots_ot_away_ht': np.nan if i == 7 else 1,
+        })
+    return pd.DataFrame(rows)
+
+
+def test_cache_hits_on_same_window_and_misses_on_new_data():
+    df = history()
+    analyzer = StatisticalAnalyzer(markets=[])
+    cache = TeamParameterCache()
+
+    first = team_profile(df, 1, analyzer, cache=cache)
+    assert team_profile(df, 1, analyzer, cache=cache) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Estatística regravada (re-busca, reprocess) muda a chave
+    rewritten = df.copy()
+    rewritten.loc[rewritten['match_id'] == 107, 'corners_home_ft'] = 15
+    assert team_profile(rewritten, 1, analyzer, cache=cache) is not first
+    assert cache.misses == 2
+
+    # Jogo novo na janela também
+    extra = pd.concat([df, df.tail(1).assign(match_id=200)], ignore_index=True)
+    team_profile(extra, 1, analyzer, cache=cache)
+    assert cache.misses == 3
+
+
+def test_key_with_missing_values_still_hits():
+    # shots_ot_away_ht NaN no último jogo: a chave precisa se repetir
+    df = history()
+    games = df[(df['home_team_id'] == 1) | (df['away_team_id'] == 1)].tail(5)
+    assert team_key(1, games) == team_key(1, games.copy())
+    cache = TeamParameterCache()
+    analyzer = StatisticalAnalyzer(markets=[])
+    team_profile(df, 1, analyzer, cache=cache)
+    team_profile(df, 1, analyzer, cache=cache)
+    assert cache.hits == 1 and len(cache) == 1
+
+
+def test_lru_evicts_oldest():
+    cache = TeamParameterCache(maxsize=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute(key, lambda: object())
+    assert len(cache) == 2
+    assert cache.hits == 1
+    cache.get_or_compute("b", lambda: object())
+    assert cache.misses == 4
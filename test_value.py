@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import poisson
+
+from src.analysis.markets import DEFAULT_MARKETS
+from src.analysis.value import ValueScanner, edge_and_kelly
+from src.ingestion import read_odds_csv
+
+
+def test_edge_and_kelly_known_cases():
+    # p=0.6 a odd 2.0: edge 0.2, Kelly cheio 0.2
+    edge, kelly = edge_and_kelly(0.6, 0.4, 2.0, fraction=1.0, max_stake=1.0)
+    assert edge == pytest.approx(0.2)
+    assert kelly == pytest.approx(0.2)
+    # Com devolução (linha inteira): 20% de push
+    edge, kelly = edge_and_kelly(0.5, 0.3, 2.0, fraction=1.0, max_stake=1.0)
+    assert edge == pytest.approx(0.2)
+    assert kelly == pytest.approx(0.25)
+    # Fração e teto
+    assert edge_and_kelly(0.6, 0.4, 2.0)[1] == pytest.approx(0.05)
+    assert edge_and_kelly(0.6, 0.4, 2.0, max_stake=0.01)[1] == pytest.approx(0.01)
+    # Sem valor ou odd 1.0: stake zero
+    assert edge_and_kelly(0.4, 0.6, 2.0)[1] == 0
+    assert edge_and_kelly(0.6, 0.4, 1.0)[1] == 0
+
+
+def test_scan_edge_against_poisson():
+    scanner = ValueScanner(DEFAULT_MARKETS)
+    scanner.set_parameters(1, np.tile([10.0, 10.0], (len(DEFAULT_MARKETS), 1)))
+    odds = pd.DataFrame([
+        (1, "JOGO COMPLETO", 9.5, "OVER", 1.80, "a"),
+        (1, "JOGO COMPLETO", 9.5, "OVER", 1.95, "b"),
+        (1, "JOGO COMPLETO", 10.0, "UNDER", 2.10, "a"),
+        (1, "MERCADO QUALQUER", 9.5, "OVER", 5.00, "a"),
+        (2, "JOGO COMPLETO", 9.5, "OVER", 5.00, "a"),
+    ], columns=["match_id", "market", "line", "kind", "odd", "bookmaker"])
+
+    out = scanner.scan(odds)
+    assert len(out) == 2
+    assert list(out["edge"]) == sorted(out["edge"], reverse=True)
+
+    over = out[out["kind"] == "OVER"].iloc[0]
+    p = 1 - poisson.cdf(9, 10.0)
+    assert over["odd"] == 1.95 and over["bookmaker"] == "b"
+    assert over["prob"] == pytest.approx(p, abs=1e-9)
+    assert over["push"] == 0
+    assert over["edge"] == pytest.approx(p * 0.95 - (1 - p), abs=1e-9)
+
+    under = out[out["kind"] == "UNDER"].iloc[0]
+    p_push = poisson.pmf(10, 10.0)
+    p_win = poisson.cdf(9, 10.0)
+    assert under["push"] == pytest.approx(p_push, abs=1e-9)
+    assert under["edge"] == pytest.approx(p_win * 1.10 - (1 - p_win - p_push), abs=1e-9)
+    assert under["fair_odd"] == pytest.approx((1 - p_push) / p_win, abs=1e-9)
+
+    assert scanner.scan(odds, min_edge=1.0).empty
+    assert len(scanner.scan(odds, best_only=False)) == 3
+
+
+def test_read_odds_csv_skips_bad_rows(tmp_path):
+    path = tmp_path / "odds.csv"
+    path.write_text(
+        "match_id,market,selection,odd\n"
+        "1,JOGO COMPLETO,Over 9.5,1.90\n"
+        "1,JOGO COMPLETO,under 10,2.05\n"
+        "1,MERCADO QUALQUER,Over 9.5,1.90\n"
+        "1,JOGO COMPLETO,Over,1.90\n"
+        "1,JOGO COMPLETO,Acima 9.5,1.90\n"
+        "1,JOGO COMPLETO,Over 9.5,0.95\n"
+        "x,JOGO COMPLETO,Over 9.5,1.90\n"
+        "2,TOTAL MANDANTE,Over 4.5,abc\n",
+        encoding="utf-8",
+    )
+    rows, skipped = read_odds_csv(path, DEFAULT_MARKETS)
+    assert skipped == [4, 5, 6, 7, 8, 9]
+    assert rows == [
+        {'match_id': 1, 'market': "JOGO COMPLETO", 'line': 9.5, 'kind': "OVER", 'odd': 1.90,
+         'bookmaker': "csv", 'source': "csv"},
+        {'match_id': 1, 'market': "JOGO COMPLETO", 'line': 10.0, 'kind': "UNDER", 'odd': 2.05,
+         'bookmaker': "csv", 'source': "csv"},
+    ]
+
+
+def test_read_odds_csv_missing_columns(tmp_path):
+    path = tmp_path / "odds.csv"
+    path.write_text("match_id,market,odd\n1,JOGO COMPLETO,1.9\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="line\\+kind ou selection"):
+        read_odds_csv(path, DEFAULT_MARKETS)
+
+    path.write_text("match_id,line,kind\n1,9.5,OVER\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="market, odd"):
+        read_odds_csv(path, DEFAULT_MARKETS)